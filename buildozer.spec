@@ -19,6 +19,7 @@ requirements =
     pillow==10.2.0,
     requests==2.31.0,
     android==1.0.0,
+    sqlite3,
     setuptools,
     packaging
 
@@ -6,13 +6,26 @@ OrderManager — Мобильное приложение для управлен
 """
 import os
 import json
+import gzip
 import shutil
+import hashlib
+import sqlite3
+import threading
+import time
+import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
 from datetime import datetime, date, timedelta
 from collections import defaultdict
-from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
 
 # Kivy imports
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
@@ -22,7 +35,12 @@ from kivy.uix.button import Button
 from kivy.uix.textinput import TextInput
 from kivy.uix.popup import Popup
 from kivy.uix.dropdown import DropDown
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.graphics import Color, Rectangle, Line
+from kivy.lang import Builder
+from kivy.properties import ColorProperty
 from kivy.core.window import Window
 from kivy.metrics import dp
 from kivy.utils import get_color_from_hex, platform as kivy_platform
@@ -93,169 +111,2658 @@ class BusinessLogic:
             return 150
         return 200
 
+# Модели данных
+class Model:
+    """Запись с фиксированным набором полей (__slots__) вместо словаря.
+
+    Экземпляр не хранит собственный словарь атрибутов и повторяющиеся ключи,
+    поэтому занимает в несколько раз меньше памяти. На диск и в журнал
+    по-прежнему пишется словарь прежнего формата (to_dict / from_dict).
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Model":
+        return cls(*(data[field] for field in cls.__slots__))
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def to_tuple(self) -> Tuple:
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.to_tuple() == other.to_tuple()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Product(Model):
+    """Товар каталога."""
+
+    __slots__ = ("name", "cost_price", "profit", "expenses", "percent_expenses", "percent_profit")
+
+    def __init__(self, name: str, cost_price: float, profit: float, expenses: float,
+                 percent_expenses: float, percent_profit: float) -> None:
+        self.name = name
+        self.cost_price = cost_price
+        self.profit = profit
+        self.expenses = expenses
+        self.percent_expenses = percent_expenses
+        self.percent_profit = percent_profit
+
+    @classmethod
+    def create(cls, name: str, cost_price: float, profit: float) -> "Product":
+        """Товар с затратами и процентами, рассчитанными по стоимости и прибыли."""
+        return cls(
+            name, cost_price, profit, cost_price - profit,
+            BusinessLogic.calculate_percent_expenses(cost_price, profit),
+            BusinessLogic.calculate_percent_profit(cost_price, profit)
+        )
+
+
+class StockEntry(Model):
+    """Остаток товара на складе."""
+
+    __slots__ = ("current_quantity", "total_value")
+
+    def __init__(self, current_quantity: float = 0.0, total_value: float = 0.0) -> None:
+        self.current_quantity = current_quantity
+        self.total_value = total_value
+
+    @property
+    def avg_price(self) -> float:
+        return self.total_value / self.current_quantity if self.current_quantity > 0 else 0.0
+
+
+class HistoryRecord(Model):
+    """Запись истории склада (пополнение или корректировка)."""
+
+    __slots__ = ("date", "quantity", "price_per_kg", "operation", "total_amount", "balance_after")
+
+    def __init__(self, date: str, quantity: float, price_per_kg: float, operation: str,
+                 total_amount: float, balance_after: float) -> None:
+        self.date = date
+        self.quantity = quantity
+        self.price_per_kg = price_per_kg
+        self.operation = operation
+        self.total_amount = total_amount
+        self.balance_after = balance_after
+
+    @property
+    def month(self) -> str:
+        return self.date[:7]
+
+# Колоночная история склада
+class HistoryColumns:
+    """История одного товара по столбцам: даты — секунды от эпохи (array('q')),
+    числа — array('d'), вид операции — код array('b').
+
+    Записи идут по времени, поэтому выборка по диапазону дат — два bisect и срезы
+    непрерывных буферов, а суммы считаются по ним без создания записей.
+    """
+
+    NUMERIC = ("quantity", "price_per_kg", "total_amount", "balance_after")
+    OPERATIONS = ("пополнение", "корректировка")
+    EPOCH = datetime(1970, 1, 1)
+    MAGIC = b"HCOL"
+    HEADER = struct.Struct("<4sBI")
+    VERSION = 1
+
+    __slots__ = ("dates", "operations") + NUMERIC
+
+    def __init__(self) -> None:
+        self.dates = array("q")
+        self.operations = array("b")
+        self.quantity = array("d")
+        self.price_per_kg = array("d")
+        self.total_amount = array("d")
+        self.balance_after = array("d")
+
+    @classmethod
+    def to_epoch(cls, value: str) -> int:
+        """'ГГГГ-ММ-ДД[ ЧЧ:ММ:СС]' → секунды от 1970-01-01 (без часового пояса, как в данных)."""
+        return int((datetime.fromisoformat(value) - cls.EPOCH).total_seconds())
+
+    @classmethod
+    def from_epoch(cls, seconds: int) -> str:
+        return (cls.EPOCH + timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S")
+
+    @classmethod
+    def from_records(cls, records) -> "HistoryColumns":
+        columns = cls()
+        for record in records:
+            columns.append(record)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def append(self, record: HistoryRecord) -> None:
+        self.dates.append(self.to_epoch(record.date))
+        self.operations.append(self.OPERATIONS.index(record.operation))
+        self.quantity.append(record.quantity)
+        self.price_per_kg.append(record.price_per_kg)
+        self.total_amount.append(record.total_amount)
+        self.balance_after.append(record.balance_after)
+
+    def record(self, index: int) -> HistoryRecord:
+        return HistoryRecord(
+            self.from_epoch(self.dates[index]), self.quantity[index], self.price_per_kg[index],
+            self.OPERATIONS[self.operations[index]], self.total_amount[index], self.balance_after[index]
+        )
+
+    def records(self):
+        return (self.record(i) for i in range(len(self)))
+
+    def bounds(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """Индексы [lo, hi) записей с start <= дата < end."""
+        lo = bisect_left(self.dates, self.to_epoch(start)) if start else 0
+        hi = bisect_left(self.dates, self.to_epoch(end)) if end else len(self.dates)
+        return lo, max(lo, hi)
+
+    def slice(self, start: Optional[str] = None, end: Optional[str] = None) -> "HistoryColumns":
+        lo, hi = self.bounds(start, end)
+        part = HistoryColumns()
+        for name in self.__slots__:
+            setattr(part, name, getattr(self, name)[lo:hi])
+        return part
+
+    def total(self, field: str, start: Optional[str] = None, end: Optional[str] = None,
+              operation: Optional[str] = None) -> float:
+        """Сумма числового столбца за период, при необходимости — только по одному виду операций."""
+        if field not in self.NUMERIC:
+            raise ValueError(f"Нечисловой столбец: {field}")
+        lo, hi = self.bounds(start, end)
+        values = memoryview(getattr(self, field))[lo:hi]
+        if operation is None:
+            return sum(values)
+        code = self.OPERATIONS.index(operation)
+        codes = self.operations
+        return sum(v for i, v in enumerate(values, lo) if codes[i] == code)
+
+    def last(self, operation: str) -> Optional[HistoryRecord]:
+        """Последняя запись с данным видом операции."""
+        code = self.OPERATIONS.index(operation)
+        for index in range(len(self) - 1, -1, -1):
+            if self.operations[index] == code:
+                return self.record(index)
+        return None
+
+    def balance_at(self, moment: str) -> float:
+        """Остаток после последней записи не позже moment."""
+        index = bisect_right(self.dates, self.to_epoch(moment))
+        return self.balance_after[index - 1] if index else 0.0
+
+    def to_bytes(self) -> bytes:
+        parts = [self.HEADER.pack(self.MAGIC, self.VERSION, len(self))]
+        for name in self.__slots__:
+            column = getattr(self, name)
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "HistoryColumns":
+        magic, version, count = cls.HEADER.unpack_from(payload)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("Неизвестный формат колоночной истории")
+        columns = cls()
+        offset = cls.HEADER.size
+        for name in cls.__slots__:
+            column = getattr(columns, name)
+            size = column.itemsize * count
+            column.frombytes(payload[offset:offset + size])
+            if sys.byteorder == "big":
+                column.byteswap()
+            offset += size
+        return columns
+
+# Индекс каталога товаров
+class ProductSearchIndex:
+    """Поиск по мере ввода: префиксы слов названия и триграммы для опечаток.
+
+    Слова хранятся отсортированными парами (слово, ключ товара), поэтому все слова
+    с заданным префиксом — один непрерывный диапазон, найденный bisect. Триграммы
+    ведут к товарам, похожим на запрос, даже если в нём опечатка.
+    """
+
+    __slots__ = ("_words", "_grams")
+
+    # Доля триграмм запроса, которые должны найтись в названии для нечёткого совпадения
+    FUZZY_THRESHOLD = 0.4
+
+    def __init__(self, keys=()) -> None:
+        self._words: List[Tuple[str, str]] = sorted({(w, k) for k in keys for w in k.split()})
+        self._grams: Dict[str, set] = defaultdict(set)
+        for key in keys:
+            for gram in self.trigrams(key):
+                self._grams[gram].add(key)
+
+    @staticmethod
+    def trigrams(text: str) -> set:
+        padded = f"  {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, key: str) -> None:
+        for word in set(key.split()):
+            insort(self._words, (word, key))
+        for gram in self.trigrams(key):
+            self._grams[gram].add(key)
+
+    def discard(self, key: str) -> None:
+        for word in set(key.split()):
+            index = bisect_left(self._words, (word, key))
+            if index < len(self._words) and self._words[index] == (word, key):
+                del self._words[index]
+        for gram in self.trigrams(key):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+
+    def prefix(self, word: str) -> set:
+        """Ключи товаров, одно из слов которых начинается с word."""
+        words = self._words
+        found = set()
+        for index in range(bisect_left(words, (word,)), len(words)):
+            candidate, key = words[index]
+            if not candidate.startswith(word):
+                break
+            found.add(key)
+        return found
+
+    def fuzzy(self, query: str) -> List[Tuple[float, str]]:
+        """(доля совпавших триграмм, ключ) для названий, похожих на запрос."""
+        grams = self.trigrams(query)
+        counts: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for key in self._grams.get(gram, ()):
+                counts[key] += 1
+        total = len(grams)
+        return [(count / total, key) for key, count in counts.items()
+                if count / total >= self.FUZZY_THRESHOLD]
+
+
+class CatalogIndex:
+    """Товары профиля по имени без учёта регистра.
+
+    Поиск, проверка дублей, переименование и удаление — O(1) вместо прохода по списку.
+    Рядом хранится отсортированный список имён: он обновляется вставкой bisect,
+    и экранам не нужно сортировать каталог при каждом показе.
+    """
+
+    __slots__ = ("_by_key", "_names", "_search")
+
+    def __init__(self, products: List[Dict] = ()) -> None:
+        self._by_key: Dict[str, Dict] = {self.key(p["name"]): p for p in products}
+        self._names: List[str] = sorted(p["name"] for p in self._by_key.values())
+        self._search = ProductSearchIndex(self._by_key)
+
+    @staticmethod
+    def key(name: str) -> str:
+        return name.strip().casefold()
+
+    def __contains__(self, name: str) -> bool:
+        return self.key(name) in self._by_key
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def get(self, name: str) -> Optional[Dict]:
+        return self._by_key.get(self.key(name))
+
+    def sorted_names(self) -> List[str]:
+        return self._names
+
+    def sorted_products(self):
+        """Товары в порядке имён — без сортировки."""
+        by_key = self._by_key
+        return (by_key[self.key(name)] for name in self._names)
+
+    def add(self, product: Dict) -> None:
+        key = self.key(product["name"])
+        if key in self._by_key:
+            self.discard(self._by_key[key]["name"])
+        self._by_key[key] = product
+        insort(self._names, product["name"])
+        self._search.add(key)
+
+    def discard(self, name: str) -> Optional[Dict]:
+        """Убирает товар с именем name (при переименовании сам товар уже может носить новое имя)."""
+        product = self._by_key.pop(self.key(name), None)
+        if product is None:
+            return None
+        self._search.discard(self.key(name))
+        index = bisect_left(self._names, name)
+        if index < len(self._names) and self._names[index] == name:
+            del self._names[index]
+        else:
+            key = self.key(name)
+            self._names = [n for n in self._names if self.key(n) != key]
+        return product
+
+    def rename(self, old_name: str, product: Dict) -> None:
+        self.discard(old_name)
+        self.add(product)
+
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """Товары, у которых каждое слово запроса — префикс одного из слов названия (по имени).
+
+        Если таких нет, запрос считается опечаткой и ищутся похожие по триграммам
+        (по убыванию сходства). Пустой запрос — начало каталога.
+        """
+        query = self.key(query)
+        if not query:
+            return list(islice(self.sorted_products(), limit))
+        
+        matched = None
+        for word in query.split():
+            keys = self._search.prefix(word)
+            matched = keys if matched is None else matched & keys
+        by_key = self._by_key
+        results = sorted((by_key[k] for k in matched), key=lambda p: p["name"])[:limit]
+        
+        if not results and len(query) >= 3:
+            similar = sorted((-score, by_key[k]["name"], k) for score, k in self._search.fuzzy(query))
+            results = [by_key[k] for _, _, k in similar[:limit]]
+        return results
+
+# Документ профиля с отслеживанием изменений
+def _track(value, root: "ProfileDocument", path: Tuple):
+    if isinstance(value, dict):
+        return TrackedDict(root, path, value)
+    if isinstance(value, list):
+        return TrackedList(root, path, value)
+    return value
+
+
+class TrackedDict(dict):
+    """dict, сообщающий корневому документу, какое поддерево изменилось."""
+
+    __slots__ = ("_root", "_path")
+
+    def __init__(self, root: Optional["ProfileDocument"], path: Tuple, items=()) -> None:
+        super().__init__()
+        self._root = root if root is not None else self
+        self._path = path
+        for key, value in dict(items).items():
+            dict.__setitem__(self, key, _track(value, self._root, path + (key,)))
+
+    def _changed(self, key=None) -> None:
+        self._root._mark(self._path if key is None else self._path + (key,))
+
+    def __setitem__(self, key, value) -> None:
+        dict.__setitem__(self, key, _track(value, self._root, self._path + (key,)))
+        self._changed(key)
+
+    def __delitem__(self, key) -> None:
+        dict.__delitem__(self, key)
+        self._changed(key)
+
+    def pop(self, key, *default):
+        had_key = key in self
+        value = dict.pop(self, key, *default)
+        if had_key:
+            self._changed(key)
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._changed(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self._changed()
+
+
+class TrackedList(list):
+    """list, целиком помечаемый изменённым при любой модификации."""
+
+    __slots__ = ("_root", "_path")
+
+    def __init__(self, root: "ProfileDocument", path: Tuple, items=()) -> None:
+        super().__init__(_track(value, root, path) for value in items)
+        self._root = root
+        self._path = path
+
+    def _changed(self) -> None:
+        self._root._mark(self._path)
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            value = [_track(v, self._root, self._path) for v in value]
+        else:
+            value = _track(value, self._root, self._path)
+        list.__setitem__(self, index, value)
+        self._changed()
+
+    def __delitem__(self, index) -> None:
+        list.__delitem__(self, index)
+        self._changed()
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def append(self, value) -> None:
+        list.append(self, _track(value, self._root, self._path))
+        self._changed()
+
+    def extend(self, values) -> None:
+        list.extend(self, (_track(v, self._root, self._path) for v in values))
+        self._changed()
+
+    def insert(self, index, value) -> None:
+        list.insert(self, index, _track(value, self._root, self._path))
+        self._changed()
+
+    def pop(self, *args):
+        value = list.pop(self, *args)
+        self._changed()
+        return value
+
+    def remove(self, value) -> None:
+        list.remove(self, value)
+        self._changed()
+
+    def clear(self) -> None:
+        list.clear(self)
+        self._changed()
+
+    def sort(self, *args, **kwargs) -> None:
+        list.sort(self, *args, **kwargs)
+        self._changed()
+
+    def reverse(self) -> None:
+        list.reverse(self)
+        self._changed()
+
+
+class ProfileDocument(TrackedDict):
+    """Корень профиля: копит изменённые поддеревья (products, stock[имя], orders, ...).
+
+    Сохранение такого документа записывает только изменённые поддеревья.
+    Рядом со списком товаров поддерживается индекс catalog: операции каталога
+    обновляют его сами, а прямые правки products сбрасывают.
+    """
+
+    __slots__ = ("_dirty", "_tracking", "_catalog")
+
+    # Словари, изменения которых учитываются по отдельным ключам
+    KEYED_SUBTREES = ("stock", "daily_stats")
+    _MISSING = object()
+
+    def __init__(self, items=()) -> None:
+        self._dirty: set = set()
+        self._tracking = False
+        self._catalog: Optional[CatalogIndex] = None
+        super().__init__(None, (), items)
+        self._tracking = True
+
+    def _mark(self, path: Tuple) -> None:
+        if not self._tracking or not path:
+            return
+        if path[0] == "products":
+            self._catalog = None
+        derived = ProfileOperations.DERIVED.get(path[0])
+        if derived in self:
+            # Прямая правка исходных данных: производное значение пересчитается при следующей операции
+            dict.pop(self, derived)
+            self._dirty.add((derived,))
+        depth = 2 if path[0] in self.KEYED_SUBTREES else 1
+        self._dirty.add(path[:depth])
+
+    @property
+    def catalog(self) -> CatalogIndex:
+        if self._catalog is None:
+            self._catalog = CatalogIndex(self.get("products", []))
+        return self._catalog
+
+    def reset_catalog(self) -> None:
+        self._catalog = None
+
+    @contextmanager
+    def untracked(self):
+        """Изменения внутри блока не помечаются (их записывает журнал операций)."""
+        previous = self._tracking
+        self._tracking = False
+        try:
+            yield self
+        finally:
+            self._tracking = previous
+
+    def has_changes(self) -> bool:
+        return bool(self._dirty)
+
+    def checkpoint(self) -> Tuple[Dict, set]:
+        """Копия содержимого и отметок изменений для отката транзакции."""
+        return json.loads(json.dumps(self)), set(self._dirty)
+
+    def restore(self, state: Tuple[Dict, set]) -> None:
+        data, dirty = state
+        with self.untracked():
+            self.clear()
+            self.update(data)
+        self._dirty = set(dirty)
+        self._catalog = None
+
+    def take_changes(self) -> Tuple[List, List]:
+        """Возвращает (изменённые пути со значениями, удалённые пути) и сбрасывает отметки."""
+        paths = self._dirty
+        self._dirty = set()
+        changed, deleted = [], []
+        for path in sorted(paths, key=lambda p: (len(p), p)):
+            if len(path) > 1 and path[:1] in paths:
+                continue
+            value = self.get(path[0], self._MISSING)
+            if len(path) > 1 and value is not self._MISSING:
+                value = value.get(path[1], self._MISSING) if isinstance(value, dict) else self._MISSING
+            if value is self._MISSING:
+                deleted.append(list(path))
+            else:
+                changed.append([list(path), value])
+        return changed, deleted
+
+# Операции над данными профиля
+class ProfileOperations:
+    """Изменения профиля в виде операций: применяются экранами и повторяются из журнала при загрузке.
+
+    История склада в документ профиля не входит: операция возвращает новую запись
+    истории, а хранилище дописывает её в отдельный файл товара.
+    """
+
+    STOCK_RECEIPT = "stock_receipt"
+    STOCK_CORRECTION = "stock_correction"
+    PRODUCT_ADD = "product_add"
+    PRODUCT_EDIT = "product_edit"
+    PRODUCT_DELETE = "product_delete"
+    ORDER_ADD = "order_add"
+    PATCH = "patch"
+    BATCH = "batch"
+
+    DELETED_PRODUCT = "УДАЛЕННЫЙ ТОВАР"
+    # Сводки по месяцам истории, перенесённым в архив: {"until": "ГГГГ-ММ", "products": {...}}
+    HISTORY_ARCHIVE = "history_archive"
+    # Обратный индекс товар → строки заказов: {"товар": [[позиция заказа, позиция строки], ...]}
+    ORDER_INDEX = "order_lines"
+    # Итоги склада: {"total_quantity": ..., "total_value": ..., "with_stock": ...}
+    WAREHOUSE_TOTALS = "warehouse_totals"
+    # Поля дневной сводки daily_stats["ГГГГ-ММ-ДД"]
+    DAY_FIELDS = ("kg_in", "money_in", "kg_corrected", "kg_sold", "revenue", "profit")
+    # Отметка, что daily_stats покрывают всю историю профиля; без неё сводки пересчитываются
+    DAY_STATS_COMPLETE = "daily_stats_complete"
+    # Производные ключи документа и данные, из которых они вычисляются
+    DERIVED = {"orders": ORDER_INDEX, "stock": WAREHOUSE_TOTALS}
+
+    @staticmethod
+    def new_stock_entry() -> Dict:
+        return StockEntry().to_dict()
+
+    @classmethod
+    def apply(cls, data: Dict, op: Dict) -> Optional[HistoryRecord]:
+        """Применяет операцию; возвращает запись истории склада, если операция её создаёт."""
+        handler = {
+            cls.STOCK_RECEIPT: cls._stock_receipt,
+            cls.STOCK_CORRECTION: cls._stock_correction,
+            cls.PRODUCT_ADD: cls._product_add,
+            cls.PRODUCT_EDIT: cls._product_edit,
+            cls.PRODUCT_DELETE: cls._product_delete,
+            cls.ORDER_ADD: cls._order_add,
+            cls.PATCH: cls._patch,
+            cls.BATCH: cls._batch,
+        }.get(op["op"])
+        if handler is None:
+            raise ValueError(f"Неизвестная операция: {op['op']}")
+        return handler(data, op)
+
+    @classmethod
+    def expand(cls, op: Dict) -> List[Dict]:
+        """Операции, из которых состоит запись журнала (пакет транзакции или одна операция)."""
+        return op["ops"] if op["op"] == cls.BATCH else [op]
+
+    @staticmethod
+    def compute_warehouse_totals(data: Dict) -> Dict:
+        totals = {"total_quantity": 0.0, "total_value": 0.0, "with_stock": 0}
+        for entry in data.get("stock", {}).values():
+            totals["total_quantity"] += entry["current_quantity"]
+            totals["total_value"] += entry["total_value"]
+            totals["with_stock"] += entry["current_quantity"] > 0
+        return totals
+
+    @classmethod
+    def warehouse_totals(cls, data: Dict) -> Dict:
+        """Итоги склада, которые операции поддерживают нарастающим итогом; считаются, если их нет."""
+        totals = data.get(cls.WAREHOUSE_TOTALS)
+        if totals is None:
+            data[cls.WAREHOUSE_TOTALS] = cls.compute_warehouse_totals(data)
+            totals = data[cls.WAREHOUSE_TOTALS]
+        return totals
+
+    @staticmethod
+    def _adjust_totals(totals: Dict, before: Tuple[float, float], after: Tuple[float, float]) -> None:
+        totals["total_quantity"] += after[0] - before[0]
+        totals["total_value"] += after[1] - before[1]
+        totals["with_stock"] += (after[0] > 0) - (before[0] > 0)
+
+    @classmethod
+    def _stock_receipt(cls, data: Dict, op: Dict) -> HistoryRecord:
+        qty = op["quantity"]
+        price = op["price_per_kg"]
+        totals = cls.warehouse_totals(data)
+        stock_data = data["stock"].setdefault(op["product"], cls.new_stock_entry())
+        before = (stock_data["current_quantity"], stock_data["total_value"])
+        stock_data["current_quantity"] += qty
+        stock_data["total_value"] += qty * price
+        cls._adjust_totals(totals, before, (stock_data["current_quantity"], stock_data["total_value"]))
+        cls._bump_day(data, op["date"], kg_in=qty, money_in=qty * price)
+        return HistoryRecord(
+            date=op["date"],
+            quantity=qty,
+            price_per_kg=price,
+            operation="пополнение",
+            total_amount=qty * price,
+            balance_after=stock_data["current_quantity"]
+        )
+
+    @classmethod
+    def _stock_correction(cls, data: Dict, op: Dict) -> HistoryRecord:
+        new_quantity = op["quantity"]
+        new_avg_price = op["price_per_kg"]
+        totals = cls.warehouse_totals(data)
+        stock_data = data["stock"].setdefault(op["product"], cls.new_stock_entry())
+        old_quantity = stock_data["current_quantity"]
+        before = (old_quantity, stock_data["total_value"])
+        stock_data["current_quantity"] = new_quantity
+        stock_data["total_value"] = new_quantity * new_avg_price
+        cls._adjust_totals(totals, before, (new_quantity, stock_data["total_value"]))
+        cls._bump_day(data, op["date"], kg_corrected=new_quantity - old_quantity)
+        return HistoryRecord(
+            date=op["date"],
+            quantity=new_quantity - old_quantity,
+            price_per_kg=new_avg_price,
+            operation="корректировка",
+            total_amount=new_quantity * new_avg_price,
+            balance_after=new_quantity
+        )
+
+    @classmethod
+    def _bump_day(cls, data: Dict, moment: str, **deltas: float) -> None:
+        """Добавляет изменения к сводке дня, которому принадлежит moment."""
+        bucket = data.setdefault("daily_stats", {}).setdefault(moment[:10], dict.fromkeys(cls.DAY_FIELDS, 0.0))
+        for field, delta in deltas.items():
+            bucket[field] = bucket.get(field, 0.0) + delta
+
+    @classmethod
+    def _order_day_deltas(cls, data: Dict, order: Dict) -> Dict[str, float]:
+        """Продано кг, выручка и прибыль заказа (прибыль — по прибыли на кг из каталога)."""
+        kg_sold = revenue = profit = 0.0
+        for item in order["items"]:
+            kg_sold += item["quantity"]
+            revenue += item["quantity"] * item.get("price", 0.0)
+            product = cls._find_product(data, item["product"])
+            if product is not None:
+                profit += item["quantity"] * product["profit"]
+        return {"kg_sold": kg_sold, "revenue": revenue, "profit": profit}
+
+    @classmethod
+    def period_stats(cls, data: Dict, start: date, end: date) -> Dict[str, float]:
+        """Сумма дневных сводок с start по end включительно — O(дней), а не O(истории)."""
+        totals = dict.fromkeys(cls.DAY_FIELDS, 0.0)
+        days = data.get("daily_stats", {})
+        day = start
+        while day <= end:
+            bucket = days.get(day.isoformat())
+            if bucket:
+                for field in cls.DAY_FIELDS:
+                    totals[field] += bucket.get(field, 0.0)
+            day += timedelta(days=1)
+        return totals
+
+    @classmethod
+    def order_lines(cls, data: Dict) -> Dict[str, List]:
+        """Обратный индекс строк заказов по товару; строится, если его нет в документе."""
+        index = data.get(cls.ORDER_INDEX)
+        if index is None:
+            built = defaultdict(list)
+            for order_pos, order in enumerate(data.get("orders", [])):
+                for item_pos, item in enumerate(order["items"]):
+                    built[item["product"]].append([order_pos, item_pos])
+            data[cls.ORDER_INDEX] = dict(built)
+            index = data[cls.ORDER_INDEX]
+        return index
+
+    @classmethod
+    def _relink_order_lines(cls, data: Dict, old_name: str, new_name: str) -> None:
+        """Переписывает товар только в строках заказов, где он встречается."""
+        index = cls.order_lines(data)
+        lines = index.pop(old_name, None)
+        if not lines:
+            return
+        orders = data["orders"]
+        for order_pos, item_pos in lines:
+            orders[order_pos]["items"][item_pos]["product"] = new_name
+        index.setdefault(new_name, []).extend(lines)
+
+    @staticmethod
+    def _catalog(data: Dict) -> Optional[CatalogIndex]:
+        """Индекс каталога живого документа; при повторе журнала — None (обычный проход)."""
+        return data.catalog if isinstance(data, ProfileDocument) else None
+
+    @classmethod
+    def _find_product(cls, data: Dict, name: str) -> Optional[Dict]:
+        catalog = cls._catalog(data)
+        if catalog is None:
+            return next((p for p in data["products"] if p["name"] == name), None)
+        product = catalog.get(name)
+        return product if product is not None and product["name"] == name else None
+
+    @classmethod
+    def _product_add(cls, data: Dict, op: Dict) -> None:
+        product = dict(op["product"])
+        catalog = cls._catalog(data)
+        data["products"].append(product)
+        if catalog is not None:
+            catalog.add(data["products"][-1])
+        if product["name"] not in data["stock"]:
+            data["stock"][product["name"]] = cls.new_stock_entry()
+
+    @classmethod
+    def _product_edit(cls, data: Dict, op: Dict) -> None:
+        old_name = op["old_name"]
+        new_name = op["product"]["name"]
+        product = cls._find_product(data, old_name)
+        if product is not None:
+            product.update(op["product"])
+            catalog = cls._catalog(data)
+            if catalog is not None and old_name != new_name:
+                catalog.rename(old_name, product)
+        
+        if old_name != new_name:
+            if old_name in data["stock"]:
+                data["stock"][new_name] = data["stock"].pop(old_name)
+            
+            cls._relink_order_lines(data, old_name, new_name)
+            
+            archived = data.get(cls.HISTORY_ARCHIVE, {}).get("products", {})
+            if old_name in archived:
+                archived[new_name] = archived.pop(old_name)
+
+    @classmethod
+    def _product_delete(cls, data: Dict, op: Dict) -> None:
+        product_name = op["name"]
+        catalog = cls._catalog(data)
+        if catalog is None:
+            data["products"] = [
+                p for p in data["products"] if p["name"] != product_name
+            ]
+        else:
+            product = cls._find_product(data, product_name)
+            if product is not None:
+                catalog.discard(product_name)
+                data["products"].remove(product)
+        
+        if product_name in data["stock"]:
+            totals = cls.warehouse_totals(data)
+            entry = data["stock"].pop(product_name)
+            cls._adjust_totals(totals, (entry["current_quantity"], entry["total_value"]), (0.0, 0.0))
+        
+        cls._relink_order_lines(data, product_name, cls.DELETED_PRODUCT)
+        
+        data.get(cls.HISTORY_ARCHIVE, {}).get("products", {}).pop(product_name, None)
+
+    @classmethod
+    def _order_add(cls, data: Dict, op: Dict) -> None:
+        order = dict(op["order"])
+        index = cls.order_lines(data)
+        orders = data.setdefault("orders", [])
+        order_pos = len(orders)
+        orders.append(order)
+        for item_pos, item in enumerate(order["items"]):
+            index.setdefault(item["product"], []).append([order_pos, item_pos])
+        data["next_order_number"] = max(data.get("next_order_number", 1), order.get("number", 0) + 1)
+        cls._bump_day(data, order["date"], **cls._order_day_deltas(data, order))
+
+    @staticmethod
+    def _patch(data: Dict, op: Dict) -> None:
+        """Замена или удаление изменённых поддеревьев (сохранение ProfileDocument)."""
+        if isinstance(data, ProfileDocument):
+            data.reset_catalog()
+        for path, value in op.get("set", []):
+            target = data
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+        for path in op.get("delete", []):
+            target = data
+            for key in path[:-1]:
+                target = target.get(key, {})
+            target.pop(path[-1], None)
+
+    @classmethod
+    def _batch(cls, data: Dict, op: Dict) -> None:
+        for sub_op in op["ops"]:
+            cls.apply(data, sub_op)
+
+# Форматы файлов данных
+class JsonSerializer:
+    """JSON-снимок. Без отступов кодируется C-кодировщиком и занимает примерно вдвое меньше места."""
+
+    def __init__(self, name: str = "json", indent: Optional[int] = None) -> None:
+        self.name = name
+        self.indent = indent
+
+    def dumps(self, data: Dict) -> bytes:
+        if self.indent is None:
+            return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return json.dumps(data, ensure_ascii=False, indent=self.indent).encode("utf-8")
+
+    @staticmethod
+    def loads(payload: bytes) -> Dict:
+        return json.loads(payload.decode("utf-8"))
+
+
+class PickleSerializer:
+    """Двоичный снимок pickle: быстрее JSON при чтении больших профилей."""
+
+    name = "pickle"
+    MAGIC = b"\x80"
+
+    @staticmethod
+    def dumps(data: Dict) -> bytes:
+        return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def loads(payload: bytes) -> Dict:
+        try:
+            return pickle.loads(payload)
+        except pickle.UnpicklingError as e:
+            raise ValueError(f"Повреждённый снимок pickle: {e}") from e
+
+
+class Serializers:
+    """Реестр форматов; формат существующего файла определяется по его содержимому."""
+
+    REGISTRY = {
+        "json": JsonSerializer(),
+        "json-pretty": JsonSerializer("json-pretty", indent=2),
+        "pickle": PickleSerializer(),
+    }
+    DECODE_ERRORS = (ValueError, EOFError)
+
+    @classmethod
+    def get(cls, name: str):
+        if name not in cls.REGISTRY:
+            raise ValueError(f"Неизвестный формат данных: {name}")
+        return cls.REGISTRY[name]
+
+    @classmethod
+    def detect(cls, payload: bytes):
+        if payload.startswith(PickleSerializer.MAGIC):
+            return cls.REGISTRY["pickle"]
+        return cls.REGISTRY["json"]
+
+# Фоновая запись на диск
+class PersistenceWorker:
+    """Единственный поток записи: задачи с одним ключом (путём файла) объединяются в одну запись."""
+
+    def __init__(self, delay: float = 0.3) -> None:
+        self.delay = delay
+        self._pending: Dict[str, Callable[[], None]] = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._urgent = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    def submit(self, key: str, task: Callable[[], None]) -> None:
+        """Ставит задачу в очередь; более ранняя задача с тем же ключом отбрасывается."""
+        with self._cond:
+            self._pending[key] = task
+            self._cond.notify_all()
+
+    def cancel(self, key: str) -> None:
+        """Снимает задачу с очереди, если она ещё не начала выполняться."""
+        with self._cond:
+            self._pending.pop(key, None)
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Барьер: ждёт, пока все поставленные задачи будут записаны."""
+        with self._cond:
+            if not self._pending:
+                # Очередь пуста: флаг срочности остался бы до следующей серии сохранений
+                return self._cond.wait_for(lambda: not self._busy, timeout)
+            self._urgent = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stop(self) -> None:
+        self.flush()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopped)
+                if not self._pending:
+                    return
+                # Даём серии сохранений собраться в одну запись
+                self._cond.wait_for(lambda: self._urgent or self._stopped, self.delay)
+                tasks = list(self._pending.values())
+                self._pending.clear()
+                self._urgent = False
+                self._busy = True
+            for task in tasks:
+                try:
+                    task()
+                except Exception as e:
+                    print(f"[!] Ошибка фоновой записи: {e}")
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+# Резервные копии
+class BackupStore:
+    """Резервные копии файлов данных: сжатые снимки, адресуемые по содержимому.
+
+    Одинаковое содержимое хранится один раз (objects/<sha1>.json.gz), список копий
+    ведётся в index.json, поэтому каталог не сканируется при каждом сохранении.
+    Новая копия файла делается не чаще MIN_INTERVAL секунд.
+    """
+
+    INDEX_VERSION = 1
+    MIN_INTERVAL = 10 * 60
+    MAX_PER_FILE = 20
+    MAX_TOTAL_BYTES = 20 * 1024 * 1024
+    MAX_AGE_DAYS = 7
+
+    def __init__(self, backup_dir: str) -> None:
+        self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, "objects")
+        self.index_file = os.path.join(backup_dir, "index.json")
+        self._lock = threading.Lock()
+        self._entries: List[Dict] = []
+        os.makedirs(self.objects_dir, exist_ok=True)
+        
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f).get("entries", [])
+            except (OSError, ValueError):
+                self._entries = []
+        else:
+            self._import_legacy_backups()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, f"{digest}.json.gz")
+
+    def _import_legacy_backups(self) -> None:
+        """Переносит самые свежие старые копии (*.bak) в хранилище и удаляет остальные."""
+        newest: Dict[str, str] = {}
+        legacy = sorted(f for f in os.listdir(self.backup_dir) if f.endswith(".bak"))
+        for fname in legacy:
+            newest[fname.split(".json.", 1)[0] + ".json"] = fname
+        for source, fname in newest.items():
+            try:
+                with open(os.path.join(self.backup_dir, fname), "rb") as f:
+                    self.add(source, f.read(), force=True)
+            except OSError:
+                pass
+        for fname in legacy:
+            try:
+                os.remove(os.path.join(self.backup_dir, fname))
+            except OSError:
+                pass
+        self._save_index()
+
+    def _save_index(self) -> None:
+        tmp_path = self.index_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.INDEX_VERSION, "entries": self._entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_file)
+
+    def add(self, filepath: str, payload: bytes, force: bool = False, seq: Optional[int] = None) -> bool:
+        """Сохраняет копию содержимого файла, если она не дублирует последнюю и интервал прошёл.
+
+        seq — номер журнала, по который копия включает операции (для снимков профилей).
+        """
+        name = os.path.basename(filepath)
+        now = datetime.now().timestamp()
+        digest = hashlib.sha1(payload).hexdigest()
+        try:
+            with self._lock:
+                last = next((e for e in reversed(self._entries) if e["file"] == name), None)
+                if last is not None:
+                    if last["hash"] == digest:
+                        return False
+                    if not force and now - last["time"] < self.MIN_INTERVAL:
+                        return False
+                
+                object_path = self._object_path(digest)
+                if not os.path.exists(object_path):
+                    tmp_path = object_path + ".tmp"
+                    with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                        f.write(payload)
+                    os.replace(tmp_path, object_path)
+                
+                entry = {
+                    "file": name,
+                    "hash": digest,
+                    "time": now,
+                    "size": os.path.getsize(object_path)
+                }
+                if seq is not None:
+                    entry["seq"] = seq
+                self._entries.append(entry)
+                self._apply_retention(now)
+                self._save_index()
+                return True
+        except Exception as e:
+            print(f"[!] Ошибка резервного копирования {filepath}: {e}")
+            return False
+
+    def _apply_retention(self, now: float) -> None:
+        """Ограничивает копии по возрасту, количеству на файл и общему размеру.
+
+        Последняя копия каждого файла не удаляется никогда.
+        """
+        newest = {}
+        for entry in self._entries:
+            newest[entry["file"]] = entry
+        protected = {id(entry) for entry in newest.values()}
+        cutoff = now - self.MAX_AGE_DAYS * 24 * 3600
+        
+        kept = []
+        per_file: Dict[str, int] = defaultdict(int)
+        for entry in reversed(self._entries):
+            per_file[entry["file"]] += 1
+            if id(entry) not in protected:
+                if entry["time"] < cutoff or per_file[entry["file"]] > self.MAX_PER_FILE:
+                    continue
+            kept.append(entry)
+        
+        total = 0
+        counted = set()
+        result = []
+        for entry in kept:
+            if entry["hash"] not in counted:
+                if id(entry) not in protected and total + entry["size"] > self.MAX_TOTAL_BYTES:
+                    continue
+                counted.add(entry["hash"])
+                total += entry["size"]
+            result.append(entry)
+        result.reverse()
+        
+        referenced = {entry["hash"] for entry in result}
+        for entry in self._entries:
+            if entry["hash"] not in referenced:
+                try:
+                    os.remove(self._object_path(entry["hash"]))
+                except OSError:
+                    pass
+                referenced.add(entry["hash"])
+        self._entries = result
+
+    def latest_seq(self, filepath: str) -> Optional[int]:
+        """Номер журнала самой свежей копии файла (None, если копии нет или номер не записан)."""
+        name = os.path.basename(filepath)
+        with self._lock:
+            last = next((e for e in reversed(self._entries) if e["file"] == name), None)
+        return last.get("seq") if last is not None else None
+
+    def is_due(self, filepath: str) -> bool:
+        """Прошло ли MIN_INTERVAL с последней копии файла — чтобы не готовить содержимое зря."""
+        name = os.path.basename(filepath)
+        with self._lock:
+            last = next((e for e in reversed(self._entries) if e["file"] == name), None)
+        return last is None or datetime.now().timestamp() - last["time"] >= self.MIN_INTERVAL
+
+    def latest(self, filepath: str) -> Optional[bytes]:
+        """Содержимое самой свежей копии файла (для восстановления повреждённого файла)."""
+        name = os.path.basename(filepath)
+        with self._lock:
+            candidates = [e for e in reversed(self._entries) if e["file"] == name]
+        for entry in candidates:
+            try:
+                with gzip.open(self._object_path(entry["hash"]), "rb") as f:
+                    return f.read()
+            except OSError:
+                continue
+        return None
+
 # Управление данными
 class DataManager:
-    def __init__(self) -> None:
-        self._profiles: Optional[Dict] = None
-        self.data_dir: str = ""
+    """Хранилище профилей: каждый профиль в своём файле, список профилей — в манифесте.
+
+    Операции склада и каталога дописываются в журнал профиля (<файл>.journal),
+    а снимок профиля переписывается только при уплотнении журнала.
+    Все записи файлов выполняет фоновый PersistenceWorker; flush() дожидается их.
+    Несколько изменений можно объединить в transaction(): они попадут в журнал
+    одной записью или не попадут вовсе.
+    История склада хранится отдельно по товарам (<профиль>/history/*.jsonl)
+    и читается только через get_stock_history(). Записи старше history_horizon_days
+    раз в месяц переносятся в сжатые помесячные архивы (<профиль>/archive/),
+    а iter_stock_history() читает архивы и текущий файл одним потоком.
+    """
+
+    MANIFEST_VERSION = 1
+    JOURNAL_SEQ_KEY = "_journal_seq"
+    JOURNAL_COMPACT_BYTES = 256 * 1024
+
+    def __init__(self, data_dir: Optional[str] = None, serializer: str = "json",
+                 history_horizon_days: Optional[int] = 90) -> None:
+        self._profiles: Dict[str, Dict] = {}
+        self._manifest: Dict[str, str] = {}
+        self.serializer = Serializers.get(serializer)
+        self.history_horizon_days = history_horizon_days
+        self._journal_seq: Dict[str, int] = {}
+        self._compacting: set = set()
+        self._transactions: Dict[str, List] = {}
+        self._history_columns: Dict[Tuple[str, str], HistoryColumns] = {}
+        self._journal_lock = threading.Lock()
+        self._writer = PersistenceWorker()
+        self._backups: Optional[BackupStore] = None
+        self.data_dir: str = data_dir or ""
         self.profiles_file: str = ""
+        self.profiles_dir: str = ""
+        self.manifest_file: str = ""
         self.backup_dir: str = ""
         self._init_directories()
 
     def _init_directories(self) -> None:
-        app = App.get_running_app()
-        self.data_dir = app.user_data_dir
+        if not self.data_dir:
+            self.data_dir = App.get_running_app().user_data_dir
         self.profiles_file = os.path.join(self.data_dir, "profiles.json")
+        self.profiles_dir = os.path.join(self.data_dir, "profiles")
+        self.manifest_file = os.path.join(self.profiles_dir, "manifest.json")
         self.backup_dir = os.path.join(self.data_dir, "backups")
         os.makedirs(self.data_dir, exist_ok=True)
+        os.makedirs(self.profiles_dir, exist_ok=True)
         os.makedirs(self.backup_dir, exist_ok=True)
+        self._backups = BackupStore(self.backup_dir)
         
-        if not os.path.exists(self.profiles_file) or os.path.getsize(self.profiles_file) == 0:
-            self._save_safe({}, self.profiles_file)
+        if os.path.exists(self.manifest_file):
+            manifest = self._load_safe(self.manifest_file)
+            self._manifest = dict(manifest.get("profiles", {}))
+        else:
+            self._migrate_single_file()
+
+    def _migrate_single_file(self) -> None:
+        """Однократный перенос старого profiles.json в отдельные файлы профилей."""
+        legacy = self._load_safe(self.profiles_file) if os.path.exists(self.profiles_file) else {}
+        for profile_name, data in legacy.items():
+            shard = self._shard_name(profile_name)
+            self._schedule_save(data, os.path.join(self.profiles_dir, shard))
+            self._manifest[profile_name] = shard
+        self._save_manifest()
+        self.flush()
+        if os.path.exists(self.profiles_file):
+            os.replace(self.profiles_file, self.profiles_file + ".migrated")
+
+    @staticmethod
+    def _shard_name(profile_name: str) -> str:
+        digest = hashlib.md5(profile_name.encode("utf-8")).hexdigest()[:16]
+        return f"{digest}.json"
+
+    @staticmethod
+    def _new_profile() -> Dict:
+        return {
+            "products": [],
+            "stock": {},
+            "orders": [],
+            "daily_stats": {},
+            ProfileOperations.DAY_STATS_COMPLETE: True,
+            "next_order_number": 1
+        }
+
+    def _profile_path(self, profile_name: str) -> str:
+        return os.path.join(self.profiles_dir, self._manifest[profile_name])
+
+    def _journal_path(self, profile_name: str) -> str:
+        return os.path.splitext(self._profile_path(profile_name))[0] + ".journal"
+
+    def _profile_dir(self, profile_name: str) -> str:
+        return os.path.splitext(self._profile_path(profile_name))[0]
+
+    @staticmethod
+    def _product_key(product_name: str) -> str:
+        return hashlib.md5(product_name.encode("utf-8")).hexdigest()[:16]
+
+    def _history_path(self, profile_name: str, product_name: str) -> str:
+        return os.path.join(self._profile_dir(profile_name), "history", f"{self._product_key(product_name)}.jsonl")
+
+    def _archive_dir(self, profile_name: str, product_name: str) -> str:
+        return os.path.join(self._profile_dir(profile_name), "archive", self._product_key(product_name))
+
+    def _append_history(self, profile_name: str, product_name: str, record: HistoryRecord) -> None:
+        path = self._history_path(profile_name, product_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._append_line(path, json.dumps(record.to_dict(), ensure_ascii=False))
+
+    def _split_history(self, profile_name: str, data: Dict) -> bool:
+        """Выносит списки history из документа профиля в файлы товаров (старый формат)."""
+        moved = False
+        for product_name, entry in data.get("stock", {}).items():
+            history = entry.pop("history", None)
+            if history is None:
+                continue
+            moved = True
+            path = self._history_path(profile_name, product_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                for record in history:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return moved
+
+    def _after_operation(self, profile_name: str, op: Dict, record: Optional[HistoryRecord]) -> None:
+        """Изменения файлов истории, сопровождающие операцию."""
+        self._update_history_columns(profile_name, op, record)
+        if record is not None:
+            self._append_history(profile_name, op["product"], record)
+            return
+        self._move_archive(profile_name, op)
+        if op["op"] == ProfileOperations.PRODUCT_EDIT and op["old_name"] != op["product"]["name"]:
+            old_path = self._history_path(profile_name, op["old_name"])
+            if os.path.exists(old_path):
+                os.replace(old_path, self._history_path(profile_name, op["product"]["name"]))
+        elif op["op"] == ProfileOperations.PRODUCT_DELETE:
+            try:
+                os.remove(self._history_path(profile_name, op["name"]))
+            except OSError:
+                pass
+
+    def _update_history_columns(self, profile_name: str, op: Dict, record: Optional[HistoryRecord]) -> None:
+        """Уже построенная колоночная история дополняется и переименовывается вместе с товаром."""
+        if record is not None:
+            columns = self._history_columns.get((profile_name, op["product"]))
+            if columns is not None:
+                columns.append(record)
+        elif op["op"] == ProfileOperations.PRODUCT_EDIT:
+            columns = self._history_columns.pop((profile_name, op["old_name"]), None)
+            if columns is not None:
+                self._history_columns[(profile_name, op["product"]["name"])] = columns
+        elif op["op"] == ProfileOperations.PRODUCT_DELETE:
+            self._history_columns.pop((profile_name, op["name"]), None)
+
+    def _drop_history_columns(self, profile_name: str) -> None:
+        for key in [k for k in self._history_columns if k[0] == profile_name]:
+            del self._history_columns[key]
+
+    def _move_archive(self, profile_name: str, op: Dict) -> None:
+        """Архивы истории переименовываются и удаляются вместе с товаром."""
+        if op["op"] == ProfileOperations.PRODUCT_EDIT and op["old_name"] != op["product"]["name"]:
+            old_dir = self._archive_dir(profile_name, op["old_name"])
+            if os.path.isdir(old_dir):
+                os.replace(old_dir, self._archive_dir(profile_name, op["product"]["name"]))
+        elif op["op"] == ProfileOperations.PRODUCT_DELETE:
+            shutil.rmtree(self._archive_dir(profile_name, op["name"]), ignore_errors=True)
+
+    def _archive_history(self, profile_name: str, data: ProfileDocument, today: Optional[date] = None) -> bool:
+        """Переносит историю старше горизонта в архивы <товар>/<ГГГГ-ММ>.jsonl.gz.
+
+        Срабатывает не чаще раза в месяц: документ помнит месяц, до которого история
+        уже в архиве, и хранит сводку (записи, количество, сумма, остаток) по каждому
+        архивному месяцу товара. Возвращает True, если документ изменился.
+
+        Повторный перенос после аварийного завершения безопасен: файл месяца
+        переписывается целиком, записи, уже попавшие в него, не дублируются, а сводка
+        месяца считается по файлу. Месяцы, которые успели уйти в архив, но не попали
+        в сохранённую сводку, досчитываются по своим файлам.
+        """
+        if not self.history_horizon_days:
+            return False
+        today = today or date.today()
+        until = (today - timedelta(days=self.history_horizon_days)).strftime("%Y-%m")
+        archive = data.get(ProfileOperations.HISTORY_ARCHIVE, {})
+        if archive.get("until", "") >= until:
+            return False
+        
+        summaries = self._snapshot(archive.get("products", {}))
+        for product_name in list(data.get("stock", {})):
+            by_month = defaultdict(list)
+            for record in self.get_stock_history(profile_name, product_name):
+                if record.month < until:
+                    by_month[record.month].append(record)
+            archive_dir = self._archive_dir(profile_name, product_name)
+            months = summaries.get(product_name, {})
+            if os.path.isdir(archive_dir):
+                for filename in os.listdir(archive_dir):
+                    if filename.endswith(".jsonl.gz") and filename[:7] not in months:
+                        by_month.setdefault(filename[:7], [])
+            if not by_month:
+                continue
+            os.makedirs(archive_dir, exist_ok=True)
+            months = summaries.setdefault(product_name, {})
+            for month, records in sorted(by_month.items()):
+                records = self._write_archive_month(os.path.join(archive_dir, f"{month}.jsonl.gz"), records)
+                if records:
+                    months[month] = {
+                        "records": len(records),
+                        "quantity": sum(r.quantity for r in records),
+                        "total_amount": sum(r.total_amount for r in records),
+                        "balance_after": records[-1].balance_after
+                    }
+            self._drop_history_before(profile_name, product_name, until)
+        
+        data[ProfileOperations.HISTORY_ARCHIVE] = {"until": until, "products": summaries}
+        return True
+
+    @staticmethod
+    def _write_archive_month(path: str, records: List[HistoryRecord]) -> List[HistoryRecord]:
+        """Добавляет записи к архиву месяца и возвращает все его записи.
+
+        Файл собирается заново во временном файле и подменяется через os.replace, поэтому
+        архив не остаётся недописанным. Записи, которые уже есть в архиве (перенос прервался
+        до того, как они были удалены из текущей истории), второй раз не добавляются.
+        """
+        archived = []
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                archived = [HistoryRecord.from_dict(json.loads(line)) for line in f if line.strip()]
+        if not records:
+            return archived
+        pending = defaultdict(int)
+        for record in records:
+            pending[record.to_tuple()] += 1
+        merged = []
+        for record in archived:
+            key = record.to_tuple()
+            if pending[key]:
+                pending[key] -= 1
+            else:
+                merged.append(record)
+        merged.extend(records)
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for record in merged:
+                f.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+        return merged
+
+    def _drop_history_before(self, profile_name: str, product_name: str, month: str) -> None:
+        path = self._history_path(profile_name, product_name)
+        kept = [r for r in self._read_jsonl(path) if r["date"][:7] >= month]
+        if not kept:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in kept:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _snapshot(data: Dict) -> Dict:
+        """Глубокая копия профиля для записи в фоне (через быстрый C-кодировщик json)."""
+        return json.loads(json.dumps(data))
+
+    @staticmethod
+    def _read_jsonl(path: str) -> List[Dict]:
+        """Записи файла JSONL. Повреждённые строки (недописанные при аварийном завершении)
+        пропускаются, а следующие за ними записи читаются как обычно."""
+        if not os.path.exists(path):
+            return []
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"[!] Пропущена повреждённая строка {number} в {path}")
+        return entries
+
+    @staticmethod
+    def _append_line(path: str, line: str) -> int:
+        """Дописывает строку в файл JSONL и возвращает его размер.
+
+        Если файл обрывается на недописанной строке, новая запись начинается с новой
+        строки: иначе она склеилась бы с обрывком и при чтении пропала вместе с ним.
+        """
+        with open(path, "a+b") as f:
+            prefix = b""
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    prefix = b"\n"
+            f.write(prefix + line.encode("utf-8") + b"\n")
+            return f.tell()
+
+    def _append_journal(self, profile_name: str, entry: Dict) -> int:
+        path = self._journal_path(profile_name)
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._journal_lock:
+            return self._append_line(path, line)
+
+    def _trim_journal(self, path: str, upto_seq: int) -> None:
+        """Удаляет из журнала записи, уже вошедшие в снимок с номером upto_seq."""
+        with self._journal_lock:
+            if not os.path.exists(path):
+                return
+            remaining = [e for e in self._read_jsonl(path) if e["seq"] > upto_seq]
+            if not remaining:
+                os.remove(path)
+                return
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, path)
+
+    def _schedule_save(self, data: Dict, filepath: str, after: Optional[Callable[[], None]] = None) -> None:
+        """Передаёт копию данных фоновому потоку; повторные сохранения файла объединяются."""
+        snapshot = self._snapshot(data)
+
+        def task():
+            self._save_safe(snapshot, filepath)
+            if after:
+                after()
+
+        self._writer.submit(filepath, task)
+
+    def _schedule_snapshot(self, profile_name: str, data: Dict) -> None:
+        seq = self._journal_seq.get(profile_name, 0)
+        journal_path = self._journal_path(profile_name)
+        profile_path = self._profile_path(profile_name)
+
+        def after():
+            # Записи журнала новее последней резервной копии снимка остаются: при
+            # повреждённом снимке они повторяются поверх копии
+            backup_seq = self._backups.latest_seq(profile_path) if self._backups else seq
+            self._trim_journal(journal_path, min(seq, backup_seq or 0))
+            self._compacting.discard(profile_name)
+
+        self._schedule_save(dict(data, **{self.JOURNAL_SEQ_KEY: seq}), profile_path, after)
+
+    def _compact_journal(self, profile_name: str) -> None:
+        """Переносит журнал в снимок профиля фоновой записью."""
+        if profile_name in self._compacting:
+            return
+        self._compacting.add(profile_name)
+        self._schedule_snapshot(profile_name, self._profiles[profile_name])
+
+    def _save_manifest(self) -> None:
+        self._schedule_save(
+            {"version": self.MANIFEST_VERSION, "profiles": self._manifest},
+            self.manifest_file
+        )
+
+    def _remove_files(self, *paths: str) -> None:
+        """Убирает файлы и каталоги профиля.
+
+        Пути сразу переименовываются в надгробия (*.deleted), а удаляются уже они и в фоне:
+        профиль с тем же именем, созданный раньше фоновой записи, начинает с чистых файлов,
+        и отложенное удаление их не заденет. Ещё не записанные сохранения этих путей снимаются.
+        """
+        def remove(path: str) -> None:
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+
+        for path in paths:
+            self._writer.cancel(path)
+            tombstone = f"{path}.{time.monotonic_ns()}.deleted"
+            with self._journal_lock:
+                try:
+                    os.replace(path, tombstone)
+                except OSError:
+                    continue
+            self._writer.submit(tombstone, lambda p=tombstone: remove(p))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Дожидается записи всех отложенных сохранений (вызывается при паузе и остановке)."""
+        return self._writer.flush(timeout)
+
+    def close(self) -> None:
+        self._writer.stop()
+
+    def _save_safe(self, data: Dict, filepath: str) -> None:
+        """Пишет во временный файл и атомарно подменяет им основной."""
+        tmp_path = filepath + ".tmp"
+        try:
+            payload = self.serializer.dumps(data)
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+            if self._backups:
+                # Снимок профиля копируется всегда: журнал обрезается только до номера
+                # последней копии, иначе восстановление из неё потеряло бы операции
+                seq = data.get(self.JOURNAL_SEQ_KEY)
+                self._backups.add(filepath, payload, force=seq is not None, seq=seq)
+        except Exception as e:
+            print(f"[!] Ошибка сохранения {filepath}: {e}")
+            raise
+
+    def _load_safe(self, filepath: str) -> Dict:
+        """Читает файл в любом из форматов Serializers — формат определяется по содержимому."""
+        try:
+            if not os.path.exists(filepath):
+                return {}
+            if os.path.getsize(filepath) == 0:
+                return {}
+            with open(filepath, "rb") as f:
+                payload = f.read()
+            if not payload.strip():
+                return {}
+            return Serializers.detect(payload).loads(payload)
+        except Serializers.DECODE_ERRORS:
+            payload = self._backups.latest(filepath) if self._backups else None
+            if payload:
+                try:
+                    return Serializers.detect(payload).loads(payload)
+                except Exception:
+                    return {}
+            return {}
+        except Exception:
+            return {}
+
+    def list_profiles(self) -> List[str]:
+        """Имена профилей из манифеста — без чтения файлов профилей."""
+        return sorted(self._manifest)
+
+    def has_profile(self, profile_name: str) -> bool:
+        return profile_name in self._manifest
+
+    def create_profile(self, profile_name: str) -> Dict:
+        self.update_profile_data(profile_name, self._new_profile())
+        return self._profiles[profile_name]
+
+    def delete_profile(self, profile_name: str) -> None:
+        if profile_name not in self._manifest:
+            return
+        paths = (self._profile_path(profile_name), self._journal_path(profile_name),
+                 self._profile_dir(profile_name))
+        del self._manifest[profile_name]
+        self._profiles.pop(profile_name, None)
+        # Номер журнала не сбрасывается: сжатие, которое уже пишется в фоне, обрезает
+        # журнал по старому номеру и не тронет записи профиля, созданного заново
+        self._compacting.discard(profile_name)
+        self._drop_history_columns(profile_name)
+        self._save_manifest()
+        self._remove_files(*paths)
+
+    def get_profiles(self) -> Dict:
+        """Все профили целиком. Читает каждый файл профиля — для списка имён есть list_profiles()."""
+        return {name: self.get_profile_data(name) for name in self.list_profiles()}
+
+    def save_profiles(self, profiles: Dict) -> None:
+        for profile_name in [name for name in self.list_profiles() if name not in profiles]:
+            self.delete_profile(profile_name)
+        for profile_name, data in profiles.items():
+            self.update_profile_data(profile_name, data)
+
+    def get_profile_data(self, profile_name: str) -> Dict:
+        if profile_name in self._profiles:
+            return self._profiles[profile_name]
+        if profile_name not in self._manifest:
+            return self.create_profile(profile_name)
+        data = self._load_safe(self._profile_path(profile_name)) or self._new_profile()
+        seq = data.pop(self.JOURNAL_SEQ_KEY, 0)
+        # В старом формате история ещё внутри документа — дополняем её при повторе журнала
+        legacy_history = any("history" in entry for entry in data.get("stock", {}).values())
+        journal_path = self._journal_path(profile_name)
+        for entry in self._read_jsonl(journal_path):
+            if entry["seq"] > seq + 1:
+                print(f"[!] В журнале {journal_path} нет записей {seq + 1}–{entry['seq'] - 1}: "
+                      f"профиль {profile_name} загружен без них")
+            if entry["seq"] > seq:
+                for op in ProfileOperations.expand(entry):
+                    record = ProfileOperations.apply(data, op)
+                    if record is not None and legacy_history:
+                        data["stock"][op["product"]].setdefault("history", []).append(record.to_dict())
+                seq = entry["seq"]
+        self._journal_seq[profile_name] = seq
+        moved_history = self._split_history(profile_name, data)
+        data = ProfileDocument(data)
+        self._profiles[profile_name] = data
+        archived = self._archive_history(profile_name, data)
+        if moved_history:
+            data.take_changes()
+            self._schedule_snapshot(profile_name, data)
+        elif archived:
+            self.update_profile_data(profile_name, data)
+        return data
+
+    def update_profile_data(self, profile_name: str, data: Dict) -> None:
+        """Сохраняет профиль.
+
+        Для документа, полученного из get_profile_data, в журнал пишутся только
+        изменённые поддеревья; любой другой словарь записывается целиком и
+        становится новым документом профиля.
+        """
+        is_new = profile_name not in self._manifest
+        if not is_new and data is self._profiles.get(profile_name):
+            if profile_name in self._transactions:
+                # Изменения будут записаны при фиксации транзакции
+                return
+            self._split_history(profile_name, data)
+            changed, deleted = data.take_changes()
+            if changed or deleted:
+                self._journal(profile_name, {"op": ProfileOperations.PATCH, "set": changed, "delete": deleted})
+            return
+        if is_new:
+            self._manifest[profile_name] = self._shard_name(profile_name)
+        self._split_history(profile_name, data)
+        self._profiles[profile_name] = ProfileDocument(data)
+        self._schedule_snapshot(profile_name, data)
+        if is_new:
+            self._save_manifest()
+
+    def _journal(self, profile_name: str, op: Dict) -> None:
+        seq = self._journal_seq.get(profile_name, 0) + 1
+        self._journal_seq[profile_name] = seq
+        journal_size = self._append_journal(profile_name, dict(op, seq=seq))
+        if journal_size >= self.JOURNAL_COMPACT_BYTES:
+            self._compact_journal(profile_name)
+
+    def apply_operation(self, profile_name: str, op: Dict) -> None:
+        """Применяет операцию к профилю и дописывает её в журнал (O(1) байт на операцию)."""
+        data = self.get_profile_data(profile_name)
+        with data.untracked():
+            record = ProfileOperations.apply(data, op)
+        staged = self._transactions.get(profile_name)
+        if staged is not None:
+            staged.append((op, record))
+            return
+        self._journal(profile_name, op)
+        self._after_operation(profile_name, op, record)
+
+    @contextmanager
+    def transaction(self, profile_name: str):
+        """Объединяет операции и правки документа профиля в одну запись.
+
+        Внутри блока изменения применяются только в памяти; при исключении документ
+        возвращается к состоянию до блока, иначе всё записывается один раз при выходе.
+        Вложенный вызов для того же профиля становится частью внешней транзакции.
+        """
+        data = self.get_profile_data(profile_name)
+        if profile_name in self._transactions:
+            yield data
+            return
+        checkpoint = data.checkpoint()
+        staged: List = []
+        self._transactions[profile_name] = staged
+        try:
+            yield data
+        except BaseException:
+            del self._transactions[profile_name]
+            data.restore(checkpoint)
+            raise
+        del self._transactions[profile_name]
+        try:
+            self._commit_transaction(profile_name, data, staged)
+        except Exception:
+            data.restore(checkpoint)
+            raise
+
+    def _commit_transaction(self, profile_name: str, data: ProfileDocument, staged: List) -> None:
+        """Одна запись журнала на транзакцию: недописанная при сбое строка пропускается целиком,
+        а записи после неё читаются (см. _append_line и _read_jsonl)."""
+        ops = [op for op, _ in staged]
+        changed, deleted = data.take_changes()
+        if changed or deleted:
+            ops.append({"op": ProfileOperations.PATCH, "set": changed, "delete": deleted})
+        if not ops:
+            return
+        self._journal(profile_name, ops[0] if len(ops) == 1 else {"op": ProfileOperations.BATCH, "ops": ops})
+        for op, record in staged:
+            self._after_operation(profile_name, op, record)
+
+    def get_day_stats(self, profile_name: str, day: date) -> Dict[str, float]:
+        data = self.ensure_daily_stats(profile_name)
+        return ProfileOperations.period_stats(data, day, day)
+
+    def get_week_stats(self, profile_name: str, day: date) -> Dict[str, float]:
+        """Сводка за неделю (пн–вс), в которую входит day."""
+        monday = day - timedelta(days=day.weekday())
+        data = self.ensure_daily_stats(profile_name)
+        return ProfileOperations.period_stats(data, monday, monday + timedelta(days=6))
+
+    def ensure_daily_stats(self, profile_name: str) -> Dict:
+        """Данные профиля; сводки профиля, созданного до их появления, один раз пересчитываются по истории."""
+        data = self.get_profile_data(profile_name)
+        if not data.get(ProfileOperations.DAY_STATS_COMPLETE):
+            self.rebuild_daily_stats(profile_name)
+            data = self.get_profile_data(profile_name)
+        return data
+
+    def rebuild_daily_stats(self, profile_name: str) -> None:
+        """Пересчитывает daily_stats по всей истории склада и заказам (для данных, созданных до сводок).
+
+        Прибыль заказов считается по текущей прибыли на кг из каталога.
+        """
+        data = self.get_profile_data(profile_name)
+        scratch = {"daily_stats": {}}
+        for product_name in data.get("stock", {}):
+            for record in self.iter_stock_history(profile_name, product_name):
+                if record.operation == "пополнение":
+                    ProfileOperations._bump_day(scratch, record.date, kg_in=record.quantity,
+                                                money_in=record.total_amount)
+                else:
+                    ProfileOperations._bump_day(scratch, record.date, kg_corrected=record.quantity)
+        for order in data.get("orders", []):
+            ProfileOperations._bump_day(scratch, order["date"], **ProfileOperations._order_day_deltas(data, order))
+        data["daily_stats"] = scratch["daily_stats"]
+        data[ProfileOperations.DAY_STATS_COMPLETE] = True
+        self.update_profile_data(profile_name, data)
+
+    def verify_warehouse_totals(self, profile_name: str, tolerance: float = 1e-6) -> bool:
+        """Пересчитывает итоги склада с нуля и заменяет ими сохранённые, если те разошлись.
+
+        Возвращает True, если сохранённые итоги были верны.
+        """
+        data = self.get_profile_data(profile_name)
+        stored = data.get(ProfileOperations.WAREHOUSE_TOTALS)
+        fresh = ProfileOperations.compute_warehouse_totals(data)
+        valid = stored is not None and all(
+            abs(stored.get(key, 0) - value) <= tolerance * max(1.0, abs(value))
+            for key, value in fresh.items()
+        )
+        if not valid:
+            data[ProfileOperations.WAREHOUSE_TOTALS] = fresh
+            self.update_profile_data(profile_name, data)
+        return valid
+
+    def get_stock_history(self, profile_name: str, product_name: str) -> List[HistoryRecord]:
+        """Неархивированная история склада одного товара; читается с диска только по запросу."""
+        if profile_name not in self._manifest:
+            return []
+        return [HistoryRecord.from_dict(r) for r in self._read_jsonl(self._history_path(profile_name, product_name))]
+
+    def iter_stock_history(self, profile_name: str, product_name: str, since: Optional[str] = None):
+        """Вся история товара по порядку: архивные месяцы, затем текущие записи.
+
+        Архивы читаются построчно; since ('ГГГГ-ММ') пропускает более ранние месяцы.
+        """
+        if not self.has_profile(profile_name):
+            return
+        archive_dir = self._archive_dir(profile_name, product_name)
+        if os.path.isdir(archive_dir):
+            for filename in sorted(os.listdir(archive_dir)):
+                if not filename.endswith(".jsonl.gz") or (since and filename[:7] < since):
+                    continue
+                with gzip.open(os.path.join(archive_dir, filename), "rt", encoding="utf-8") as f:
+                    for line in f:
+                        yield HistoryRecord.from_dict(json.loads(line))
+        for record in self.get_stock_history(profile_name, product_name):
+            if not since or record.month >= since:
+                yield record
+
+    def get_history_columns(self, profile_name: str, product_name: str) -> HistoryColumns:
+        """Полная история товара в колоночном виде для расчётов стоимости и аналитики.
+
+        Строится один раз из архивов и текущих записей, затем дополняется операциями склада.
+        """
+        key = (profile_name, product_name)
+        columns = self._history_columns.get(key)
+        if columns is None:
+            columns = HistoryColumns.from_records(self.iter_stock_history(profile_name, product_name))
+            self._history_columns[key] = columns
+        return columns
+
+class SQLiteDataManager(DataManager):
+    """Хранилище профилей в SQLite (profiles.db) с тем же интерфейсом, что и DataManager.
+
+    Товары, остатки, история склада и заказы лежат в отдельных таблицах с индексами,
+    поэтому операция склада — это вставка одной строки истории и обновление строки остатка,
+    а не перезапись всего профиля. При первом запуске данные переносятся из JSON-файлов.
+
+    Резервные копии базы ведёт тот же BackupStore, что и у JSON-хранилища: снимок
+    через sqlite3.Connection.backup() делает фоновый поток не чаще MIN_INTERVAL,
+    а повреждённая база при открытии заменяется последней копией.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS profiles (
+            name TEXT PRIMARY KEY,
+            next_order_number INTEGER NOT NULL DEFAULT 1,
+            -- прежнее место сводок по дням; теперь они в таблице daily_stats
+            daily_stats TEXT NOT NULL DEFAULT '{}',
+            extra TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            profile TEXT NOT NULL,
+            day TEXT NOT NULL,
+            kg_in REAL NOT NULL DEFAULT 0,
+            money_in REAL NOT NULL DEFAULT 0,
+            kg_corrected REAL NOT NULL DEFAULT 0,
+            kg_sold REAL NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            profit REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (profile, day)
+        );
+        CREATE TABLE IF NOT EXISTS products (
+            profile TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            cost_price REAL NOT NULL DEFAULT 0,
+            profit REAL NOT NULL DEFAULT 0,
+            expenses REAL NOT NULL DEFAULT 0,
+            percent_expenses REAL NOT NULL DEFAULT 0,
+            percent_profit REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (profile, name)
+        );
+        CREATE INDEX IF NOT EXISTS idx_products_name_nocase ON products (profile, name COLLATE NOCASE);
+        CREATE TABLE IF NOT EXISTS stock (
+            profile TEXT NOT NULL,
+            product TEXT NOT NULL,
+            current_quantity REAL NOT NULL DEFAULT 0,
+            total_value REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (profile, product)
+        );
+        CREATE TABLE IF NOT EXISTS stock_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile TEXT NOT NULL,
+            product TEXT NOT NULL,
+            date TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            price_per_kg REAL NOT NULL,
+            operation TEXT NOT NULL,
+            total_amount REAL NOT NULL,
+            balance_after REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_stock_history_product ON stock_history (profile, product, date);
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_orders_profile ON orders (profile, position);
+        CREATE TABLE IF NOT EXISTS order_items (
+            order_id INTEGER NOT NULL,
+            profile TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            product TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id, position);
+        CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items (profile, product);
+    """
+
+    PRODUCT_FIELDS = ("name", "cost_price", "profit", "expenses", "percent_expenses", "percent_profit")
+    DAY_FIELDS = ProfileOperations.DAY_FIELDS
+    HISTORY_FIELDS = HistoryRecord.__slots__
+    CORE_KEYS = ("products", "stock", "orders", "daily_stats", "next_order_number")
+    # Производные ключи не хранятся: строки заказов по товару находит idx_order_items_product,
+    # а итоги склада считаются один раз при первом обращении
+    DERIVED_KEYS = (ProfileOperations.ORDER_INDEX, ProfileOperations.WAREHOUSE_TOTALS)
+
+    def __init__(self, data_dir: Optional[str] = None, serializer: str = "json",
+                 history_horizon_days: Optional[int] = 90) -> None:
+        self.db_file: str = ""
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.RLock()
+        super().__init__(data_dir, serializer, history_horizon_days)
+
+    def _init_directories(self) -> None:
+        if not self.data_dir:
+            self.data_dir = App.get_running_app().user_data_dir
+        self.db_file = os.path.join(self.data_dir, "profiles.db")
+        self.backup_dir = os.path.join(self.data_dir, "backups")
+        os.makedirs(self.data_dir, exist_ok=True)
+        os.makedirs(self.backup_dir, exist_ok=True)
+        self._backups = BackupStore(self.backup_dir)
+        
+        try:
+            self._open_database()
+        except sqlite3.DatabaseError as e:
+            payload = self._backups.latest(self.db_file)
+            if not payload:
+                raise
+            print(f"[!] База {self.db_file} повреждена ({e}), восстановление из резервной копии")
+            self._restore_backup(payload)
+            self._open_database()
+        
+        migrated = self._db.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+        if not migrated:
+            self._migrate_from_json()
+
+    def _migrate_from_json(self) -> None:
+        """Однократный перенос профилей из JSON-хранилища (манифест или старый profiles.json)."""
+        json_files = (
+            os.path.join(self.data_dir, "profiles", "manifest.json"),
+            os.path.join(self.data_dir, "profiles.json"),
+        )
+        if any(os.path.exists(path) for path in json_files):
+            # Архивы истории общие с JSON-хранилищем, поэтому источник архивирует по тому же горизонту
+            source = DataManager(self.data_dir, history_horizon_days=self.history_horizon_days)
+            try:
+                for profile_name in source.list_profiles():
+                    data = source.get_profile_data(profile_name)
+                    for product_name, entry in data.get("stock", {}).items():
+                        entry["history"] = [r.to_dict() for r in source.get_stock_history(profile_name, product_name)]
+                    self._write_profile(profile_name, data)
+            finally:
+                source.close()
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),)
+            )
+
+    def _open_database(self) -> None:
+        self._db = sqlite3.connect(self.db_file, check_same_thread=False)
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            with self._db:
+                self._db.executescript(self.SCHEMA)
+                self._migrate_daily_stats_column(self._db)
+        except sqlite3.DatabaseError:
+            self._db.close()
+            self._db = None
+            raise
+
+    def _backup_database(self) -> None:
+        """Ставит в фоновую запись копию базы, если с прошлой прошло BackupStore.MIN_INTERVAL.
+
+        Снимок читается отдельным соединением (WAL не мешает записи в основном потоке)
+        и сохраняется в BackupStore: сжатие, дедупликация и ограничение по размеру — общие.
+        """
+        if not self._backups.is_due(self.db_file):
+            return
+
+        def task():
+            tmp_path = os.path.join(self.backup_dir, "profiles.db.tmp")
+            source = sqlite3.connect(self.db_file)
+            target = sqlite3.connect(tmp_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            try:
+                with open(tmp_path, "rb") as f:
+                    self._backups.add(self.db_file, f.read())
+            finally:
+                os.remove(tmp_path)
+
+        self._writer.submit(self.db_file, task)
+
+    def _restore_backup(self, payload: bytes) -> None:
+        """Откладывает повреждённую базу в profiles.db.broken и записывает вместо неё копию."""
+        os.replace(self.db_file, self.db_file + ".broken")
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(self.db_file + suffix):
+                os.remove(self.db_file + suffix)
+        with open(self.db_file, "wb") as f:
+            f.write(payload)
+
+    def _migrate_daily_stats_column(self, db: sqlite3.Connection) -> None:
+        """Переносит сводки из JSON-колонки profiles.daily_stats (прежняя схема) в таблицу daily_stats."""
+        for profile_name, days in db.execute(
+            "SELECT name, daily_stats FROM profiles WHERE daily_stats != '{}'"
+        ).fetchall():
+            for day, bucket in json.loads(days).items():
+                self._write_day(db, profile_name, day, bucket)
+            db.execute("UPDATE profiles SET daily_stats = '{}' WHERE name = ?", (profile_name,))
+
+    def _read_profile(self, profile_name: str) -> Optional[Dict]:
+        with self._db_lock:
+            db = self._db
+            row = db.execute(
+                "SELECT next_order_number, extra FROM profiles WHERE name = ?",
+                (profile_name,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            products = [
+                dict(zip(self.PRODUCT_FIELDS, r)) for r in db.execute(
+                    "SELECT name, cost_price, profit, expenses, percent_expenses, percent_profit "
+                    "FROM products WHERE profile = ? ORDER BY position",
+                    (profile_name,)
+                )
+            ]
+            
+            stock = {}
+            for product, qty, value in db.execute(
+                "SELECT product, current_quantity, total_value FROM stock WHERE profile = ?",
+                (profile_name,)
+            ):
+                stock[product] = {"current_quantity": qty, "total_value": value}
+            
+            daily_stats = {
+                r[0]: dict(zip(self.DAY_FIELDS, r[1:])) for r in db.execute(
+                    "SELECT day, kg_in, money_in, kg_corrected, kg_sold, revenue, profit "
+                    "FROM daily_stats WHERE profile = ?",
+                    (profile_name,)
+                )
+            }
+            
+            orders = {}
+            for order_id, order_data in db.execute(
+                "SELECT id, data FROM orders WHERE profile = ? ORDER BY position",
+                (profile_name,)
+            ):
+                order = json.loads(order_data)
+                order["items"] = []
+                orders[order_id] = order
+            for order_id, product, item_data in db.execute(
+                "SELECT order_id, product, data FROM order_items WHERE profile = ? ORDER BY order_id, position",
+                (profile_name,)
+            ):
+                item = json.loads(item_data)
+                item["product"] = product
+                orders[order_id]["items"].append(item)
+        
+        data = {
+            "products": products,
+            "stock": stock,
+            "orders": list(orders.values()),
+            "daily_stats": daily_stats,
+            "next_order_number": row[0]
+        }
+        data.update(json.loads(row[1]))
+        return data
+
+    def _write_profile(self, profile_name: str, data: Dict) -> None:
+        """Полная запись профиля одной транзакцией.
+
+        Таблица истории не перезаписывается: она меняется только операциями склада,
+        а списки history старого формата переносятся в неё и убираются из документа.
+        """
+        with self._db_lock, self._db as db:
+            self._delete_rows(db, profile_name, include_history=False)
+            self._write_profile_row(db, profile_name, data, insert=True)
+            self._write_products(db, profile_name, data.get("products", []))
+            for product, entry in data.get("stock", {}).items():
+                self._write_stock_entry(db, profile_name, product, entry)
+            for day, bucket in data.get("daily_stats", {}).items():
+                self._write_day(db, profile_name, day, bucket)
+            self._write_orders(db, profile_name, data.get("orders", []))
+
+    def _write_changes(self, profile_name: str, data: ProfileDocument) -> None:
+        """Записывает только изменённые поддеревья документа профиля."""
+        if not data.has_changes():
+            return
+        with self._db_lock, self._db as db:
+            self._write_dirty(db, profile_name, data)
+
+    def _write_dirty(self, db: sqlite3.Connection, profile_name: str, data: ProfileDocument) -> None:
+        changed, deleted = data.take_changes()
+        profile_row_changed = False
+        for path in [p for p, _ in changed] + deleted:
+            key = path[0]
+            if key == "products":
+                db.execute("DELETE FROM products WHERE profile = ?", (profile_name,))
+                self._write_products(db, profile_name, data.get("products", []))
+            elif key == "orders":
+                db.execute("DELETE FROM order_items WHERE profile = ?", (profile_name,))
+                db.execute("DELETE FROM orders WHERE profile = ?", (profile_name,))
+                self._write_orders(db, profile_name, data.get("orders", []))
+            elif key == "stock":
+                products = [path[1]] if len(path) > 1 else None
+                if products is None:
+                    db.execute("DELETE FROM stock WHERE profile = ?", (profile_name,))
+                    products = list(data.get("stock", {}))
+                for product in products:
+                    db.execute("DELETE FROM stock WHERE profile = ? AND product = ?", (profile_name, product))
+                    entry = data.get("stock", {}).get(product)
+                    if entry is not None:
+                        self._write_stock_entry(db, profile_name, product, entry)
+            elif key == "daily_stats":
+                days = data.get("daily_stats", {})
+                if len(path) > 1:
+                    day = path[1]
+                    if day in days:
+                        self._write_day(db, profile_name, day, days[day])
+                    else:
+                        db.execute("DELETE FROM daily_stats WHERE profile = ? AND day = ?", (profile_name, day))
+                else:
+                    db.execute("DELETE FROM daily_stats WHERE profile = ?", (profile_name,))
+                    for day, bucket in days.items():
+                        self._write_day(db, profile_name, day, bucket)
+            else:
+                profile_row_changed = True
+        if profile_row_changed:
+            self._write_profile_row(db, profile_name, data, insert=False)
+
+    def _write_profile_row(self, db: sqlite3.Connection, profile_name: str, data: Dict, insert: bool) -> None:
+        extra = {k: v for k, v in data.items() if k not in self.CORE_KEYS and k not in self.DERIVED_KEYS}
+        values = (data.get("next_order_number", 1), json.dumps(extra, ensure_ascii=False), profile_name)
+        if insert:
+            db.execute("INSERT INTO profiles (next_order_number, extra, name) VALUES (?, ?, ?)", values)
+        else:
+            db.execute("UPDATE profiles SET next_order_number = ?, extra = ? WHERE name = ?", values)
+
+    def _write_day(self, db: sqlite3.Connection, profile_name: str, day: str, bucket: Dict) -> None:
+        """Записывает сводку одного дня (строка daily_stats заменяется целиком)."""
+        db.execute(
+            "INSERT OR REPLACE INTO daily_stats (profile, day, kg_in, money_in, kg_corrected, kg_sold, "
+            "revenue, profit) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (profile_name, day) + tuple(bucket.get(f, 0.0) for f in self.DAY_FIELDS)
+        )
+
+    def _write_products(self, db: sqlite3.Connection, profile_name: str, products: List[Dict]) -> None:
+        db.executemany(
+            "INSERT INTO products (profile, position, name, cost_price, profit, expenses, "
+            "percent_expenses, percent_profit) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(profile_name, pos) + tuple(p.get(f, 0.0) for f in self.PRODUCT_FIELDS)
+             for pos, p in enumerate(products)]
+        )
+
+    def _write_stock_entry(self, db: sqlite3.Connection, profile_name: str, product: str, entry: Dict) -> None:
+        db.execute(
+            "INSERT INTO stock (profile, product, current_quantity, total_value) VALUES (?, ?, ?, ?)",
+            (profile_name, product, entry["current_quantity"], entry["total_value"])
+        )
+        history = entry.pop("history", None)
+        if history is not None:
+            db.execute(
+                "DELETE FROM stock_history WHERE profile = ? AND product = ?",
+                (profile_name, product)
+            )
+            db.executemany(
+                "INSERT INTO stock_history (profile, product, date, quantity, price_per_kg, operation, "
+                "total_amount, balance_after) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(profile_name, product) + tuple(r[f] for f in self.HISTORY_FIELDS)
+                 for r in history]
+            )
+
+    @staticmethod
+    def _write_orders(db: sqlite3.Connection, profile_name: str, orders: List[Dict], start: int = 0) -> None:
+        for pos, order in enumerate(orders, start):
+            order_data = {k: v for k, v in order.items() if k != "items"}
+            cursor = db.execute(
+                "INSERT INTO orders (profile, position, data) VALUES (?, ?, ?)",
+                (profile_name, pos, json.dumps(order_data, ensure_ascii=False))
+            )
+            db.executemany(
+                "INSERT INTO order_items (order_id, profile, position, product, data) VALUES (?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, profile_name, item_pos, item["product"],
+                  json.dumps({k: v for k, v in item.items() if k != "product"}, ensure_ascii=False))
+                 for item_pos, item in enumerate(order.get("items", []))]
+            )
+
+    @staticmethod
+    def _delete_rows(db: sqlite3.Connection, profile_name: str, include_history: bool = True) -> None:
+        tables = [("profiles", "name"), ("products", "profile"), ("stock", "profile"), ("daily_stats", "profile"),
+                  ("orders", "profile"), ("order_items", "profile")]
+        if include_history:
+            tables.append(("stock_history", "profile"))
+        for table, column in tables:
+            db.execute(f"DELETE FROM {table} WHERE {column} = ?", (profile_name,))
+
+    def _profile_dir(self, profile_name: str) -> str:
+        # Тот же каталог, что и у JSON-хранилища: архивы истории переживают переход на SQLite
+        stem = os.path.splitext(self._shard_name(profile_name))[0]
+        return os.path.join(self.data_dir, "profiles", stem)
+
+    def _drop_history_before(self, profile_name: str, product_name: str, month: str) -> None:
+        with self._db_lock, self._db as db:
+            db.execute(
+                "DELETE FROM stock_history WHERE profile = ? AND product = ? AND date < ?",
+                (profile_name, product_name, month)
+            )
+
+    def list_profiles(self) -> List[str]:
+        with self._db_lock:
+            return [r[0] for r in self._db.execute("SELECT name FROM profiles ORDER BY name")]
+
+    def has_profile(self, profile_name: str) -> bool:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT 1 FROM profiles WHERE name = ?", (profile_name,)
+            ).fetchone() is not None
+
+    def delete_profile(self, profile_name: str) -> None:
+        with self._db_lock, self._db as db:
+            self._delete_rows(db, profile_name)
+        self._profiles.pop(profile_name, None)
+        self._drop_history_columns(profile_name)
+        self._remove_files(self._profile_dir(profile_name))
+
+    def get_profile_data(self, profile_name: str) -> Dict:
+        if profile_name in self._profiles:
+            return self._profiles[profile_name]
+        data = self._read_profile(profile_name)
+        if data is None:
+            return self.create_profile(profile_name)
+        data = ProfileDocument(data)
+        self._profiles[profile_name] = data
+        if self._archive_history(profile_name, data):
+            self.update_profile_data(profile_name, data)
+        return data
+
+    def update_profile_data(self, profile_name: str, data: Dict) -> None:
+        if data is self._profiles.get(profile_name):
+            if profile_name not in self._transactions:
+                self._write_changes(profile_name, data)
+                self._backup_database()
+            return
+        self._write_profile(profile_name, data)
+        self._profiles[profile_name] = ProfileDocument(data)
+        self._backup_database()
+
+    def apply_operation(self, profile_name: str, op: Dict) -> None:
+        """Применяет операцию в памяти и записывает только затронутые строки."""
+        data = self.get_profile_data(profile_name)
+        with data.untracked():
+            record = ProfileOperations.apply(data, op)
+        # Остаток фиксируется сразу: в транзакции товар может быть затем переименован
+        entry = dict(data["stock"][op["product"]]) if record is not None else None
+        staged = self._transactions.get(profile_name)
+        if staged is not None:
+            staged.append((op, record, entry))
+            return
+        with self._db_lock, self._db as db:
+            self._write_operation(db, profile_name, data, op, record, entry)
+        self._update_history_columns(profile_name, op, record)
+        if record is None:
+            self._move_archive(profile_name, op)
+        self._backup_database()
+
+    def _commit_transaction(self, profile_name: str, data: ProfileDocument, staged: List) -> None:
+        """Все операции и правки документа транзакции — в одной транзакции SQLite."""
+        with self._db_lock, self._db as db:
+            for op, record, entry in staged:
+                self._write_operation(db, profile_name, data, op, record, entry)
+            self._write_dirty(db, profile_name, data)
+        for op, record, _entry in staged:
+            self._update_history_columns(profile_name, op, record)
+            if record is None:
+                self._move_archive(profile_name, op)
+        self._backup_database()
+
+    def _write_operation(self, db: sqlite3.Connection, profile_name: str, data: Dict, op: Dict,
+                         record: Optional[HistoryRecord], entry: Optional[Dict]) -> None:
+        kind = op["op"]
+        if kind in (ProfileOperations.PRODUCT_EDIT, ProfileOperations.PRODUCT_DELETE) \
+                and ProfileOperations.HISTORY_ARCHIVE in data:
+            # Сводки архива хранятся в строке профиля и следуют за товаром
+            self._write_profile_row(db, profile_name, data, insert=False)
+        if kind in (ProfileOperations.STOCK_RECEIPT, ProfileOperations.STOCK_CORRECTION):
+            day = op["date"][:10]
+        elif kind == ProfileOperations.ORDER_ADD:
+            day = op["order"]["date"][:10]
+        else:
+            day = None
+        if day is not None:
+            # Операция меняет сводку только своего дня
+            self._write_day(db, profile_name, day, data["daily_stats"][day])
+        if record is not None:
+            product = op["product"]
+            db.execute(
+                "INSERT INTO stock_history (profile, product, date, quantity, price_per_kg, operation, "
+                "total_amount, balance_after) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (profile_name, product) + record.to_tuple()
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO stock (profile, product, current_quantity, total_value) "
+                "VALUES (?, ?, ?, ?)",
+                (profile_name, product, entry["current_quantity"], entry["total_value"])
+            )
+        elif kind == ProfileOperations.PRODUCT_ADD:
+            product = op["product"]
+            db.execute(
+                "INSERT INTO products (profile, position, name, cost_price, profit, expenses, "
+                "percent_expenses, percent_profit) VALUES (?, "
+                "(SELECT COALESCE(MAX(position), -1) + 1 FROM products WHERE profile = ?), ?, ?, ?, ?, ?, ?)",
+                (profile_name, profile_name) + tuple(product.get(f, 0.0) for f in self.PRODUCT_FIELDS)
+            )
+            db.execute(
+                "INSERT OR IGNORE INTO stock (profile, product, current_quantity, total_value) "
+                "VALUES (?, ?, 0, 0)",
+                (profile_name, product["name"])
+            )
+        elif kind == ProfileOperations.PRODUCT_EDIT:
+            old_name = op["old_name"]
+            product = op["product"]
+            db.execute(
+                "UPDATE products SET name = ?, cost_price = ?, profit = ?, expenses = ?, "
+                "percent_expenses = ?, percent_profit = ? WHERE profile = ? AND name = ?",
+                tuple(product.get(f, 0.0) for f in self.PRODUCT_FIELDS) + (profile_name, old_name)
+            )
+            if product["name"] != old_name:
+                for table, column in (("stock", "product"), ("stock_history", "product"),
+                                      ("order_items", "product")):
+                    db.execute(
+                        f"UPDATE {table} SET {column} = ? WHERE profile = ? AND {column} = ?",
+                        (product["name"], profile_name, old_name)
+                    )
+        elif kind == ProfileOperations.ORDER_ADD:
+            position = db.execute("SELECT COUNT(*) FROM orders WHERE profile = ?", (profile_name,)).fetchone()[0]
+            self._write_orders(db, profile_name, [op["order"]], start=position)
+            db.execute(
+                "UPDATE profiles SET next_order_number = MAX(next_order_number, ?) WHERE name = ?",
+                (op["order"].get("number", 0) + 1, profile_name)
+            )
+        elif kind == ProfileOperations.PRODUCT_DELETE:
+            name = op["name"]
+            db.execute("DELETE FROM products WHERE profile = ? AND name = ?", (profile_name, name))
+            db.execute("DELETE FROM stock WHERE profile = ? AND product = ?", (profile_name, name))
+            db.execute("DELETE FROM stock_history WHERE profile = ? AND product = ?", (profile_name, name))
+            db.execute(
+                "UPDATE order_items SET product = ? WHERE profile = ? AND product = ?",
+                (ProfileOperations.DELETED_PRODUCT, profile_name, name)
+            )
+
+    def get_stock_history(self, profile_name: str, product_name: str) -> List[HistoryRecord]:
+        with self._db_lock:
+            return [
+                HistoryRecord(*r) for r in self._db.execute(
+                    "SELECT date, quantity, price_per_kg, operation, total_amount, balance_after "
+                    "FROM stock_history WHERE profile = ? AND product = ? ORDER BY id",
+                    (profile_name, product_name)
+                )
+            ]
+
+    def close(self) -> None:
+        super().close()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+# Валидаторы
+class Validators:
+    @staticmethod
+    def validate_positive_float(text: str, field_name: str = "Значение") -> Tuple[Optional[float], Optional[str]]:
+        try:
+            value = float(text.replace(',', '.').strip())
+            if value <= 0:
+                return None, f"{field_name} должно быть положительным"
+            return value, None
+        except ValueError:
+            return None, f"{field_name}: введите корректное число"
+
+    @staticmethod
+    def validate_non_empty(text: str, field_name: str = "Поле") -> Tuple[Optional[str], Optional[str]]:
+        value = text.strip()
+        if not value:
+            return None, f"{field_name} не может быть пустым"
+        return value, None
+
+    @staticmethod
+    def validate_date(text: str) -> Tuple[Optional[date], Optional[str]]:
+        try:
+            return datetime.strptime(text.strip(), "%Y-%m-%d").date(), None
+        except ValueError:
+            return None, "Неверный формат даты (ГГГГ-ММ-ДД)"
+
+# UI Компоненты
+class UIComponents:
+    @staticmethod
+    def create_popup(title: str, message: str, callback=None) -> Popup:
+        return DialogPool.acquire(MessageDialog).show(title, message, callback)
+
+    @staticmethod
+    def create_confirmation_popup(title: str, message: str, yes_callback, no_callback=None) -> Popup:
+        return DialogPool.acquire(ConfirmDialog).show(title, message, yes_callback, no_callback)
+
+    @staticmethod
+    def create_table_header(labels: List[tuple], width: int = 800) -> BoxLayout:
+        header = BoxLayout(
+            orientation='horizontal',
+            size_hint_y=None,
+            height=dp(52),
+            padding=[dp(12), dp(8)],
+            spacing=dp(6),
+            size_hint_x=None,
+            width=width
+        )
+        
+        with header.canvas.before:
+            Color(*COLORS['YELLOW_DARK'])
+            header.rect = Rectangle(pos=header.pos, size=header.size)
+        
+        def update_rect(instance, value):
+            instance.rect.pos = instance.pos
+            instance.rect.size = instance.size
+        
+        header.bind(pos=update_rect, size=update_rect)
+        
+        for text, width_ratio in labels:
+            label = Label(
+                text=text,
+                font_size=dp(16),
+                bold=True,
+                color=COLORS['BACKGROUND'],
+                size_hint_x=width_ratio,
+                halign='center',
+                valign='middle'
+            )
+            label.bind(size=label.setter('text_size'))
+            header.add_widget(label)
+        
+        return header
+
+    @staticmethod
+    def create_back_button(target_screen: str = 'profile', text: str = 'Назад') -> Button:
+        btn = Button(
+            text=f'<  {text}',
+            size_hint_y=None,
+            height=Dimensions.BTN_HEIGHT,
+            background_normal='',
+            background_color=COLORS['YELLOW'],
+            color=COLORS['BACKGROUND'],
+            font_size=dp(18),
+            bold=True,
+            size_hint_x=None,
+            width=dp(100)
+        )
+        btn.bind(on_press=lambda x: setattr(App.get_running_app().root, 'current', target_screen))
+        return btn
+
+    @staticmethod
+    def create_menu_tile(title: str, screen: str) -> Button:
+        btn = Button(
+            text=title,
+            size_hint_y=None,
+            height=dp(105),
+            background_normal='',
+            background_color=COLORS['CARD_BG'],
+            color=COLORS['YELLOW'],
+            font_size=dp(16),
+            bold=True,
+            halign='center',
+            valign='middle'
+        )
+        btn.bind(size=btn.setter('text_size'))
+        btn.bind(on_press=lambda x, s=screen: setattr(App.get_running_app().root, 'current', s))
+        
+        with btn.canvas.after:
+            Color(*COLORS['BORDER'])
+            btn.border_line = Line(rectangle=(btn.x, btn.y, btn.width, btn.height), width=1.2)
+        
+        def update_border(instance, value):
+            instance.border_line.rectangle = (instance.x, instance.y, instance.width, instance.height)
+        
+        btn.bind(pos=update_border, size=update_border)
+        return btn
+
+    @staticmethod
+    def create_primary_button(text: str, height: int = Dimensions.BTN_HEIGHT) -> Button:
+        btn = Button(
+            text=text,
+            size_hint_y=None,
+            height=height,
+            background_normal='',
+            background_color=COLORS['YELLOW'],
+            color=COLORS['BACKGROUND'],
+            font_size=dp(19),
+            bold=True
+        )
+        return btn
 
-    def _create_backup(self, filepath: str) -> str:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"{os.path.basename(filepath)}.{timestamp}.bak"
-        backup_path = os.path.join(self.backup_dir, backup_name)
-        try:
-            if os.path.exists(filepath):
-                shutil.copy2(filepath, backup_path)
-            self._cleanup_old_backups()
-            return backup_path
-        except Exception:
-            return ""
+    @staticmethod
+    def create_secondary_button(text: str, height: int = Dimensions.BTN_HEIGHT, color=None) -> Button:
+        btn = Button(
+            text=text,
+            size_hint_y=None,
+            height=height,
+            background_normal='',
+            background_color=color or COLORS['CARD_BG'],
+            color=COLORS['YELLOW'],
+            font_size=dp(18),
+            bold=True
+        )
+        return btn
 
-    def _cleanup_old_backups(self, days: int = 7) -> None:
-        cutoff = datetime.now() - timedelta(days=days)
-        for fname in os.listdir(self.backup_dir):
-            if fname.endswith('.bak'):
-                path = os.path.join(self.backup_dir, fname)
-                try:
-                    mtime = datetime.fromtimestamp(os.path.getmtime(path))
-                    if mtime < cutoff:
-                        os.remove(path)
-                except Exception:
-                    pass
+    @staticmethod
+    def create_input_field(hint_text: str = '', text: str = '') -> TextInput:
+        input_field = TextInput(
+            hint_text=hint_text,
+            text=text,
+            multiline=False,
+            font_size=dp(18),
+            height=Dimensions.INPUT_HEIGHT,
+            size_hint_y=None,
+            background_normal='',
+            background_color=COLORS['CARD_BG'],
+            foreground_color=COLORS['TEXT_PRIMARY'],
+            padding=[dp(16), dp(14)],
+            cursor_color=COLORS['YELLOW'],
+            hint_text_color=COLORS['TEXT_HINT'],
+            write_tab=False
+        )
+        
+        with input_field.canvas.after:
+            Color(*COLORS['BORDER'])
+            input_field.border_line = Line(rectangle=(input_field.x, input_field.y, input_field.width, input_field.height), width=1.5)
+        
+        def update_border(instance, value):
+            instance.border_line.rectangle = (instance.x, instance.y, instance.width, instance.height)
+        
+        input_field.bind(pos=update_border, size=update_border)
+        return input_field
 
-    def _save_safe(self, data: Dict, filepath: str) -> None:
-        try:
-            self._create_backup(filepath)
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"[!] Ошибка сохранения {filepath}: {e}")
-            raise
+    @staticmethod
+    def create_recycle_list(viewclass, row_height: float, spacing: float = dp(12), **kwargs) -> RecycleView:
+        """RecycleView с карточками одинаковой высоты: виджеты создаются только для видимых строк."""
+        
+        view = RecycleView(**kwargs)
+        rows = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, row_height),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+            spacing=spacing,
+            padding=[0, dp(5)]
+        )
+        rows.bind(minimum_height=rows.setter('height'))
+        view.add_widget(rows)
+        view.viewclass = viewclass
+        return view
 
-    def _load_safe(self, filepath: str) -> Dict:
-        try:
-            if not os.path.exists(filepath):
-                return {}
-            if os.path.getsize(filepath) == 0:
-                return {}
-            with open(filepath, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if not content:
-                    return {}
-                return json.loads(content)
-        except json.JSONDecodeError:
-            backups = sorted(
-                [f for f in os.listdir(self.backup_dir) if f.startswith(os.path.basename(filepath))],
-                reverse=True
-            )
-            if backups:
-                backup_path = os.path.join(self.backup_dir, backups[0])
-                try:
-                    with open(backup_path, "r", encoding="utf-8") as f:
-                        return json.load(f)
-                except Exception:
-                    return {}
-            return {}
-        except Exception:
-            return {}
+# Переиспользуемые диалоги
+class DialogPool:
+    """Готовые экземпляры диалогов по классам.
 
-    def get_profiles(self) -> Dict:
-        if self._profiles is None:
-            self._profiles = self._load_safe(self.profiles_file)
-        return self._profiles
+    Дерево виджетов, фон и привязки диалога создаются один раз; при повторном
+    открытии show() лишь подставляет тексты и обратные вызовы. Свободен диалог,
+    который сейчас не показан (в том числе закончил анимацию закрытия), поэтому
+    вложенные окна одного вида получают разные экземпляры.
+    """
 
-    def save_profiles(self, profiles: Dict) -> None:
-        self._save_safe(profiles, self.profiles_file)
-        self._profiles = profiles.copy()
+    _dialogs: Dict[type, List[Popup]] = defaultdict(list)
 
-    def get_profile_data(self, profile_name: str) -> Dict:
-        profiles = self.get_profiles()
-        if profile_name not in profiles:
-            profiles[profile_name] = {
-                "products": [],
-                "stock": {},
-                "orders": [],
-                "daily_stats": {},
-                "next_order_number": 1
-            }
-            self.save_profiles(profiles)
-        return profiles[profile_name]
+    @classmethod
+    def acquire(cls, dialog_class):
+        dialogs = cls._dialogs[dialog_class]
+        for dialog in dialogs:
+            if dialog.parent is None:
+                return dialog
+        dialog = dialog_class()
+        dialogs.append(dialog)
+        return dialog
 
-    def update_profile_data(self, profile_name: str, data: Dict) -> None:
-        profiles = self.get_profiles()
-        profiles[profile_name] = data
-        self.save_profiles(profiles)
 
-# Валидаторы
-class Validators:
-    @staticmethod
-    def validate_positive_float(text: str, field_name: str = "Значение") -> Tuple[Optional[float], Optional[str]]:
-        try:
-            value = float(text.replace(',', '.').strip())
-            if value <= 0:
-                return None, f"{field_name} должно быть положительным"
-            return value, None
-        except ValueError:
-            return None, f"{field_name}: введите корректное число"
+class PooledDialog(Popup):
+    """Основа диалогов из DialogPool: окно без заголовка Kivy и с фоном карточки."""
 
-    @staticmethod
-    def validate_non_empty(text: str, field_name: str = "Поле") -> Tuple[Optional[str], Optional[str]]:
-        value = text.strip()
-        if not value:
-            return None, f"{field_name} не может быть пустым"
-        return value, None
+    def __init__(self, height_hint: float, **kwargs):
+        super().__init__(
+            title='',
+            size_hint=(Dimensions.POPUP_WIDTH, height_hint),
+            auto_dismiss=False,
+            separator_height=0,
+            **kwargs
+        )
+        with self.canvas.before:
+            Color(*COLORS['CARD_BG'])
+            self.rect = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._update_rect, size=self._update_rect)
 
-    @staticmethod
-    def validate_date(text: str) -> Tuple[Optional[date], Optional[str]]:
-        try:
-            return datetime.strptime(text.strip(), "%Y-%m-%d").date(), None
-        except ValueError:
-            return None, "Неверный формат даты (ГГГГ-ММ-ДД)"
+    def _update_rect(self, _instance, _value) -> None:
+        self.rect.pos = self.pos
+        self.rect.size = self.size
 
-# UI Компоненты
-class UIComponents:
     @staticmethod
-    def create_popup(title: str, message: str, callback=None) -> Popup:
-        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(18))
-        
+    def create_title(font_size: float = dp(20)) -> Label:
         title_label = Label(
-            text=title,
             color=COLORS['YELLOW'],
-            font_size=dp(20),
+            font_size=font_size,
             bold=True,
             size_hint_y=None,
-            height=dp(40),
+            height=dp(42),
             halign='center',
             valign='middle'
         )
         title_label.bind(size=title_label.setter('text_size'))
-        content.add_widget(title_label)
-        
+        return title_label
+
+    @staticmethod
+    def create_message(height: float = dp(110), font_size: float = dp(16), color=None) -> Label:
         label = Label(
-            text=message,
-            color=COLORS['TEXT_PRIMARY'],
-            font_size=dp(16),
+            color=color or COLORS['TEXT_PRIMARY'],
+            font_size=font_size,
             halign='center',
             valign='middle',
             size_hint_y=None,
-            height=dp(110)
+            height=height
         )
         label.bind(size=label.setter('text_size'))
-        content.add_widget(label)
+        return label
+
+
+class MessageDialog(PooledDialog):
+    """Сообщение с кнопкой OK; callback вызывается после закрытия."""
+
+    def __init__(self, **kwargs):
+        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(18))
+        super().__init__(0.55, content=content, **kwargs)
+        self.callback = None
+        
+        self.title_label = self.create_title()
+        self.message_label = self.create_message()
+        content.add_widget(self.title_label)
+        content.add_widget(self.message_label)
         
         btn_layout = BoxLayout(size_hint_y=None, height=dp(55), spacing=dp(15))
         ok_btn = Button(
@@ -267,259 +2774,415 @@ class UIComponents:
             bold=True,
             size_hint_x=1.0
         )
+        ok_btn.bind(on_press=self.close)
         btn_layout.add_widget(ok_btn)
         content.add_widget(btn_layout)
-        
-        popup = Popup(
-            title='',
-            content=content,
-            size_hint=(Dimensions.POPUP_WIDTH, 0.55),
-            auto_dismiss=False,
-            separator_height=0
-        )
-        
-        def close_popup(_instance):
-            popup.dismiss()
-            if callback:
-                callback()
-        
-        ok_btn.bind(on_press=close_popup)
-        
-        with popup.canvas.before:
-            Color(*COLORS['CARD_BG'])
-            popup.rect = Rectangle(pos=popup.pos, size=popup.size)
-            popup.bind(pos=lambda inst, val: setattr(inst.rect, 'pos', val))
-            popup.bind(size=lambda inst, val: setattr(inst.rect, 'size', val))
-        
-        popup.open()
-        return popup
 
-    @staticmethod
-    def create_confirmation_popup(title: str, message: str, yes_callback, no_callback=None) -> Popup:
+    def show(self, title: str, message: str, callback=None) -> "MessageDialog":
+        self.title_label.text = title
+        self.message_label.text = message
+        self.callback = callback
+        self.open()
+        return self
+
+    def close(self, _instance) -> None:
+        callback, self.callback = self.callback, None
+        self.dismiss()
+        if callback:
+            callback()
+
+
+class ConfirmDialog(PooledDialog):
+    """Вопрос с кнопками «Отмена» и «Подтвердить»."""
+
+    def __init__(self, **kwargs):
         content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(18))
+        super().__init__(0.55, content=content, **kwargs)
+        self.yes_callback = None
+        self.no_callback = None
         
-        title_label = Label(
-            text=title,
-            color=COLORS['YELLOW'],
-            font_size=dp(20),
-            bold=True,
-            size_hint_y=None,
-            height=dp(40),
-            halign='center'
-        )
-        title_label.bind(size=title_label.setter('text_size'))
-        content.add_widget(title_label)
-        
-        label = Label(
-            text=message,
-            color=COLORS['TEXT_PRIMARY'],
-            font_size=dp(16),
-            halign='center',
-            valign='middle',
-            size_hint_y=None,
-            height=dp(110)
-        )
-        label.bind(size=label.setter('text_size'))
-        content.add_widget(label)
+        self.title_label = self.create_title()
+        self.message_label = self.create_message()
+        content.add_widget(self.title_label)
+        content.add_widget(self.message_label)
         
         btn_layout = BoxLayout(size_hint_y=None, height=dp(55), spacing=dp(15))
-        
         no_btn = Button(
             text='Отмена',
             background_normal='',
             background_color=COLORS['ACCENT_RED'],
             color=COLORS['TEXT_PRIMARY'],
             font_size=dp(17),
-            bold=True,
-            size_hint_x=0.45
-        )
-        
-        yes_btn = Button(
-            text='Подтвердить',
-            background_normal='',
-            background_color=COLORS['YELLOW'],
-            color=COLORS['BACKGROUND'],
-            font_size=dp(17),
-            bold=True,
-            size_hint_x=0.45
-        )
-        
-        popup = Popup(
-            title='',
-            content=content,
-            size_hint=(Dimensions.POPUP_WIDTH, 0.55),
-            auto_dismiss=False,
-            separator_height=0
-        )
-        
-        def on_no(_instance):
-            popup.dismiss()
-            if no_callback:
-                no_callback()
-        
-        def on_yes(_instance):
-            popup.dismiss()
-            yes_callback()
-        
-        no_btn.bind(on_press=on_no)
-        yes_btn.bind(on_press=on_yes)
-        btn_layout.add_widget(no_btn)
-        btn_layout.add_widget(yes_btn)
-        content.add_widget(btn_layout)
-        
-        with popup.canvas.before:
-            Color(*COLORS['CARD_BG'])
-            popup.rect = Rectangle(pos=popup.pos, size=popup.size)
-            popup.bind(pos=lambda inst, val: setattr(inst.rect, 'pos', val))
-            popup.bind(size=lambda inst, val: setattr(inst.rect, 'size', val))
-        
-        popup.open()
-        return popup
-
-    @staticmethod
-    def create_table_header(labels: List[tuple], width: int = 800) -> BoxLayout:
-        header = BoxLayout(
-            orientation='horizontal',
-            size_hint_y=None,
-            height=dp(52),
-            padding=[dp(12), dp(8)],
-            spacing=dp(6),
-            size_hint_x=None,
-            width=width
-        )
-        
-        with header.canvas.before:
-            Color(*COLORS['YELLOW_DARK'])
-            header.rect = Rectangle(pos=header.pos, size=header.size)
-        
-        def update_rect(instance, value):
-            instance.rect.pos = instance.pos
-            instance.rect.size = instance.size
-        
-        header.bind(pos=update_rect, size=update_rect)
-        
-        for text, width_ratio in labels:
-            label = Label(
-                text=text,
-                font_size=dp(16),
-                bold=True,
-                color=COLORS['BACKGROUND'],
-                size_hint_x=width_ratio,
-                halign='center',
-                valign='middle'
-            )
-            label.bind(size=label.setter('text_size'))
-            header.add_widget(label)
-        
-        return header
-
-    @staticmethod
-    def create_back_button(target_screen: str = 'profile', text: str = 'Назад') -> Button:
-        btn = Button(
-            text=f'<  {text}',
-            size_hint_y=None,
-            height=Dimensions.BTN_HEIGHT,
+            bold=True,
+            size_hint_x=0.45
+        )
+        yes_btn = Button(
+            text='Подтвердить',
             background_normal='',
             background_color=COLORS['YELLOW'],
             color=COLORS['BACKGROUND'],
-            font_size=dp(18),
+            font_size=dp(17),
             bold=True,
-            size_hint_x=None,
-            width=dp(100)
+            size_hint_x=0.45
         )
-        btn.bind(on_press=lambda x: setattr(App.get_running_app().root, 'current', target_screen))
-        return btn
+        no_btn.bind(on_press=self.on_no)
+        yes_btn.bind(on_press=self.on_yes)
+        btn_layout.add_widget(no_btn)
+        btn_layout.add_widget(yes_btn)
+        content.add_widget(btn_layout)
 
-    @staticmethod
-    def create_menu_tile(title: str, screen: str) -> Button:
-        btn = Button(
-            text=title,
-            size_hint_y=None,
-            height=dp(105),
-            background_normal='',
-            background_color=COLORS['CARD_BG'],
-            color=COLORS['YELLOW'],
-            font_size=dp(16),
-            bold=True,
-            halign='center',
-            valign='middle'
+    def show(self, title: str, message: str, yes_callback, no_callback=None) -> "ConfirmDialog":
+        self.title_label.text = title
+        self.message_label.text = message
+        self.yes_callback = yes_callback
+        self.no_callback = no_callback
+        self.open()
+        return self
+
+    def _answer(self, callback) -> None:
+        self.yes_callback = self.no_callback = None
+        self.dismiss()
+        if callback:
+            callback()
+
+    def on_no(self, _instance) -> None:
+        self._answer(self.no_callback)
+
+    def on_yes(self, _instance) -> None:
+        self._answer(self.yes_callback)
+
+
+class ProductPickerDialog(PooledDialog):
+    """Выбор товара из каталога: список — RecycleView, кнопки создаются только для видимых строк."""
+
+    def __init__(self, **kwargs):
+        content = BoxLayout(orientation='vertical', padding=dp(18), spacing=dp(12))
+        super().__init__(0.82, content=content, **kwargs)
+        self.on_pick = None
+        
+        self.title_label = self.create_title(dp(19))
+        content.add_widget(self.title_label)
+        self.products_view = UIComponents.create_recycle_list(
+            PickerButton, dp(50), spacing=dp(8), size_hint_y=0.72
         )
-        btn.bind(size=btn.setter('text_size'))
-        btn.bind(on_press=lambda x, s=screen: setattr(App.get_running_app().root, 'current', s))
+        content.add_widget(self.products_view)
+
+    def show(self, title: str, names: List[str], on_pick) -> "ProductPickerDialog":
+        self.title_label.text = title
+        self.on_pick = on_pick
+        self.products_view.data = [{"name": name, "on_pick": self.pick} for name in names]
+        self.products_view.scroll_y = 1
+        self.open()
+        return self
+
+    def pick(self, product_name: str) -> None:
+        on_pick, self.on_pick = self.on_pick, None
+        self.dismiss()
+        if on_pick:
+            on_pick(product_name)
+
+
+class StockEditDialog(PooledDialog):
+    """Корректировка остатка и средней цены товара; on_save(dialog) проверяет и сохраняет ввод."""
+
+    def __init__(self, **kwargs):
+        content = BoxLayout(orientation='vertical', padding=dp(18), spacing=dp(16))
+        super().__init__(0.85, content=content, **kwargs)
+        self.product_name = None
+        self.on_save = None
         
-        with btn.canvas.after:
-            Color(*COLORS['BORDER'])
-            btn.border = Line(rectangle=(btn.x, btn.y, btn.width, btn.height), width=1.2)
+        self.title_label = self.create_title(dp(19))
+        content.add_widget(self.title_label)
+        self.price_info = self.create_message(dp(65), dp(15), COLORS['TEXT_HINT'])
+        content.add_widget(self.price_info)
         
-        def update_border(instance, value):
-            instance.border.rectangle = (instance.x, instance.y, instance.width, instance.height)
+        self.qty_input = self._add_field(content, 'ОСТАТОК (кг):')
+        self.price_input = self._add_field(content, 'СРЕДНЯЯ ЦЕНА ЗАКУПКИ (₽/кг):')
         
-        btn.bind(pos=update_border, size=update_border)
-        return btn
+        self.calc_label = self.create_message(dp(38), dp(15), COLORS['TEXT_HINT'])
+        content.add_widget(self.calc_label)
+        
+        buttons_layout = BoxLayout(spacing=dp(16), size_hint_y=None, height=dp(65))
+        cancel_btn = UIComponents.create_secondary_button('ОТМЕНА', height=dp(60), color=COLORS['ACCENT_RED'])
+        save_btn = UIComponents.create_primary_button('СОХРАНИТЬ', height=dp(60))
+        cancel_btn.bind(on_press=self.dismiss)
+        save_btn.bind(on_press=self.save)
+        buttons_layout.add_widget(cancel_btn)
+        buttons_layout.add_widget(save_btn)
+        content.add_widget(buttons_layout)
 
     @staticmethod
-    def create_primary_button(text: str, height: int = Dimensions.BTN_HEIGHT) -> Button:
-        btn = Button(
-            text=text,
+    def _add_field(content: BoxLayout, caption: str) -> TextInput:
+        field_layout = BoxLayout(orientation='vertical', size_hint_y=None, height=dp(85))
+        field_layout.add_widget(Label(
+            text=caption,
+            color=COLORS['YELLOW'],
+            font_size=dp(17),
+            bold=True,
             size_hint_y=None,
-            height=height,
-            background_normal='',
-            background_color=COLORS['YELLOW'],
-            color=COLORS['BACKGROUND'],
-            font_size=dp(19),
-            bold=True
-        )
-        return btn
+            height=dp(32),
+            halign='left'
+        ))
+        input_field = UIComponents.create_input_field()
+        field_layout.add_widget(input_field)
+        content.add_widget(field_layout)
+        return input_field
 
-    @staticmethod
-    def create_secondary_button(text: str, height: int = Dimensions.BTN_HEIGHT, color=None) -> Button:
-        btn = Button(
-            text=text,
-            size_hint_y=None,
-            height=height,
-            background_normal='',
-            background_color=color or COLORS['CARD_BG'],
-            color=COLORS['YELLOW'],
-            font_size=dp(18),
-            bold=True
-        )
-        return btn
+    def show(self, product_name: str, product_info: Optional[Dict], stock: StockEntry, on_save) -> "StockEditDialog":
+        self.product_name = product_name
+        self.on_save = on_save
+        self.title_label.text = f'РЕДАКТИРОВАНИЕ: {product_name.upper()}'
+        if product_info:
+            percent_profit = BusinessLogic.calculate_percent_profit(product_info['cost_price'], product_info['profit'])
+            self.price_info.text = (
+                f"ЦЕНА ПРОДАЖИ: {product_info['cost_price']:.2f} ₽/кг\n"
+                f"ПРИБЫЛЬ: {product_info['profit']:.2f} ₽ ({percent_profit:.1f}%)"
+            )
+        else:
+            self.price_info.text = ''
+        self.price_info.height = dp(65) if product_info else 0
+        self.price_info.opacity = 1 if product_info else 0
+        self.qty_input.text = f'{stock.current_quantity:.2f}'
+        self.price_input.text = f'{stock.avg_price:.2f}'
+        self.calc_label.text = f'ТЕКУЩАЯ СТОИМОСТЬ ОСТАТКА: {stock.total_value:.2f} ₽'
+        self.open()
+        return self
+
+    def save(self, _instance) -> None:
+        if self.on_save:
+            self.on_save(self)
+
+# Согласование списков
+class ListReconciler:
+    """Карточки контейнера по ключу: при sync() создаются только новые, обновляются
+    изменённые, лишние удаляются, а остальные остаются на месте.
+
+    create(item) строит карточку, update(widget, item) перенастраивает существующую.
+    Контейнер должен содержать только карточки этого объекта.
+    """
+
+    def __init__(self, container, key: Callable, create: Callable, update: Optional[Callable] = None) -> None:
+        self.container = container
+        self.key = key
+        self.create = create
+        self.update = update
+        self._cards: Dict = {}
+
+    def sync(self, items) -> None:
+        cards = {}
+        order = []
+        for item in items:
+            key = self.key(item)
+            card = self._cards.pop(key, None)
+            if card is None:
+                card = (self.create(item), item)
+            elif card[1] != item:
+                if self.update is not None:
+                    self.update(card[0], item)
+                card = (card[0], item)
+            cards[key] = card
+            order.append(card[0])
+        for widget, _item in self._cards.values():
+            self.container.remove_widget(widget)
+        self._cards = cards
+        self._arrange(order)
+
+    def _arrange(self, order: List) -> None:
+        """Переставляет только карточки, стоящие не на своём месте (children хранятся в обратном порядке)."""
+        container = self.container
+        for position, widget in enumerate(order):
+            children = container.children
+            current = len(children) - 1 - position
+            if 0 <= current < len(children) and children[current] is widget:
+                continue
+            if widget.parent is container:
+                container.remove_widget(widget)
+            container.add_widget(widget, index=len(container.children) - position)
 
     @staticmethod
-    def create_input_field(hint_text: str = '', text: str = '') -> TextInput:
-        input_field = TextInput(
-            hint_text=hint_text,
-            text=text,
-            multiline=False,
-            font_size=dp(18),
-            height=Dimensions.INPUT_HEIGHT,
-            size_hint_y=None,
+    def sync_data(view: RecycleView, rows: List[Dict], key: str) -> None:
+        """Данные RecycleView: при том же наборе и порядке ключей заменяются только изменённые строки."""
+        data = view.data
+        if len(data) != len(rows) or any(old[key] != new[key] for old, new in zip(data, rows)):
+            view.data = rows
+            return
+        for index, row in enumerate(rows):
+            if data[index] != row:
+                data[index] = row
+
+
+# Виртуализированные списки
+# Раскладка карточки описана одним правилом. Привязки в нём только те, что меняются у
+# созданной карточки (фон по размеру, text_size подписей): оформление, общее для класса,
+# ставится один раз в __init__, а текст строки — напрямую в refresh_view_attrs
+Builder.load_string("""
+<InfoCard>:
+    orientation: 'horizontal'
+    padding: dp(12), dp(8)
+    spacing: dp(12)
+    canvas.before:
+        Color:
+            rgba: root.background_color
+        Rectangle:
+            pos: self.pos
+            size: self.size
+    BoxLayout:
+        orientation: 'vertical'
+        size_hint_x: 0.82
+        spacing: dp(3)
+        Label:
+            id: title
+            bold: True
+            text_size: self.size
+            halign: 'left'
+            valign: 'middle'
+        Label:
+            id: line1
+            font_size: dp(16)
+            text_size: self.size
+            halign: 'left'
+            valign: 'middle'
+        Label:
+            id: line2
+            font_size: dp(16)
+            text_size: self.size
+            halign: 'left'
+            valign: 'middle'
+    Button:
+        id: button
+        size_hint_x: 0.18
+        background_normal: ''
+        font_size: dp(14)
+        bold: True
+        on_press: root.edit()
+""")
+
+
+class InfoCard(RecycleDataViewBehavior, BoxLayout):
+    """Карточка списка: заголовок, две строки и кнопка. Виджеты и фон задаёт правило <InfoCard>;
+    кнопка вызывает on_edit(name) из данных строки. Оформление подклассы задают атрибутами класса."""
+
+    background_color = ColorProperty(COLORS['CARD_BG'])
+    button_text = 'ИЗМЕНИТЬ'
+    title_font_size = dp(17)
+    title_color = COLORS['YELLOW']
+    line1_color = COLORS['TEXT_PRIMARY']
+    line2_color = COLORS['TEXT_PRIMARY']
+    button_color = COLORS['YELLOW']
+    button_text_color = COLORS['BACKGROUND']
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.key = ''
+        self.callback = None
+        ids = self.ids
+        ids.title.font_size = self.title_font_size
+        ids.title.color = self.title_color
+        ids.line1.color = self.line1_color
+        ids.line2.color = self.line2_color
+        ids.button.text = self.button_text
+        ids.button.background_color = self.button_color
+        ids.button.color = self.button_text_color
+
+    def refresh_view_attrs(self, rv, index, data) -> None:
+        self.key = data["name"]
+        self.callback = data.get("on_edit")
+
+    def edit(self) -> None:
+        if self.callback and self.key:
+            self.callback(self.key)
+
+
+class ProductCard(InfoCard):
+    """Карточка товара каталога.
+
+    Данные строки — копия полей товара {name, cost_price, profit, percent_profit, on_edit},
+    чтобы ListReconciler.sync_data видел изменения товара.
+    """
+
+    button_text = 'РЕДАКТИРОВАТЬ'
+    title_font_size = dp(18)
+    line2_color = COLORS['ACCENT_GREEN']
+
+    def refresh_view_attrs(self, rv, index, data) -> None:
+        super().refresh_view_attrs(rv, index, data)
+        ids = self.ids
+        ids.title.text = f'НАЗВАНИЕ: {data["name"]}'
+        ids.line1.text = f'ЦЕНА: {data["cost_price"]:.2f} ₽/кг'
+        ids.line2.text = f'ПРИБЫЛЬ: {data["profit"]:.2f} ₽ ({data["percent_profit"]:.1f}%)'
+
+
+class WarehouseCard(InfoCard):
+    """Строка склада: остаток и средняя цена товара. Данные строки — {name, quantity, avg_price, on_edit}."""
+
+    def refresh_view_attrs(self, rv, index, data) -> None:
+        super().refresh_view_attrs(rv, index, data)
+        qty = data["quantity"]
+        ids = self.ids
+        ids.title.text = data["name"].upper()
+        ids.line1.text = f'ОСТАТОК: {qty:.2f} кг'
+        ids.line1.color = COLORS['ACCENT_GREEN'] if qty > 0 else COLORS['ACCENT_RED']
+        ids.line2.text = f'СР. ЦЕНА: {data["avg_price"]:.2f} ₽/кг'
+
+
+class PickerButton(RecycleDataViewBehavior, Button):
+    """Строка списка выбора товара; данные — {name, on_pick}."""
+
+    def __init__(self, **kwargs):
+        super().__init__(
             background_normal='',
             background_color=COLORS['CARD_BG'],
-            foreground_color=COLORS['TEXT_PRIMARY'],
-            padding=[dp(16), dp(14)],
-            cursor_color=COLORS['YELLOW'],
-            hint_text_color=COLORS['TEXT_HINT'],
-            write_tab=False
+            color=COLORS['YELLOW'],
+            font_size=dp(17),
+            bold=True,
+            **kwargs
         )
-        
-        with input_field.canvas.after:
-            Color(*COLORS['BORDER'])
-            input_field.border = Line(rectangle=(input_field.x, input_field.y, input_field.width, input_field.height), width=1.5)
-        
-        def update_border(instance, value):
-            instance.border.rectangle = (instance.x, instance.y, instance.width, instance.height)
-        
-        input_field.bind(pos=update_border, size=update_border)
-        return input_field
+        self.product_name = None
+        self.on_pick = None
+        self.bind(on_press=self.pick)
+
+    def refresh_view_attrs(self, rv, index, data) -> None:
+        self.product_name = data["name"]
+        self.on_pick = data["on_pick"]
+        self.text = data["name"].upper()
+
+    def pick(self, _instance) -> None:
+        if self.on_pick and self.product_name is not None:
+            self.on_pick(self.product_name)
+
+
+# Экраны по требованию
+class LazyScreenManager(ScreenManager):
+    """ScreenManager, который создаёт зарегистрированный экран при первом переходе на него."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._factories: Dict[str, Callable] = {}
+
+    def register(self, name: str, factory: Callable) -> None:
+        """factory(name=...) строит экран; вызывается один раз, при первом обращении к name."""
+        self._factories[name] = factory
+
+    def get_screen(self, name: str) -> Screen:
+        factory = self._factories.pop(name, None)
+        if factory is not None:
+            self.add_widget(factory(name=name))
+        return super().get_screen(name)
+
+    def has_screen(self, name: str) -> bool:
+        return name in self._factories or super().has_screen(name)
 
 # Базовый экран
 class BaseScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.data_manager = App.get_running_app().data_manager
         self.business_logic = App.get_running_app().business_logic
 
+    @property
+    def data_manager(self) -> Optional[DataManager]:
+        """Хранилище приложения; None, пока оно загружается в фоне."""
+        return App.get_running_app().data_manager
+
     def show_popup(self, title: str, message: str, callback=None) -> None:
         UIComponents.create_popup(title, message, callback)
 
@@ -535,16 +3198,26 @@ class BaseScreen(Screen):
             return {}
         return self.data_manager.get_profile_data(profile_name)
 
-    def save_profile_data(self, data: Dict) -> None:
+    def get_catalog(self) -> CatalogIndex:
+        data = self.get_profile_data()
+        return data.catalog if isinstance(data, ProfileDocument) else CatalogIndex()
+
+    def apply_operation(self, op: Dict) -> None:
         profile_name = self.get_current_profile()
         if profile_name:
-            self.data_manager.update_profile_data(profile_name, data)
+            self.data_manager.apply_operation(profile_name, op)
 
 # Экраны приложения
 class HomeScreen(BaseScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.profiles_list = None
+        self.profiles_cards = None
+        self.empty_box = None
+        self.status_label = None
+        self.status_hint = None
+        # Профиль читается в фоне — до конца загрузки список не реагирует на нажатия
+        self.loading = False
         self.build_ui()
 
     def build_ui(self) -> None:
@@ -575,9 +3248,36 @@ class HomeScreen(BaseScreen):
         subtitle.bind(size=subtitle.setter('text_size'))
         main_layout.add_widget(subtitle)
         
+        self.empty_box = BoxLayout(orientation='vertical', size_hint_y=None, height=0, opacity=0)
+        self.status_label = Label(
+            size_hint_y=None,
+            height=dp(60),
+            color=COLORS['TEXT_SECONDARY'],
+            font_size=dp(22),
+            bold=True,
+            halign='center',
+            valign='middle'
+        )
+        self.status_label.bind(size=self.status_label.setter('text_size'))
+        self.empty_box.add_widget(self.status_label)
+        
+        self.status_hint = Label(
+            size_hint_y=None,
+            height=dp(45),
+            color=COLORS['TEXT_HINT'],
+            font_size=dp(15),
+            halign='center',
+            valign='middle',
+            italic=True
+        )
+        self.status_hint.bind(size=self.status_hint.setter('text_size'))
+        self.empty_box.add_widget(self.status_hint)
+        main_layout.add_widget(self.empty_box)
+        
         scroll = ScrollView(size_hint_y=0.55)
         self.profiles_list = GridLayout(cols=1, spacing=dp(12), size_hint_y=None, padding=[0, dp(5)])
         self.profiles_list.bind(minimum_height=self.profiles_list.setter('height'))
+        self.profiles_cards = ListReconciler(self.profiles_list, key=str, create=self.create_profile_card)
         scroll.add_widget(self.profiles_list)
         main_layout.add_widget(scroll)
         
@@ -590,83 +3290,94 @@ class HomeScreen(BaseScreen):
         main_layout.add_widget(btn_exit)
         
         self.add_widget(main_layout)
-        self.load_profiles()
+
+    def on_pre_enter(self) -> None:
+        if self.data_manager is None:
+            self.show_status('ЗАГРУЗКА...', 'Читаем данные профилей')
+        else:
+            self.load_profiles()
+
+    def show_status(self, text: str = '', hint: str = '') -> None:
+        """Сообщение над списком (загрузка, нет профилей); пустой text скрывает его."""
+        self.status_label.text = text
+        self.status_hint.text = hint
+        self.empty_box.height = dp(105) if text else 0
+        self.empty_box.opacity = 1 if text else 0
 
     def load_profiles(self) -> None:
-        self.profiles_list.clear_widgets()
-        profiles = self.data_manager.get_profiles()
-        
-        if not profiles:
-            empty_label = Label(
-                text='НЕТ ПРОФИЛЕЙ',
-                size_hint_y=None,
-                height=dp(60),
-                color=COLORS['TEXT_SECONDARY'],
-                font_size=dp(22),
-                bold=True,
-                halign='center',
-                valign='middle'
-            )
-            empty_label.bind(size=empty_label.setter('text_size'))
-            self.profiles_list.add_widget(empty_label)
-            
-            hint_label = Label(
-                text='Нажмите "Создать новый профиль" чтобы начать работу',
-                size_hint_y=None,
-                height=dp(45),
-                color=COLORS['TEXT_HINT'],
-                font_size=dp(15),
-                halign='center',
-                valign='middle',
-                italic=True
-            )
-            hint_label.bind(size=hint_label.setter('text_size'))
-            self.profiles_list.add_widget(hint_label)
+        if self.data_manager is None or self.loading:
             return
+        profiles = self.data_manager.list_profiles()
+        if profiles:
+            self.show_status()
+        else:
+            self.show_status('НЕТ ПРОФИЛЕЙ', 'Нажмите "Создать новый профиль" чтобы начать работу')
+        self.profiles_cards.sync(profiles)
+
+    def create_profile_card(self, profile_name: str) -> BoxLayout:
+        profile_container = BoxLayout(
+            orientation='horizontal',
+            size_hint_y=None,
+            height=dp(62),
+            spacing=dp(10)
+        )
         
-        for profile_name in sorted(profiles.keys()):
-            profile_container = BoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=dp(62),
-                spacing=dp(10)
-            )
-            
-            btn = Button(
-                text=profile_name,
-                size_hint_x=0.8,
-                background_normal='',
-                background_color=COLORS['CARD_BG'],
-                color=COLORS['YELLOW'],
-                font_size=dp(18),
-                bold=True
-            )
-            btn.bind(on_press=lambda instance, name=profile_name: self.select_profile(name))
-            
-            del_btn = Button(
-                text='УДАЛИТЬ',
-                size_hint_x=0.2,
-                size_hint_y=None,
-                height=dp(44),
-                background_normal='',
-                background_color=COLORS['ACCENT_RED'],
-                color=COLORS['TEXT_PRIMARY'],
-                font_size=dp(14),
-                bold=True
-            )
-            del_btn.bind(on_press=lambda instance, name=profile_name: self.confirm_delete_profile(name))
-            
-            profile_container.add_widget(btn)
-            profile_container.add_widget(del_btn)
-            self.profiles_list.add_widget(profile_container)
+        btn = Button(
+            text=profile_name,
+            size_hint_x=0.8,
+            background_normal='',
+            background_color=COLORS['CARD_BG'],
+            color=COLORS['YELLOW'],
+            font_size=dp(18),
+            bold=True
+        )
+        btn.bind(on_press=lambda instance, name=profile_name: self.select_profile(name))
+        
+        del_btn = Button(
+            text='УДАЛИТЬ',
+            size_hint_x=0.2,
+            size_hint_y=None,
+            height=dp(44),
+            background_normal='',
+            background_color=COLORS['ACCENT_RED'],
+            color=COLORS['TEXT_PRIMARY'],
+            font_size=dp(14),
+            bold=True
+        )
+        del_btn.bind(on_press=lambda instance, name=profile_name: self.confirm_delete_profile(name))
+        
+        profile_container.add_widget(btn)
+        profile_container.add_widget(del_btn)
+        return profile_container
 
     def select_profile(self, profile_name: str) -> None:
+        """Читает профиль в фоне; пока идёт загрузка, нажатия на список игнорируются."""
+        if self.data_manager is None or self.loading:
+            return
+        self.loading = True
+        self.show_status('ЗАГРУЗКА ПРОФИЛЯ', profile_name)
+        App.get_running_app().run_in_background(
+            lambda: self.data_manager.ensure_daily_stats(profile_name),
+            lambda data: self.open_profile(profile_name, data),
+            self.profile_load_failed
+        )
+
+    def open_profile(self, profile_name: str, data: Dict) -> None:
+        self.loading = False
+        self.show_status()
         app = App.get_running_app()
         app.current_profile = profile_name
-        app.profile_data = self.data_manager.get_profile_data(profile_name)
+        app.profile_data = data
         self.manager.current = 'profile'
 
+    def profile_load_failed(self, error: Exception) -> None:
+        self.loading = False
+        self.load_profiles()
+        self.show_popup('ОШИБКА', f'Не удалось загрузить профиль: {error}')
+
     def confirm_delete_profile(self, profile_name: str) -> None:
+        if self.data_manager is None or self.loading:
+            return
         self.show_confirmation(
             title='УДАЛЕНИЕ ПРОФИЛЯ',
             message=f'Вы уверены, что хотите удалить профиль "{profile_name}"?\n'
@@ -675,13 +3386,11 @@ class HomeScreen(BaseScreen):
         )
 
     def delete_profile(self, profile_name: str) -> None:
-        profiles = self.data_manager.get_profiles()
-        if profile_name not in profiles:
+        if not self.data_manager.has_profile(profile_name):
             self.show_popup('ОШИБКА', 'Профиль не найден')
             return
         
-        del profiles[profile_name]
-        self.data_manager.save_profiles(profiles)
+        self.data_manager.delete_profile(profile_name)
         
         app = App.get_running_app()
         if app.current_profile == profile_name:
@@ -695,6 +3404,8 @@ class HomeScreen(BaseScreen):
         )
 
     def show_create_profile(self, _instance) -> None:
+        if self.data_manager is None or self.loading:
+            return
         content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(18))
         
         title_label = Label(
@@ -750,20 +3461,12 @@ class HomeScreen(BaseScreen):
                 self.show_popup('ОШИБКА', 'Имя профиля не может быть пустым')
                 return
             
-            profiles = self.data_manager.get_profiles()
-            if name in profiles:
+            if self.data_manager.has_profile(name):
                 popup.dismiss()
                 self.show_popup('ОШИБКА', f'Профиль "{name}" уже существует')
                 return
             
-            profiles[name] = {
-                "products": [],
-                "stock": {},
-                "orders": [],
-                "daily_stats": {},
-                "next_order_number": 1
-            }
-            self.data_manager.save_profiles(profiles)
+            self.data_manager.create_profile(name)
             popup.dismiss()
             self.load_profiles()
             self.show_popup('УСПЕХ', f'Профиль "{name}" успешно создан!')
@@ -779,6 +3482,7 @@ class ProfileScreen(BaseScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.title_label = None
+        self.stats_label = None
         self.build_ui()
 
     def build_ui(self) -> None:
@@ -801,6 +3505,18 @@ class ProfileScreen(BaseScreen):
         header.add_widget(self.title_label)
         layout.add_widget(header)
         
+        self.stats_label = Label(
+            text='',
+            size_hint_y=None,
+            height=dp(50),
+            font_size=dp(15),
+            color=COLORS['TEXT_SECONDARY'],
+            halign='center',
+            valign='middle'
+        )
+        self.stats_label.bind(size=self.stats_label.setter('text_size'))
+        layout.add_widget(self.stats_label)
+        
         grid = GridLayout(cols=2, spacing=dp(14), size_hint_y=None, padding=[dp(5), dp(10)])
         grid.bind(minimum_height=grid.setter('height'))
         
@@ -830,12 +3546,27 @@ class ProfileScreen(BaseScreen):
     def on_enter(self) -> None:
         profile_name = self.get_current_profile()
         self.title_label.text = f'ПРОФИЛЬ: {profile_name}' if profile_name else 'ПРОФИЛЬ НЕ ВЫБРАН'
+        self.stats_label.text = ''
+        if profile_name:
+            today = date.today()
+            day = self.data_manager.get_day_stats(profile_name, today)
+            week = self.data_manager.get_week_stats(profile_name, today)
+            self.stats_label.text = (
+                f'СЕГОДНЯ: продано {day["kg_sold"]:.2f} кг, выручка {day["revenue"]:.2f} ₽\n'
+                f'НЕДЕЛЯ: продано {week["kg_sold"]:.2f} кг, выручка {week["revenue"]:.2f} ₽'
+            )
 
 class ProductsScreen(BaseScreen):
+    # Сколько найденных товаров показывать при поиске
+    SEARCH_LIMIT = 50
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.scroll = None
-        self.products_list = None
+        self.products_view = None
+        self.status_box = None
+        self.status_label = None
+        self.status_hint = None
+        self.search_input = None
         self.build_ui()
 
     def build_ui(self) -> None:
@@ -845,150 +3576,102 @@ class ProductsScreen(BaseScreen):
         title = Label(
             text='КАТАЛОГ ТОВАРОВ',
             size_hint_y=None,
-            height=Dimensions.TITLE_HEIGHT,
-            font_size=dp(24),
+            height=Dimensions.TITLE_HEIGHT,
+            font_size=dp(24),
+            bold=True,
+            color=COLORS['YELLOW'],
+            halign='center',
+            valign='middle'
+        )
+        title.bind(size=title.setter('text_size'))
+        layout.add_widget(title)
+        
+        hint_label = Label(
+            text='Нажмите "РЕДАКТИРОВАТЬ" для изменения характеристик товара',
+            size_hint_y=None,
+            height=dp(35),
+            font_size=dp(15),
+            color=COLORS['TEXT_HINT'],
+            halign='center',
+            valign='middle',
+            italic=True
+        )
+        hint_label.bind(size=hint_label.setter('text_size'))
+        layout.add_widget(hint_label)
+        
+        self.search_input = UIComponents.create_input_field('ПОИСК ТОВАРА')
+        self.search_input.bind(text=lambda _instance, _value: self.load_products())
+        layout.add_widget(self.search_input)
+        
+        self.status_box = BoxLayout(orientation='vertical', size_hint_y=None, height=0, opacity=0)
+        self.status_label = Label(
+            size_hint_y=None,
+            height=dp(65),
+            color=COLORS['TEXT_SECONDARY'],
+            font_size=dp(21),
             bold=True,
-            color=COLORS['YELLOW'],
             halign='center',
             valign='middle'
         )
-        title.bind(size=title.setter('text_size'))
-        layout.add_widget(title)
-        
-        hint_label = Label(
-            text='Нажмите "РЕДАКТИРОВАТЬ" для изменения характеристик товара',
+        self.status_label.bind(size=self.status_label.setter('text_size'))
+        self.status_hint = Label(
             size_hint_y=None,
-            height=dp(35),
-            font_size=dp(15),
+            height=dp(40),
             color=COLORS['TEXT_HINT'],
+            font_size=dp(16),
             halign='center',
             valign='middle',
             italic=True
         )
-        hint_label.bind(size=hint_label.setter('text_size'))
-        layout.add_widget(hint_label)
+        self.status_hint.bind(size=self.status_hint.setter('text_size'))
+        self.status_box.add_widget(self.status_label)
+        self.status_box.add_widget(self.status_hint)
+        layout.add_widget(self.status_box)
         
-        self.scroll = ScrollView(size_hint_y=0.75)
-        self.products_list = GridLayout(cols=1, spacing=dp(12), size_hint_y=None, padding=[0, dp(5)])
-        self.products_list.bind(minimum_height=self.products_list.setter('height'))
-        self.scroll.add_widget(self.products_list)
-        layout.add_widget(self.scroll)
+        self.products_view = UIComponents.create_recycle_list(ProductCard, dp(100), size_hint_y=0.75)
+        layout.add_widget(self.products_view)
         
         self.add_widget(layout)
 
     def on_enter(self) -> None:
         self.load_products()
 
+    def show_status(self, text: str = '', hint: str = '') -> None:
+        """Сообщение вместо списка (пустой каталог, ничего не найдено); пустой text скрывает его."""
+        self.status_label.text = text
+        self.status_hint.text = hint
+        self.status_hint.height = dp(40) if hint else 0
+        self.status_box.height = (dp(65) + self.status_hint.height) if text else 0
+        self.status_box.opacity = 1 if text else 0
+
     def load_products(self) -> None:
-        self.products_list.clear_widgets()
         profile_data = self.get_profile_data()
-        products = profile_data.get("products", [])
-        
-        if not products:
-            empty_label = Label(
-                text='НЕТ ТОВАРОВ В КАТАЛОГЕ',
-                size_hint_y=None,
-                height=dp(65),
-                color=COLORS['TEXT_SECONDARY'],
-                font_size=dp(21),
-                bold=True,
-                halign='center',
-                valign='middle'
-            )
-            empty_label.bind(size=empty_label.setter('text_size'))
-            self.products_list.add_widget(empty_label)
-            
-            hint_label = Label(
-                text='Нажмите "ДОБАВИТЬ ТОВАР" в главном меню',
-                size_hint_y=None,
-                height=dp(40),
-                color=COLORS['TEXT_HINT'],
-                font_size=dp(16),
-                halign='center',
-                valign='middle',
-                italic=True
-            )
-            hint_label.bind(size=hint_label.setter('text_size'))
-            self.products_list.add_widget(hint_label)
+        if not profile_data.get("products"):
+            self.products_view.data = []
+            self.show_status('НЕТ ТОВАРОВ В КАТАЛОГЕ', 'Нажмите "ДОБАВИТЬ ТОВАР" в главном меню')
             return
         
-        for product in sorted(products, key=lambda x: x["name"]):
-            card = BoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=dp(100),
-                padding=[dp(12), dp(8)],
-                spacing=dp(12)
-            )
-            
-            info_layout = BoxLayout(orientation='vertical', size_hint_x=0.82, spacing=dp(4))
-            
-            name_label = Label(
-                text=f'НАЗВАНИЕ: {product["name"]}',
-                font_size=dp(18),
-                bold=True,
-                color=COLORS['YELLOW'],
-                size_hint_y=None,
-                height=dp(30),
-                halign='left',
-                valign='middle'
-            )
-            name_label.bind(size=name_label.setter('text_size'))
-            
-            price_label = Label(
-                text=f'ЦЕНА: {product["cost_price"]:.2f} ₽/кг',
-                font_size=dp(16),
-                color=COLORS['TEXT_PRIMARY'],
-                size_hint_y=None,
-                height=dp(28),
-                halign='left',
-                valign='middle'
-            )
-            price_label.bind(size=price_label.setter('text_size'))
-            
-            profit_label = Label(
-                text=f'ПРИБЫЛЬ: {product["profit"]:.2f} ₽ ({product["percent_profit"]:.1f}%)',
-                font_size=dp(16),
-                color=COLORS['ACCENT_GREEN'],
-                size_hint_y=None,
-                height=dp(28),
-                halign='left',
-                valign='middle'
-            )
-            profit_label.bind(size=profit_label.setter('text_size'))
-            
-            info_layout.add_widget(name_label)
-            info_layout.add_widget(price_label)
-            info_layout.add_widget(profit_label)
-            
-            edit_btn = Button(
-                text='РЕДАКТИРОВАТЬ',
-                size_hint_x=0.18,
-                size_hint_y=None,
-                height=dp(84),
-                background_normal='',
-                background_color=COLORS['YELLOW'],
-                color=COLORS['BACKGROUND'],
-                font_size=dp(14),
-                bold=True
-            )
-            edit_btn.bind(on_press=lambda instance, p=product: self.edit_product(p))
-            
-            with card.canvas.before:
-                Color(*COLORS['CARD_BG'])
-                card.rect = Rectangle(pos=card.pos, size=card.size)
-            
-            def update_rect(instance, value):
-                instance.rect.pos = instance.pos
-                instance.rect.size = instance.size
-            
-            card.bind(pos=update_rect, size=update_rect)
-            
-            card.add_widget(info_layout)
-            card.add_widget(edit_btn)
-            self.products_list.add_widget(card)
+        query = self.search_input.text.strip()
+        catalog = self.get_catalog()
+        found = catalog.search(query, self.SEARCH_LIMIT) if query else catalog.sorted_products()
+        edit = self.edit_product
+        rows = [
+            {
+                "name": product["name"],
+                "cost_price": product["cost_price"],
+                "profit": product["profit"],
+                "percent_profit": product["percent_profit"],
+                "on_edit": edit
+            }
+            for product in found
+        ]
+        ListReconciler.sync_data(self.products_view, rows, "name")
+        self.show_status('' if rows else 'НИЧЕГО НЕ НАЙДЕНО')
 
-    def edit_product(self, product: Dict) -> None:
+    def edit_product(self, product_name: str) -> None:
+        product = self.get_catalog().get(product_name)
+        if product is None:
+            return
         app = App.get_running_app()
         app.product_to_edit = product
         self.manager.current = 'edit_product'
@@ -1132,8 +3815,6 @@ class AddProductScreen(BaseScreen):
             pass
 
     def save_product(self, _instance) -> None:
-        profile_data = self.get_profile_data()
-        
         name, error = Validators.validate_non_empty(self.name_input.text, "Название товара")
         if error:
             self.show_popup('ОШИБКА', error)
@@ -1153,34 +3834,12 @@ class AddProductScreen(BaseScreen):
             self.show_popup('ОШИБКА', 'Прибыль не может превышать стоимость')
             return
         
-        existing = [p["name"].lower() for p in profile_data.get("products", [])]
-        if name.lower() in existing:
+        if name in self.get_catalog():
             self.show_popup('ОШИБКА', f'Товар "{name}" уже существует')
             return
         
-        expenses = cost - profit
-        percent_exp = self.business_logic.calculate_percent_expenses(cost, profit)
-        percent_profit = self.business_logic.calculate_percent_profit(cost, profit)
-        
-        product = {
-            "name": name,
-            "cost_price": cost,
-            "profit": profit,
-            "expenses": expenses,
-            "percent_expenses": percent_exp,
-            "percent_profit": percent_profit
-        }
-        
-        profile_data["products"].append(product)
-        
-        if name not in profile_data["stock"]:
-            profile_data["stock"][name] = {
-                "current_quantity": 0.0,
-                "total_value": 0.0,
-                "history": []
-            }
-        
-        self.save_profile_data(profile_data)
+        product = Product.create(name, cost, profit)
+        self.apply_operation({"op": ProfileOperations.PRODUCT_ADD, "product": product.to_dict()})
         
         self.show_popup('УСПЕХ', f'Товар "{name}" успешно добавлен!',
                        callback=lambda: setattr(self.manager, 'current', 'profile'))
@@ -1345,23 +4004,8 @@ class EditProductScreen(BaseScreen):
         )
 
     def delete_product(self) -> None:
-        app = App.get_running_app()
-        profile_data = self.get_profile_data()
         product_name = self.name_input.text.strip()
-        
-        profile_data["products"] = [
-            p for p in profile_data["products"] if p["name"] != product_name
-        ]
-        
-        if product_name in profile_data["stock"]:
-            del profile_data["stock"][product_name]
-        
-        for order in profile_data.get("orders", []):
-            for item in order["items"]:
-                if item["product"] == product_name:
-                    item["product"] = "УДАЛЕННЫЙ ТОВАР"
-        
-        self.save_profile_data(profile_data)
+        self.apply_operation({"op": ProfileOperations.PRODUCT_DELETE, "name": product_name})
         
         self.show_popup(
             'УСПЕХ',
@@ -1371,7 +4015,6 @@ class EditProductScreen(BaseScreen):
 
     def save_product(self, _instance) -> None:
         app = App.get_running_app()
-        profile_data = self.get_profile_data()
         old_name = app.product_to_edit["name"]
         
         new_name, error = Validators.validate_non_empty(self.name_input.text, "Название товара")
@@ -1393,36 +4036,16 @@ class EditProductScreen(BaseScreen):
             self.show_popup('ОШИБКА', 'Прибыль не может превышать стоимость')
             return
         
-        existing = [p["name"].lower() for p in profile_data.get("products", [])
-                    if p["name"].lower() != old_name.lower()]
-        if new_name.lower() in existing:
+        existing = self.get_catalog().get(new_name)
+        if existing is not None and CatalogIndex.key(existing["name"]) != CatalogIndex.key(old_name):
             self.show_popup('ОШИБКА', f'Товар "{new_name}" уже существует')
             return
         
-        expenses = cost - profit
-        percent_exp = self.business_logic.calculate_percent_expenses(cost, profit)
-        percent_profit = self.business_logic.calculate_percent_profit(cost, profit)
-        
-        for product in profile_data["products"]:
-            if product["name"] == old_name:
-                product["name"] = new_name
-                product["cost_price"] = cost
-                product["profit"] = profit
-                product["expenses"] = expenses
-                product["percent_expenses"] = percent_exp
-                product["percent_profit"] = percent_profit
-                break
-        
-        if old_name != new_name:
-            if old_name in profile_data["stock"]:
-                profile_data["stock"][new_name] = profile_data["stock"].pop(old_name)
-            
-            for order in profile_data.get("orders", []):
-                for item in order["items"]:
-                    if item["product"] == old_name:
-                        item["product"] = new_name
-        
-        self.save_profile_data(profile_data)
+        self.apply_operation({
+            "op": ProfileOperations.PRODUCT_EDIT,
+            "old_name": old_name,
+            "product": Product.create(new_name, cost, profit).to_dict()
+        })
         
         self.show_popup(
             'УСПЕХ',
@@ -1434,7 +4057,10 @@ class WarehouseScreen(BaseScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.stats_label = None
-        self.warehouse_list = None
+        self.empty_label = None
+        self.warehouse_view = None
+        # Позиция строки товара в warehouse_view.data — для обновления одной строки
+        self.row_index: Dict[str, int] = {}
         self.build_ui()
 
     def build_ui(self) -> None:
@@ -1454,11 +4080,22 @@ class WarehouseScreen(BaseScreen):
         self.stats_label.bind(size=self.stats_label.setter('text_size'))
         layout.add_widget(self.stats_label)
         
-        scroll = ScrollView(size_hint_y=0.62)
-        self.warehouse_list = GridLayout(cols=1, spacing=dp(12), size_hint_y=None, padding=[0, dp(5)])
-        self.warehouse_list.bind(minimum_height=self.warehouse_list.setter('height'))
-        scroll.add_widget(self.warehouse_list)
-        layout.add_widget(scroll)
+        self.empty_label = Label(
+            text='НЕТ ТОВАРОВ В КАТАЛОГЕ',
+            size_hint_y=None,
+            height=0,
+            opacity=0,
+            color=COLORS['TEXT_SECONDARY'],
+            font_size=dp(21),
+            bold=True,
+            halign='center',
+            valign='middle'
+        )
+        self.empty_label.bind(size=self.empty_label.setter('text_size'))
+        layout.add_widget(self.empty_label)
+        
+        self.warehouse_view = UIComponents.create_recycle_list(WarehouseCard, dp(95), size_hint_y=0.62)
+        layout.add_widget(self.warehouse_view)
         
         btn_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(58), spacing=dp(10))
         
@@ -1480,125 +4117,48 @@ class WarehouseScreen(BaseScreen):
     def on_enter(self) -> None:
         self.load_warehouse()
 
-    def load_warehouse(self) -> None:
+    def update_stats(self) -> None:
         profile_data = self.get_profile_data()
         
-        total_value = sum(data["total_value"] for data in profile_data["stock"].values())
-        total_qty = sum(data["current_quantity"] for data in profile_data["stock"].values())
+        totals = ProfileOperations.warehouse_totals(profile_data)
         total_products = len(profile_data.get("products", []))
-        products_with_stock = sum(1 for data in profile_data["stock"].values() if data["current_quantity"] > 0)
         
         self.stats_label.text = (
             f'ВСЕГО ТОВАРОВ: {total_products}\n'
-            f'С ОСТАТКОМ: {products_with_stock}\n'
-            f'ОБЩИЙ ОСТАТОК: {total_qty:.2f} кг\n'
-            f'ОБЩАЯ СТОИМОСТЬ: {total_value:.2f} ₽'
+            f'С ОСТАТКОМ: {totals["with_stock"]}\n'
+            f'ОБЩИЙ ОСТАТОК: {totals["total_quantity"]:.2f} кг\n'
+            f'ОБЩАЯ СТОИМОСТЬ: {totals["total_value"]:.2f} ₽'
         )
-        
-        self.warehouse_list.clear_widgets()
+
+    def load_warehouse(self) -> None:
+        self.update_stats()
+        profile_data = self.get_profile_data()
         products = profile_data.get("products", [])
+        self.empty_label.opacity = 0 if products else 1
+        self.empty_label.height = 0 if products else dp(60)
         
-        if not products:
-            empty_label = Label(
-                text='НЕТ ТОВАРОВ В КАТАЛОГЕ',
-                size_hint_y=None,
-                height=dp(60),
-                color=COLORS['TEXT_SECONDARY'],
-                font_size=dp(21),
-                bold=True,
-                halign='center',
-                valign='middle'
-            )
-            empty_label.bind(size=empty_label.setter('text_size'))
-            self.warehouse_list.add_widget(empty_label)
+        stock = profile_data.get("stock", {})
+        rows = [self._warehouse_row(product["name"], stock) for product in self.get_catalog().sorted_products()]
+        self.row_index = {row["name"]: index for index, row in enumerate(rows)}
+        ListReconciler.sync_data(self.warehouse_view, rows, "name")
+
+    def _warehouse_row(self, product_name: str, stock: Dict) -> Dict:
+        entry = StockEntry.from_dict(stock.get(product_name, ProfileOperations.new_stock_entry()))
+        return {
+            "name": product_name,
+            "quantity": entry.current_quantity,
+            "avg_price": entry.avg_price,
+            "on_edit": self.edit_warehouse_item
+        }
+
+    def update_row(self, product_name: str) -> None:
+        """Обновляет итоги и одну строку склада; остальные карточки не перестраиваются."""
+        index = self.row_index.get(product_name)
+        if index is None:
+            self.load_warehouse()
             return
-        
-        for product in sorted(products, key=lambda x: x["name"]):
-            product_name = product["name"]
-            stock_data = profile_data["stock"].get(product_name, {
-                "current_quantity": 0.0,
-                "total_value": 0.0,
-                "history": []
-            })
-            
-            qty = stock_data["current_quantity"]
-            total_value = stock_data["total_value"]
-            avg_price = total_value / qty if qty > 0 else 0.0
-            
-            card = BoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=dp(95),
-                padding=[dp(12), dp(8)],
-                spacing=dp(12)
-            )
-            
-            info_layout = BoxLayout(orientation='vertical', size_hint_x=0.82, spacing=dp(3))
-            
-            name_label = Label(
-                text=product_name.upper(),
-                font_size=dp(17),
-                bold=True,
-                color=COLORS['YELLOW'],
-                size_hint_y=None,
-                height=dp(28),
-                halign='left',
-                valign='middle'
-            )
-            name_label.bind(size=name_label.setter('text_size'))
-            
-            qty_label = Label(
-                text=f'ОСТАТОК: {qty:.2f} кг',
-                font_size=dp(16),
-                color=COLORS['ACCENT_GREEN'] if qty > 0 else COLORS['ACCENT_RED'],
-                size_hint_y=None,
-                height=dp(28),
-                halign='left',
-                valign='middle'
-            )
-            qty_label.bind(size=qty_label.setter('text_size'))
-            
-            price_label = Label(
-                text=f'СР. ЦЕНА: {avg_price:.2f} ₽/кг',
-                font_size=dp(16),
-                color=COLORS['TEXT_PRIMARY'],
-                size_hint_y=None,
-                height=dp(28),
-                halign='left',
-                valign='middle'
-            )
-            price_label.bind(size=price_label.setter('text_size'))
-            
-            info_layout.add_widget(name_label)
-            info_layout.add_widget(qty_label)
-            info_layout.add_widget(price_label)
-            
-            edit_btn = Button(
-                text='ИЗМЕНИТЬ',
-                size_hint_x=0.18,
-                size_hint_y=None,
-                height=dp(79),
-                background_normal='',
-                background_color=COLORS['YELLOW'],
-                color=COLORS['BACKGROUND'],
-                font_size=dp(14),
-                bold=True
-            )
-            edit_btn.bind(on_press=lambda instance, p=product_name: self.edit_warehouse_item(p))
-            
-            with card.canvas.before:
-                Color(*COLORS['CARD_BG'])
-                card.rect = Rectangle(pos=card.pos, size=card.size)
-            
-            def update_rect(instance, value):
-                instance.rect.pos = instance.pos
-                instance.rect.size = instance.size
-            
-            card.bind(pos=update_rect, size=update_rect)
-            
-            card.add_widget(info_layout)
-            card.add_widget(edit_btn)
-            self.warehouse_list.add_widget(card)
+        self.update_stats()
+        self.warehouse_view.data[index] = self._warehouse_row(product_name, self.get_profile_data()["stock"])
 
     def go_to_add_stock(self, _instance) -> None:
         self.manager.current = 'add_stock'
@@ -1616,219 +4176,59 @@ class WarehouseScreen(BaseScreen):
             if not profile_data.get("products"):
                 self.show_popup('ОШИБКА', 'Нет товаров в каталоге')
                 return
-            
-            content = BoxLayout(orientation='vertical', padding=dp(18), spacing=dp(12))
-            title_label = Label(
-                text='ВЫБЕРИТЕ ТОВАР ДЛЯ КОРРЕКТИРОВКИ',
-                color=COLORS['YELLOW'],
-                font_size=dp(19),
-                bold=True,
-                size_hint_y=None,
-                height=dp(42),
-                halign='center'
-            )
-            content.add_widget(title_label)
-            
-            scroll = ScrollView(size_hint_y=0.72)
-            products_list = GridLayout(cols=1, spacing=dp(8), size_hint_y=None)
-            products_list.bind(minimum_height=products_list.setter('height'))
-            
-            for product in sorted(profile_data["products"], key=lambda x: x["name"]):
-                btn = Button(
-                    text=product["name"].upper(),
-                    size_hint_y=None,
-                    height=dp(50),
-                    background_normal='',
-                    background_color=COLORS['CARD_BG'],
-                    color=COLORS['YELLOW'],
-                    font_size=dp(17),
-                    bold=True
-                )
-                btn.bind(on_press=lambda btn, p=product["name"]: self._open_edit_dialog(p, content.parent))
-                products_list.add_widget(btn)
-            
-            scroll.add_widget(products_list)
-            content.add_widget(scroll)
-            
-            popup = Popup(
-                title='',
-                content=content,
-                size_hint=(Dimensions.POPUP_WIDTH, 0.82),
-                separator_height=0
+            DialogPool.acquire(ProductPickerDialog).show(
+                'ВЫБЕРИТЕ ТОВАР ДЛЯ КОРРЕКТИРОВКИ',
+                self.get_catalog().sorted_names(),
+                self.edit_warehouse_item
             )
-            
-            with popup.canvas.before:
-                Color(*COLORS['CARD_BG'])
-                popup.rect = Rectangle(pos=popup.pos, size=popup.size)
-                popup.bind(pos=lambda inst, val: setattr(inst.rect, 'pos', val))
-                popup.bind(size=lambda inst, val: setattr(inst.rect, 'size', val))
-            
-            popup.open()
             return
         
-        if product_name not in profile_data["stock"]:
-            profile_data["stock"][product_name] = {
-                "current_quantity": 0.0,
-                "total_value": 0.0,
-                "history": []
-            }
-            self.save_profile_data(profile_data)
-        
-        stock_data = profile_data["stock"][product_name]
-        current_qty = stock_data["current_quantity"]
-        current_value = stock_data["total_value"]
-        avg_price = current_value / current_qty if current_qty > 0 else 0.0
-        
-        content = BoxLayout(orientation='vertical', padding=dp(18), spacing=dp(16))
-        title_label = Label(
-            text=f'РЕДАКТИРОВАНИЕ: {product_name.upper()}',
-            color=COLORS['YELLOW'],
-            font_size=dp(19),
-            bold=True,
-            size_hint_y=None,
-            height=dp(42),
-            halign='center'
+        stock = StockEntry.from_dict(profile_data["stock"].get(product_name, ProfileOperations.new_stock_entry()))
+        DialogPool.acquire(StockEditDialog).show(
+            product_name, self.get_catalog().get(product_name), stock, self.save_correction
         )
-        content.add_widget(title_label)
-        
-        product_info = next((p for p in profile_data["products"] if p["name"] == product_name), None)
-        if product_info:
-            percent_exp = self.business_logic.calculate_percent_expenses(
-                product_info['cost_price'], product_info['profit']  
-            )
-            percent_profit = self.business_logic.calculate_percent_profit(
-                product_info['cost_price'], product_info['profit']
-            )
+
+    def save_correction(self, dialog: StockEditDialog) -> None:
+        product_name = dialog.product_name
+        try:
+            new_quantity = float(dialog.qty_input.text.replace(',', '.'))
+            new_avg_price = float(dialog.price_input.text.replace(',', '.'))
             
-            price_info = Label(
-                text=f"ЦЕНА ПРОДАЖИ: {product_info['cost_price']:.2f} ₽/кг\n"
-                     f"ПРИБЫЛЬ: {product_info['profit']:.2f} ₽ ({percent_profit:.1f}%)",
-                color=COLORS['TEXT_HINT'],
-                font_size=dp(15),
-                size_hint_y=None,
-                height=dp(65),
-                halign='center',
-                valign='middle'
-            )
-            content.add_widget(price_info)
-        
-        qty_layout = BoxLayout(orientation='vertical', size_hint_y=None, height=dp(85))
-        qty_layout.add_widget(Label(
-            text='ОСТАТОК (кг):',
-            color=COLORS['YELLOW'],
-            font_size=dp(17),
-            bold=True,
-            size_hint_y=None,
-            height=dp(32),
-            halign='left'
-        ))
-        
-        self.qty_input = UIComponents.create_input_field(text=f'{current_qty:.2f}')
-        qty_layout.add_widget(self.qty_input)
-        content.add_widget(qty_layout)
-        
-        price_layout = BoxLayout(orientation='vertical', size_hint_y=None, height=dp(85))
-        price_layout.add_widget(Label(
-            text='СРЕДНЯЯ ЦЕНА ЗАКУПКИ (₽/кг):',
-            color=COLORS['YELLOW'],
-            font_size=dp(17),
-            bold=True,
-            size_hint_y=None,
-            height=dp(32),
-            halign='left'
-        ))
-        
-        self.price_input = UIComponents.create_input_field(text=f'{avg_price:.2f}')
-        price_layout.add_widget(self.price_input)
-        content.add_widget(price_layout)
-        
-        calc_label = Label(
-            text=f'ТЕКУЩАЯ СТОИМОСТЬ ОСТАТКА: {current_value:.2f} ₽',
-            color=COLORS['TEXT_HINT'],
-            font_size=dp(15),
-            size_hint_y=None,
-            height=dp(38),
-            halign='center',
-            valign='middle'
-        )
-        content.add_widget(calc_label)
-        
-        buttons_layout = BoxLayout(spacing=dp(16), size_hint_y=None, height=dp(65))
-        
-        cancel_btn = UIComponents.create_secondary_button('ОТМЕНА', height=dp(60), color=COLORS['ACCENT_RED'])
-        save_btn = UIComponents.create_primary_button('СОХРАНИТЬ', height=dp(60))
-        
-        popup = Popup(
-            title='',
-            content=content,
-            size_hint=(Dimensions.POPUP_WIDTH, 0.85),
-            separator_height=0
-        )
-        
-        with popup.canvas.before:
-            Color(*COLORS['CARD_BG'])
-            popup.rect = Rectangle(pos=popup.pos, size=popup.size)
-            popup.bind(pos=lambda inst, val: setattr(inst.rect, 'pos', val))
-            popup.bind(size=lambda inst, val: setattr(inst.rect, 'size', val))
-        
-        def cancel(_instance):
-            popup.dismiss()
-        
-        def save(_instance):
-            try:
-                new_quantity = float(self.qty_input.text.replace(',', '.'))
-                new_avg_price = float(self.price_input.text.replace(',', '.'))
-                
-                if new_quantity < 0:
-                    self.show_popup('ОШИБКА', 'Остаток не может быть отрицательным!')
-                    return
-                
-                if new_avg_price < 0:
-                    self.show_popup('ОШИБКА', 'Цена закупки не может быть отрицательной!')
-                    return
-                
-                old_quantity = stock_data["current_quantity"]
-                old_total_value = stock_data["total_value"]
-                
-                stock_data["current_quantity"] = new_quantity
-                stock_data["total_value"] = new_quantity * new_avg_price
-                
-                operation_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                stock_data["history"].append({
-                    "date": operation_time,
-                    "quantity": new_quantity - old_quantity,
-                    "price_per_kg": new_avg_price,
-                    "operation": "корректировка",
-                    "total_amount": new_quantity * new_avg_price,
-                    "balance_after": new_quantity
-                })
-                
-                self.save_profile_data(profile_data)
-                popup.dismiss()
-                self.load_warehouse()
-                self.show_popup('УСПЕХ', f'Товар "{product_name}" успешно скорректирован!')
+            if new_quantity < 0:
+                self.show_popup('ОШИБКА', 'Остаток не может быть отрицательным!')
+                return
             
-            except ValueError:
-                self.show_popup('ОШИБКА', 'Введите корректные числовые значения!')
-        
-        cancel_btn.bind(on_press=cancel)
-        save_btn.bind(on_press=save)
+            if new_avg_price < 0:
+                self.show_popup('ОШИБКА', 'Цена закупки не может быть отрицательной!')
+                return
+            
+            self.apply_operation({
+                "op": ProfileOperations.STOCK_CORRECTION,
+                "product": product_name,
+                "quantity": new_quantity,
+                "price_per_kg": new_avg_price,
+                "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+            dialog.dismiss()
+            self.update_row(product_name)
+            self.show_popup('УСПЕХ', f'Товар "{product_name}" успешно скорректирован!')
         
-        buttons_layout.add_widget(cancel_btn)
-        buttons_layout.add_widget(save_btn)
-        content.add_widget(buttons_layout)
-        popup.open()
-
-    def _open_edit_dialog(self, product_name: str, popup: Popup) -> None:
-        popup.dismiss()
-        self.edit_warehouse_item(product_name)
+        except ValueError:
+            self.show_popup('ОШИБКА', 'Введите корректные числовые значения!')
 
 class AddStockScreen(BaseScreen):
+    # Сколько товаров показывать в списке выбора
+    SEARCH_LIMIT = 50
+    # За сколько последних дней показывать закупки выбранного товара
+    PURCHASES_DAYS = 30
+    INFO_TEXT = 'Цена закупки используется для расчёта стоимости запасов'
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.product_btn = None
         self.qty_input = None
         self.price_input = None
+        self.info_label = None
         self.build_ui()
 
     def build_ui(self) -> None:
@@ -1877,10 +4277,10 @@ class AddStockScreen(BaseScreen):
         
         with self.product_btn.canvas.after:
             Color(*COLORS['BORDER'])
-            self.product_btn.border = Line(rectangle=(self.product_btn.x, self.product_btn.y, self.product_btn.width, self.product_btn.height), width=1.5)
+            self.product_btn.border_line = Line(rectangle=(self.product_btn.x, self.product_btn.y, self.product_btn.width, self.product_btn.height), width=1.5)
         
         def update_border(instance, value):
-            instance.border.rectangle = (instance.x, instance.y, instance.width, instance.height)
+            instance.border_line.rectangle = (instance.x, instance.y, instance.width, instance.height)
         
         self.product_btn.bind(pos=update_border, size=update_border)
         
@@ -1912,8 +4312,8 @@ class AddStockScreen(BaseScreen):
         self.price_input = UIComponents.create_input_field('100.00')
         form_layout.add_widget(self.price_input)
         
-        info_label = Label(
-            text='Цена закупки используется для расчёта стоимости запасов',
+        self.info_label = Label(
+            text=self.INFO_TEXT,
             color=COLORS['TEXT_HINT'],
             font_size=dp(15),
             italic=True,
@@ -1922,8 +4322,8 @@ class AddStockScreen(BaseScreen):
             halign='center',
             valign='middle'
         )
-        info_label.bind(size=info_label.setter('text_size'))
-        form_layout.add_widget(info_label)
+        self.info_label.bind(size=self.info_label.setter('text_size'))
+        form_layout.add_widget(self.info_label)
         
         layout.add_widget(form_layout)
         
@@ -1938,42 +4338,69 @@ class AddStockScreen(BaseScreen):
         self.qty_input.text = '1.0'
         self.price_input.text = '100.00'
         self.product_btn.color = COLORS['TEXT_HINT']
+        self.info_label.text = self.INFO_TEXT
 
     def show_product_dropdown(self, _instance) -> None:
-        profile_data = self.get_profile_data()
-        products = [p["name"] for p in profile_data.get("products", [])]
         
-        if not products:
+        catalog = self.get_catalog()
+        if not len(catalog):
             self.show_popup('ОШИБКА', 'Нет товаров в каталоге')
             return
         
         dropdown = DropDown()
-        for product in products:
-            btn = Button(
-                text=product.upper(),
-                size_hint_y=None,
-                height=dp(48),
-                background_normal='',
-                background_color=COLORS['CARD_BG'],
-                color=COLORS['YELLOW'],
-                font_size=dp(17),
-                bold=True
-            )
-            btn.bind(on_release=lambda btn, p=product: self.select_product(p, dropdown))
-            dropdown.add_widget(btn)
+        search_input = UIComponents.create_input_field('ПОИСК ТОВАРА')
+        dropdown.add_widget(search_input)
+        buttons: List[Button] = []
+        
+        def fill(_instance=None, query: str = '') -> None:
+            for btn in buttons:
+                dropdown.remove_widget(btn)
+            buttons.clear()
+            for product in catalog.search(query, self.SEARCH_LIMIT):
+                btn = Button(
+                    text=product["name"].upper(),
+                    size_hint_y=None,
+                    height=dp(48),
+                    background_normal='',
+                    background_color=COLORS['CARD_BG'],
+                    color=COLORS['YELLOW'],
+                    font_size=dp(17),
+                    bold=True
+                )
+                btn.bind(on_release=lambda btn, p=product["name"]: self.select_product(p, dropdown))
+                dropdown.add_widget(btn)
+                buttons.append(btn)
         
+        search_input.bind(text=fill)
+        fill()
         dropdown.open(self.product_btn)
 
     def select_product(self, product_name: str, dropdown: DropDown) -> None:
         self.product_btn.text = product_name.upper()
         self.product_btn.color = COLORS['YELLOW']
         dropdown.dismiss()
+        self.show_purchases(product_name)
+
+    def show_purchases(self, product_name: str) -> None:
+        """Подставляет цену последней закупки товара и показывает закупки за PURCHASES_DAYS дней."""
+        columns = self.data_manager.get_history_columns(self.get_current_profile(), product_name)
+        last = columns.last("пополнение")
+        if last is None:
+            self.info_label.text = self.INFO_TEXT
+            return
+        self.price_input.text = f'{last.price_per_kg:.2f}'
+        since = (datetime.now() - timedelta(days=self.PURCHASES_DAYS)).strftime("%Y-%m-%d %H:%M:%S")
+        kg = columns.total("quantity", since, operation="пополнение")
+        amount = columns.total("total_amount", since, operation="пополнение")
+        self.info_label.text = f'За {self.PURCHASES_DAYS} дней закуплено {kg:.2f} кг на {amount:.2f} ₽'
 
     def save_to_stock(self, _instance) -> None:
-        product_name = self.product_btn.text
-        if product_name == 'ВЫБЕРИТЕ ТОВАР':
+        # На кнопке имя в верхнем регистре — настоящее имя товара берём из индекса
+        product = self.get_catalog().get(self.product_btn.text)
+        if product is None:
             self.show_popup('ОШИБКА', 'Выберите товар!')
             return
+        product_name = product["name"]
         
         qty, error = Validators.validate_positive_float(self.qty_input.text, "Количество")
         if error:
@@ -1985,34 +4412,14 @@ class AddStockScreen(BaseScreen):
             self.show_popup('ОШИБКА', error)
             return
         
-        profile_data = self.get_profile_data()
-        
-        if product_name not in profile_data["stock"]:
-            profile_data["stock"][product_name] = {
-                "current_quantity": 0.0,
-                "total_value": 0.0,
-                "history": []
-            }
-        
-        stock_data = profile_data["stock"][product_name]
-        previous_quantity = stock_data["current_quantity"]
-        previous_value = stock_data["total_value"]
-        
-        stock_data["current_quantity"] += qty
-        stock_data["total_value"] += qty * price
-        
-        operation_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        stock_data["history"].append({
-            "date": operation_time,
+        self.apply_operation({
+            "op": ProfileOperations.STOCK_RECEIPT,
+            "product": product_name,
             "quantity": qty,
             "price_per_kg": price,
-            "operation": "пополнение",
-            "total_amount": qty * price,
-            "balance_after": stock_data["current_quantity"]
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         })
         
-        self.save_profile_data(profile_data)
-        
         self.show_popup(
             'УСПЕХ',
             f'На склад добавлено {qty:.2f} кг товара "{product_name}"\n'
@@ -2022,32 +4429,97 @@ class AddStockScreen(BaseScreen):
 
 # Основной класс приложения
 class OrderApp(App):
+    # 'json' — файлы профилей с журналом, 'sqlite' — база profiles.db
+    storage_backend = 'json'
+    # Формат снимков профилей: 'json', 'json-pretty' или 'pickle'
+    snapshot_format = 'json'
+    # История склада старше стольких дней уходит в помесячные архивы (None — не архивировать)
+    history_horizon_days = 90
+    # Экраны создаются при первом переходе на них; False — все в build(), как раньше
+    lazy_screens = True
+    SCREENS = {
+        'home': HomeScreen,
+        'profile': ProfileScreen,
+        'products': ProductsScreen,
+        'add_product': AddProductScreen,
+        'edit_product': EditProductScreen,
+        'warehouse': WarehouseScreen,
+        'add_stock': AddStockScreen,
+    }
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.current_profile: Optional[str] = None
         self.profile_data: Dict = {}
         self.product_to_edit: Optional[Dict] = None
-        self.data_manager = DataManager()
+        # Хранилище читает манифест и переносит старые данные — это делается в фоне после первого кадра
+        self.data_manager: Optional[DataManager] = None
+        self._loader: Optional[threading.Thread] = None
+        self._created_manager: Optional[DataManager] = None
         self.business_logic = BusinessLogic()
 
+    def create_data_manager(self) -> DataManager:
+        """Создаёт хранилище в фоновом потоке. Оно запоминается сразу, чтобы on_stop закрыл его
+        и тогда, когда приложение завершается раньше, чем сработает data_loaded()."""
+        manager_class = SQLiteDataManager if self.storage_backend == 'sqlite' else DataManager
+        self._created_manager = manager_class(serializer=self.snapshot_format,
+                                              history_horizon_days=self.history_horizon_days)
+        return self._created_manager
+
+    def run_in_background(self, work: Callable, done: Callable, failed: Optional[Callable] = None) -> threading.Thread:
+        """Выполняет work() в фоновом потоке; done(result) или failed(error) вызываются в главном потоке."""
+        def target():
+            try:
+                result = work()
+            except Exception as e:
+                if failed is None:
+                    print(f"[!] Ошибка фоновой загрузки: {e}")
+                else:
+                    Clock.schedule_once(lambda _dt, error=e: failed(error))
+                return
+            Clock.schedule_once(lambda _dt: done(result))
+        
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+    def data_loaded(self, data_manager: DataManager) -> None:
+        self.data_manager = data_manager
+        self.root.get_screen('home').load_profiles()
+
+    def data_load_failed(self, error: Exception) -> None:
+        self.root.get_screen('home').show_status('ОШИБКА ЗАГРУЗКИ', str(error))
+
     def build(self) -> ScreenManager:
         Window.clearcolor = COLORS['BACKGROUND']
         
-        sm = ScreenManager()
-        sm.add_widget(HomeScreen(name='home'))
-        sm.add_widget(ProfileScreen(name='profile'))
-        sm.add_widget(ProductsScreen(name='products'))
-        sm.add_widget(AddProductScreen(name='add_product'))
-        sm.add_widget(EditProductScreen(name='edit_product'))
-        sm.add_widget(WarehouseScreen(name='warehouse'))
-        sm.add_widget(AddStockScreen(name='add_stock'))
+        sm = LazyScreenManager()
+        for name, screen_class in self.SCREENS.items():
+            if self.lazy_screens:
+                sm.register(name, screen_class)
+            else:
+                sm.add_widget(screen_class(name=name))
         # Остальные экраны можно добавить по мере необходимости
+        sm.current = 'home'
         return sm
 
     def on_start(self):
         """Инициализация при запуске приложения."""
+        self._loader = self.run_in_background(self.create_data_manager, self.data_loaded, self.data_load_failed)
         self.request_android_permissions()
 
+    def on_pause(self) -> bool:
+        """Android может завершить приложение в паузе — дописываем отложенные сохранения."""
+        if self.data_manager is not None:
+            self.data_manager.flush()
+        return True
+
+    def on_stop(self) -> None:
+        if self._loader is not None:
+            self._loader.join()
+        if self._created_manager is not None:
+            self._created_manager.close()
+
     def request_android_permissions(self) -> None:
         """Запрос разрешений для Android (если доступно)."""
         try:
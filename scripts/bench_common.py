@@ -0,0 +1,67 @@
+"""
+Общие части скриптов замеров: синтетический профиль и лучшее время из нескольких запусков.
+
+Модуль импортируется скриптами из каталога scripts и сам ничего не замеряет.
+"""
+import random
+import time
+from typing import Callable, Optional
+
+REPEATS = 5
+
+
+def make_profile(products_count: int, orders_count: int = 0, seed: int = 1) -> dict:
+    """Синтетический профиль в формате DataManager: каталог, склад и заказы."""
+    rnd = random.Random(seed)
+    products = []
+    stock = {}
+    for i in range(products_count):
+        name = f"Товар {i:05d}"
+        cost = round(rnd.uniform(50, 2000), 2)
+        profit = round(cost * rnd.uniform(0.05, 0.4), 2)
+        products.append({
+            "name": name,
+            "cost_price": cost,
+            "profit": profit,
+            "expenses": cost - profit,
+            "percent_expenses": (cost - profit) / cost * 100,
+            "percent_profit": profit / cost * 100
+        })
+        qty = round(rnd.uniform(0, 500), 2)
+        stock[name] = {"current_quantity": qty, "total_value": qty * cost * 0.7}
+
+    orders = []
+    for number in range(1, orders_count + 1):
+        items = [
+            {
+                "product": products[rnd.randrange(products_count)]["name"],
+                "quantity": round(rnd.uniform(0.5, 10), 2),
+                "price": round(rnd.uniform(50, 2000), 2)
+            }
+            for _ in range(rnd.randint(1, 5))
+        ]
+        orders.append({
+            "number": number,
+            "date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} 12:00:00",
+            "items": items
+        })
+
+    return {
+        "products": products,
+        "stock": stock,
+        "orders": orders,
+        "daily_stats": {},
+        "next_order_number": orders_count + 1
+    }
+
+
+def best_of(func: Callable, repeats: int = REPEATS, settle: Optional[Callable] = None) -> float:
+    """Лучшее время func() из repeats запусков; settle() (например, кадр Kivy) входит в замер."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        if settle is not None:
+            settle()
+        best = min(best, time.perf_counter() - start)
+    return best
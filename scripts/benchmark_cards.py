@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Стоимость одной карточки товара: прежняя сборка в коде (BoxLayout, три Label
+с привязками text_size, Button, Rectangle и замыкание update_rect на каждую
+карточку) против ProductCard с общим kv-правилом <InfoCard>.
+
+Измеряются время создания и заполнения карточки, память, которую удерживают
+созданные карточки, и время, за которое RecycleView переносит в уже созданную
+карточку другую строку (так список показывает товары при прокрутке). Прежний
+список на каждую строку строил новую карточку.
+
+Каждый замер идёт в отдельном процессе: в одном процессе все созданные ранее
+виджеты замедляют следующие, и вариант, измеренный вторым, проигрывал бы.
+
+Запуск из корня репозитория (нужно окно Kivy):
+    python scripts/benchmark_cards.py
+"""
+import os
+import sys
+import gc
+import json
+import subprocess
+import time
+import tracemalloc
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.uix.boxlayout import BoxLayout  # noqa: E402
+from kivy.uix.button import Button  # noqa: E402
+from kivy.uix.label import Label  # noqa: E402
+from kivy.graphics import Color, Rectangle  # noqa: E402
+from kivy.metrics import dp  # noqa: E402
+
+from main import COLORS, ProductCard  # noqa: E402
+
+CARDS = 500
+RUNS = 5
+
+
+def make_row(i: int) -> dict:
+    cost = 100.0 + i
+    profit = cost * 0.2
+    return {"name": f"Товар {i:05d}", "cost_price": cost, "profit": profit, "percent_profit": 20.0}
+
+
+def legacy_card(row: dict) -> BoxLayout:
+    """Карточка в том виде, в каком её собирал ProductsScreen.load_products до RecycleView."""
+    card = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(100),
+                     padding=[dp(12), dp(8)], spacing=dp(12))
+    info_layout = BoxLayout(orientation='vertical', size_hint_x=0.82, spacing=dp(4))
+    for text, font_size, color, height, bold in (
+        (f'НАЗВАНИЕ: {row["name"]}', dp(18), COLORS['YELLOW'], dp(30), True),
+        (f'ЦЕНА: {row["cost_price"]:.2f} ₽/кг', dp(16), COLORS['TEXT_PRIMARY'], dp(28), False),
+        (f'ПРИБЫЛЬ: {row["profit"]:.2f} ₽ ({row["percent_profit"]:.1f}%)',
+         dp(16), COLORS['ACCENT_GREEN'], dp(28), False),
+    ):
+        label = Label(text=text, font_size=font_size, bold=bold, color=color, size_hint_y=None,
+                      height=height, halign='left', valign='middle')
+        label.bind(size=label.setter('text_size'))
+        info_layout.add_widget(label)
+    edit_btn = Button(text='РЕДАКТИРОВАТЬ', size_hint_x=0.18, size_hint_y=None, height=dp(84),
+                      background_normal='', background_color=COLORS['YELLOW'], color=COLORS['BACKGROUND'],
+                      font_size=dp(14), bold=True)
+    edit_btn.bind(on_press=lambda instance, p=row["name"]: None)
+
+    with card.canvas.before:
+        Color(*COLORS['CARD_BG'])
+        card.rect = Rectangle(pos=card.pos, size=card.size)
+
+    def update_rect(instance, value):
+        instance.rect.pos = instance.pos
+        instance.rect.size = instance.size
+
+    card.bind(pos=update_rect, size=update_rect)
+    card.add_widget(info_layout)
+    card.add_widget(edit_btn)
+    return card
+
+
+def kv_card(row: dict):
+    card = ProductCard()
+    card.refresh_view_attrs(None, 0, dict(row, on_edit=None))
+    return card
+
+
+VARIANTS = {"legacy": ("код (до изменений)", legacy_card), "kv": ("kv-правило InfoCard", kv_card)}
+
+
+def measure(build, rows) -> dict:
+    """Секунд и байт на карточку для build(row), секунд на перенос строки в созданную карточку."""
+    card = build(rows[0])
+    gc.collect()
+    start = time.perf_counter()
+    cards = [build(row) for row in rows]
+    elapsed = time.perf_counter() - start
+    del cards
+    gc.collect()
+    tracemalloc.start()
+    cards = [build(row) for row in rows]
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cards
+    result = {"time": elapsed / len(rows), "bytes": size / len(rows)}
+    if hasattr(card, "refresh_view_attrs"):
+        start = time.perf_counter()
+        for row in rows:
+            card.refresh_view_attrs(None, 0, dict(row, on_edit=None))
+        result["rebind"] = (time.perf_counter() - start) / len(rows)
+    return result
+
+
+def run_variant(name: str) -> None:
+    rows = [make_row(i) for i in range(CARDS)]
+    print(json.dumps(measure(VARIANTS[name][1], rows)))
+
+
+def launch(name: str) -> dict:
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", name],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmark() -> None:
+    print(f"📊 Карточка товара ({CARDS} карточек, лучшее из {RUNS} процессов)")
+    print(f"   {'вариант':<22} {'мкс/карточка':>13} {'КБ/карточка':>12}")
+    runs = {name: [] for name in VARIANTS}
+    for _ in range(RUNS):
+        for name in VARIANTS:
+            runs[name].append(launch(name))
+    best = {name: min(results, key=lambda r: r["time"]) for name, results in runs.items()}
+    for name, (label, _build) in VARIANTS.items():
+        print(f"   {label:<22} {best[name]['time'] * 1e6:>13.0f} {best[name]['bytes'] / 1024:>12.1f}")
+    old, new = best["legacy"], best["kv"]
+    print(f"\n   kv-правило от прежнего: время {new['time'] / old['time'] * 100:.0f}%, "
+          f"память {new['bytes'] / old['bytes'] * 100:.0f}%")
+    rebind = min(r["rebind"] for r in runs["kv"])
+    print(f"   новая строка в созданной карточке: {rebind * 1e6:.0f} мкс "
+          f"({rebind / old['time'] * 100:.1f}% от сборки прежней карточки)")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == "--run":
+        run_variant(sys.argv[2])
+    else:
+        run_benchmark()
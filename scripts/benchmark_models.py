@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Сравнение памяти: записи в виде словарей и в виде моделей со __slots__
+(Product, StockEntry, HistoryRecord из main.py).
+
+Данные читаются так же, как в приложении — по строке JSON на запись,
+после чего измеряется память, которую удерживает получившийся список.
+
+Запуск из корня репозитория:
+    python scripts/benchmark_models.py
+"""
+import os
+import sys
+import gc
+import json
+import random
+import tracemalloc
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import HistoryRecord, Product, StockEntry  # noqa: E402
+
+COUNTS = {
+    HistoryRecord: 50000,
+    Product: 5000,
+    StockEntry: 5000,
+}
+
+
+def make_lines(model, count: int, seed: int = 1) -> list:
+    """Строки JSON в формате файлов данных."""
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(count):
+        if model is HistoryRecord:
+            qty = round(rnd.uniform(0.5, 50), 2)
+            price = round(rnd.uniform(50, 2000), 2)
+            record = HistoryRecord(
+                f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} 12:00:00",
+                qty, price, rnd.choice(["пополнение", "корректировка"]),
+                qty * price, round(rnd.uniform(0, 500), 2)
+            )
+        elif model is Product:
+            record = Product.create(f"Товар {i:05d}", round(rnd.uniform(50, 2000), 2), round(rnd.uniform(5, 40), 2))
+        else:
+            qty = round(rnd.uniform(0, 500), 2)
+            record = StockEntry(qty, qty * rnd.uniform(50, 2000))
+        lines.append(json.dumps(record.to_dict(), ensure_ascii=False))
+    return lines
+
+
+def measure(build) -> int:
+    """Память (байт), удерживаемая результатом build()."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def run_benchmark() -> None:
+    print("📊 Память: словари против моделей со __slots__")
+    print(f"   {'модель':<14} {'записей':>8} {'dict, КБ':>10} {'slots, КБ':>10} {'байт/запись':>16} {'экономия':>9}")
+    for model, count in COUNTS.items():
+        lines = make_lines(model, count)
+        as_dicts = measure(lambda: [json.loads(line) for line in lines])
+        as_models = measure(lambda: [model.from_dict(json.loads(line)) for line in lines])
+        per_record = f"{as_dicts / count:.0f} → {as_models / count:.0f}"
+        saving = (1 - as_models / as_dicts) * 100
+        print(f"   {model.__name__:<14} {count:>8} {as_dicts / 1024:>10.0f} {as_models / 1024:>10.0f} "
+              f"{per_record:>16} {saving:>8.0f}%")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Сравнение форматов снимков профиля (json, json-pretty, pickle):
+время сохранения и загрузки через DataManager на синтетических профилях.
+
+Запуск из корня репозитория:
+    python scripts/benchmark_serializers.py
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_common import REPEATS, best_of, make_profile  # noqa: E402
+from main import DataManager, Serializers  # noqa: E402
+
+SIZES = [
+    ("малый", 100, 500),
+    ("средний", 1000, 5000),
+    ("большой", 5000, 20000),
+]
+
+
+def run_benchmark() -> None:
+    print("📊 Форматы снимков профиля (лучшее из {} запусков)".format(REPEATS))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, products_count, orders_count in SIZES:
+            data = make_profile(products_count, orders_count)
+            print(f"\n{label}: {products_count} товаров, {orders_count} заказов")
+            print(f"   {'формат':<12} {'размер, КБ':>11} {'запись, мс':>11} {'чтение, мс':>11}")
+            for name in Serializers.REGISTRY:
+                manager = DataManager(data_dir=os.path.join(tmp_dir, name), serializer=name)
+                manager._backups = None
+                path = os.path.join(manager.profiles_dir, f"bench_{label}.json")
+                save_time = best_of(lambda: manager._save_safe(data, path))
+                load_time = best_of(lambda: manager._load_safe(path))
+                assert manager._load_safe(path) == data
+                size_kb = os.path.getsize(path) / 1024
+                print(f"   {name:<12} {size_kb:>11.1f} {save_time * 1000:>11.1f} {load_time * 1000:>11.1f}")
+                manager.close()
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Время от запуска процесса до первого кадра: исходная версия приложения
+(коммит baseline) против текущего main.py.
+
+Каждая версия запускается несколько раз в отдельном процессе, чтобы импорты
+и чтение данных каждый раз шли с холодного старта. Данные — синтетические
+профили в исходном формате (profiles.json); первый запуск каждой версии
+не учитывается — в нём текущая версия переносит данные в свой формат.
+
+В исходной версии перед замером исправляется только падение при построении
+экранов (Line в свойстве border), иначе она не доходит до первого кадра.
+
+Запуск из корня репозитория (нужны окно Kivy и git):
+    python scripts/benchmark_startup.py
+"""
+import os
+import sys
+import json
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_common import make_profile  # noqa: E402
+
+BASELINE = "baseline"
+PROFILES = 20
+PRODUCTS = 50
+RUNS = 10
+
+
+def run_app(source_dir: str, data_dir: str) -> None:
+    """Запускает OrderApp из source_dir, печатает время первого кадра и сразу завершается."""
+    sys.path.insert(0, source_dir)
+    from kivy.core.window import Window
+    from main import OrderApp
+
+    class StartupApp(OrderApp):
+        @property
+        def user_data_dir(self):
+            return data_dir
+
+        def on_start(self):
+            super().on_start()
+            Window.bind(on_flip=self.first_frame)
+
+        def first_frame(self, *_args) -> None:
+            Window.unbind(on_flip=self.first_frame)
+            print(f"[t] first frame at={time.time():.3f}")
+            self.stop()
+
+    StartupApp().run()
+
+
+def baseline_commit() -> str:
+    output = subprocess.run(["git", "log", "--format=%H %s"], cwd=ROOT, capture_output=True, text=True).stdout
+    return next(line.split()[0] for line in output.splitlines() if line.split()[1] == BASELINE)
+
+
+def prepare_data(data_dir: str) -> None:
+    """Профили в исходном формате: один profiles.json, история внутри остатков."""
+    profiles = {}
+    for number in range(PROFILES):
+        data = make_profile(PRODUCTS, seed=number)
+        for entry in data["stock"].values():
+            entry["history"] = []
+        profiles[f"Профиль {number:02d}"] = data
+    os.makedirs(data_dir)
+    with open(os.path.join(data_dir, "profiles.json"), "w", encoding="utf-8") as f:
+        json.dump(profiles, f, ensure_ascii=False)
+
+
+def launch(source_dir: str, data_dir: str) -> float:
+    """Миллисекунды от запуска процесса до первого кадра (None, если отчёта нет)."""
+    launched = time.time()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run", source_dir, data_dir],
+        cwd=ROOT, capture_output=True, text=True
+    ).stdout
+    match = re.search(r"\[t\] first frame at=([\d.]+)", output)
+    return None if match is None else (float(match.group(1)) - launched) * 1000
+
+
+def run_benchmark() -> None:
+    print(f"📊 Время до первого кадра (лучшее и медиана из {RUNS} запусков, {PROFILES} профилей)")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        baseline_dir = os.path.join(tmp_dir, "baseline")
+        os.makedirs(baseline_dir)
+        source = subprocess.run(["git", "show", f"{baseline_commit()}:main.py"],
+                                cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        # Исходная версия падает в build(): Line присваивается свойству border кнопок и полей.
+        # Без этой правки её первый кадр не измерить
+        source = source.replace(".border = Line(", ".border_line = Line(")
+        source = source.replace(".border.rectangle", ".border_line.rectangle")
+        with open(os.path.join(baseline_dir, "main.py"), "w", encoding="utf-8") as f:
+            f.write(source)
+        data_dir = os.path.join(tmp_dir, "data")
+        prepare_data(data_dir)
+
+        for label, source_dir in (("baseline", baseline_dir), ("текущая", ROOT)):
+            run_dir = os.path.join(tmp_dir, f"data-{label}")
+            shutil.copytree(data_dir, run_dir)
+            launch(source_dir, run_dir)
+            times = sorted(t for t in (launch(source_dir, run_dir) for _ in range(RUNS)) if t is not None)
+            if not times:
+                print(f"   {label:<10} нет отчёта — приложение не запустилось")
+                continue
+            print(f"   {label:<10} лучшее: {times[0]:.0f} мс, медиана: {times[len(times) // 2]:.0f} мс")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run_app(sys.argv[2], sys.argv[3])
+    else:
+        run_benchmark()
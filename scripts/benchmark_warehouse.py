@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Экран склада на RecycleView: время входа на экран и обновления одной строки
+после корректировки остатка при 100, 1 000 и 10 000 товаров.
+
+Для сравнения выводится и полная перезагрузка списка (load_warehouse),
+которую раньше вызывала каждая корректировка.
+
+Запуск из корня репозитория (нужно окно Kivy):
+    python scripts/benchmark_warehouse.py
+"""
+import os
+import sys
+import random
+import tempfile
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.app import App  # noqa: E402
+from kivy.base import EventLoop  # noqa: E402
+from kivy.core.window import Window  # noqa: E402
+from kivy.uix.screenmanager import ScreenManager  # noqa: E402
+
+from bench_common import REPEATS, best_of, make_profile  # noqa: E402
+from main import BusinessLogic, DataManager, ProfileOperations, WarehouseScreen  # noqa: E402
+
+SIZES = [100, 1000, 10000]
+PROFILE = "bench"
+
+
+class BenchmarkApp(App):
+    """Минимальное приложение: экраны берут data_manager и профиль из App.get_running_app()."""
+
+    def __init__(self, data_dir: str, **kwargs):
+        super().__init__(**kwargs)
+        self.current_profile = PROFILE
+        self.data_manager = DataManager(data_dir=data_dir)
+        self.business_logic = BusinessLogic()
+
+
+def frame_time(func) -> float:
+    """Лучшее время func() вместе с кадром, в котором RecycleView применяет изменения."""
+    return best_of(func, settle=EventLoop.idle)
+
+
+def run_benchmark() -> None:
+    print("📊 Склад на RecycleView (лучшее из {} запусков)".format(REPEATS))
+    print(f"   {'товаров':>8} {'вход, мс':>10} {'полная перезагрузка, мс':>24} {'одна строка, мс':>16} {'карточек':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = BenchmarkApp(os.path.join(tmp_dir, "data"))
+        App._running_app = app
+        EventLoop.ensure_window()
+        for count in SIZES:
+            app.data_manager.update_profile_data(PROFILE, make_profile(count))
+            manager = ScreenManager()
+            screen = WarehouseScreen(name="warehouse")
+            manager.add_widget(screen)
+            Window.add_widget(manager)
+            EventLoop.idle()
+
+            product_name = f"Товар {count // 2:05d}"
+            rnd = random.Random(count)
+
+            def correct():
+                screen.apply_operation({
+                    "op": ProfileOperations.STOCK_CORRECTION,
+                    "product": product_name,
+                    "quantity": round(rnd.uniform(0, 500), 2),
+                    "price_per_kg": round(rnd.uniform(50, 2000), 2),
+                    "date": "2026-01-15 12:00:00"
+                })
+
+            enter_time = frame_time(screen.on_enter)
+            reload_time = frame_time(lambda: (correct(), screen.load_warehouse()))
+            row_time = frame_time(lambda: (correct(), screen.update_row(product_name)))
+            cards = len(screen.warehouse_view.layout_manager.children)
+            print(f"   {count:>8} {enter_time * 1000:>10.1f} {reload_time * 1000:>24.1f} "
+                  f"{row_time * 1000:>16.1f} {cards:>9}")
+
+            Window.remove_widget(manager)
+            app.data_manager.delete_profile(PROFILE)
+        app.data_manager.close()
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -29,7 +29,7 @@ def update_buildozer_spec():
     )
     
     # Обновление требований
-    requirements = 'python3,kivy==2.2.1,requests,android,pillow'
+    requirements = 'python3,kivy==2.2.1,requests,android,pillow,sqlite3'
     content = re.sub(
         r'requirements\s*=\s*.*',
         f'requirements = {requirements}',
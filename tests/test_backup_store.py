@@ -0,0 +1,75 @@
+"""
+Резервные копии: одинаковое содержимое хранится один раз, старые копии вытесняются.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import BackupStore  # noqa: E402
+
+
+def objects(store: BackupStore) -> list:
+    return sorted(os.listdir(store.objects_dir))
+
+
+def test_same_content_is_stored_once(tmp_path):
+    store = BackupStore(str(tmp_path))
+    assert store.add("a.json", b"one")
+    assert not store.add("a.json", b"one", force=True)
+    assert store.add("b.json", b"one")
+    assert len(objects(store)) == 1
+
+    # Новое содержимое раньше MIN_INTERVAL сохраняется только принудительно
+    assert not store.add("a.json", b"two")
+    assert store.add("a.json", b"two", force=True, seq=7)
+    assert len(objects(store)) == 2
+
+    reopened = BackupStore(str(tmp_path))
+    assert reopened.latest("a.json") == b"two"
+    assert reopened.latest("b.json") == b"one"
+    assert reopened.latest_seq("a.json") == 7
+    assert reopened.latest_seq("b.json") is None
+    assert not reopened.is_due("a.json")
+    assert reopened.is_due("c.json")
+
+
+def test_retention_keeps_newest_copy_of_every_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(BackupStore, "MAX_PER_FILE", 3)
+    store = BackupStore(str(tmp_path))
+    for i in range(5):
+        store.add("a.json", f"a{i}".encode(), force=True)
+    assert store.latest("a.json") == b"a4"
+    assert len(store._entries) == 3
+    assert len(objects(store)) == 3
+
+    # Копии старше MAX_AGE_DAYS удаляются, кроме последней
+    store._entries[0]["time"] -= (BackupStore.MAX_AGE_DAYS + 1) * 24 * 3600
+    store.add("b.json", b"b0")
+    assert [e["file"] for e in store._entries] == ["a.json", "a.json", "b.json"]
+    assert len(objects(store)) == 3
+
+
+def test_total_size_limit_spares_newest_copies(tmp_path, monkeypatch):
+    store = BackupStore(str(tmp_path))
+    store.add("a.json", os.urandom(4096))
+    size = store._entries[0]["size"]
+    monkeypatch.setattr(BackupStore, "MAX_TOTAL_BYTES", size * 2)
+    store.add("a.json", os.urandom(4096), force=True)
+    newest_a = os.urandom(4096)
+    store.add("a.json", newest_a, force=True)
+    newest_b = os.urandom(4096)
+    store.add("b.json", newest_b)
+
+    # Лимит меньше, чем нужно последним копиям двух файлов, — они всё равно остаются
+    assert [e["file"] for e in store._entries] == ["a.json", "b.json"]
+    assert store.latest("a.json") == newest_a
+    assert store.latest("b.json") == newest_b
+    assert len(objects(store)) == 2
@@ -0,0 +1,73 @@
+"""
+Индекс каталога: товары по имени без учёта регистра и отсортированный список имён.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import CatalogIndex, DataManager, Product, ProfileOperations  # noqa: E402
+
+PROFILE = "Тест"
+
+
+def product(name: str) -> dict:
+    return Product.create(name, 150.0, 30.0).to_dict()
+
+
+def catalog_name(manager: DataManager, text: str) -> str:
+    return manager.get_profile_data(PROFILE).catalog.get(text)["name"]
+
+
+def test_lookup_ignores_case_and_outer_spaces():
+    catalog = CatalogIndex([product("Гречка"), product("рис")])
+    assert catalog.get("  ГРЕЧКА ")["name"] == "Гречка"
+    assert "РИС" in catalog
+    assert "Пшено" not in catalog
+    assert catalog.sorted_names() == ["Гречка", "рис"]
+
+
+def test_add_rename_and_discard_keep_names_sorted():
+    catalog = CatalogIndex([product("Гречка"), product("Рис")])
+    catalog.add(product("Перловка"))
+    # Тот же товар в другом регистре заменяет прежний, а не дублирует его
+    catalog.add(product("ГРЕЧКА"))
+    assert catalog.sorted_names() == ["ГРЕЧКА", "Перловка", "Рис"]
+
+    renamed = product("Амарант")
+    catalog.rename("рис", renamed)
+    assert catalog.get("Рис") is None
+    assert catalog.get("амарант") is renamed
+    assert [p["name"] for p in catalog.sorted_products()] == ["Амарант", "ГРЕЧКА", "Перловка"]
+
+    assert catalog.discard("перловка")["name"] == "Перловка"
+    assert catalog.discard("Перловка") is None
+    assert len(catalog) == 2
+
+
+def test_profile_catalog_follows_operations(tmp_path):
+    # Операции получают точные имена: экраны находят их в индексе по введённому тексту
+    manager = DataManager(data_dir=str(tmp_path), history_horizon_days=None)
+    manager.create_profile(PROFILE)
+    manager.apply_operation(PROFILE, {"op": ProfileOperations.PRODUCT_ADD, "product": product("Гречка")})
+    manager.apply_operation(PROFILE, {"op": ProfileOperations.PRODUCT_ADD, "product": product("Рис")})
+    manager.apply_operation(PROFILE, {
+        "op": ProfileOperations.PRODUCT_EDIT,
+        "old_name": catalog_name(manager, "гречка"),
+        "product": product("Гречка ядрица")
+    })
+    manager.apply_operation(PROFILE, {"op": ProfileOperations.PRODUCT_DELETE, "name": catalog_name(manager, "РИС")})
+    catalog = manager.get_profile_data(PROFILE).catalog
+    assert catalog.sorted_names() == ["Гречка ядрица"]
+    manager.close()
+
+    reopened = DataManager(data_dir=str(tmp_path), history_horizon_days=None)
+    assert reopened.get_profile_data(PROFILE).catalog.sorted_names() == ["Гречка ядрица"]
+    reopened.close()
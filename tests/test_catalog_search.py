@@ -0,0 +1,59 @@
+"""
+Поиск по каталогу: префиксы слов без учёта регистра, а при опечатке — похожие названия.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import CatalogIndex, Product  # noqa: E402
+
+NAMES = ["Гречка ядрица", "Гречка продел", "Рис круглый", "Рис длинный", "Пшено", "Перловка"]
+
+
+def names(products) -> list:
+    return [p["name"] for p in products]
+
+
+@pytest.fixture
+def catalog():
+    return CatalogIndex([Product.create(name, 100.0, 10.0).to_dict() for name in NAMES])
+
+
+def test_every_query_word_is_a_prefix_of_some_name_word(catalog):
+    assert names(catalog.search("греч")) == ["Гречка продел", "Гречка ядрица"]
+    assert names(catalog.search("РИС ДЛ")) == ["Рис длинный"]
+    assert names(catalog.search("кругл рис")) == ["Рис круглый"]
+    assert names(catalog.search("  п ")) == ["Гречка продел", "Перловка", "Пшено"]
+
+
+def test_empty_query_and_limit(catalog):
+    assert names(catalog.search("")) == sorted(NAMES)
+    assert names(catalog.search("", limit=2)) == sorted(NAMES)[:2]
+    assert len(catalog.search("р", limit=1)) == 1
+
+
+def test_typo_falls_back_to_similar_names(catalog):
+    assert names(catalog.search("гречко")) == ["Гречка продел", "Гречка ядрица"]
+    assert names(catalog.search("перлвка")) == ["Перловка"]
+    # Более похожие названия идут первыми
+    assert names(catalog.search("рис крглый")) == ["Рис круглый", "Рис длинный"]
+    # Короткий запрос без совпадений не считается опечаткой
+    assert catalog.search("ьъ") == []
+    assert catalog.search("овсянка") == []
+
+
+def test_search_follows_catalog_changes(catalog):
+    catalog.discard("пшено")
+    assert catalog.search("пшен") == []
+    assert catalog.search("пшено") == []
+    catalog.rename("Перловка", Product.create("Перловая крупа", 90.0, 9.0).to_dict())
+    assert names(catalog.search("перлов")) == ["Перловая крупа"]
+    assert names(catalog.search("КРУП")) == ["Перловая крупа"]
@@ -0,0 +1,75 @@
+"""
+Дневные сводки профиля, перенесённого из старого profiles.json.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import json
+import os
+import sys
+from datetime import date
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DataManager, ProfileOperations, SQLiteDataManager  # noqa: E402
+
+PROFILE = "Тест"
+PRODUCT = "Гречка"
+
+
+@pytest.fixture
+def legacy_dir(tmp_path):
+    """Профиль в формате до сводок: история внутри склада, daily_stats нет."""
+    profile = {
+        "products": [{
+            "name": PRODUCT, "cost_price": 150.0, "profit": 30.0, "expenses": 120.0,
+            "percent_expenses": 80.0, "percent_profit": 20.0
+        }],
+        "stock": {PRODUCT: {
+            "current_quantity": 8.0,
+            "total_value": 800.0,
+            "history": [
+                {"date": "2026-01-05 10:00:00", "quantity": 10.0, "price_per_kg": 100.0,
+                 "operation": "пополнение", "total_amount": 1000.0, "balance_after": 10.0},
+                {"date": "2026-01-06 10:00:00", "quantity": -2.0, "price_per_kg": 100.0,
+                 "operation": "корректировка", "total_amount": 800.0, "balance_after": 8.0}
+            ]
+        }},
+        "orders": [{"number": 1, "date": "2026-01-07 12:00:00",
+                    "items": [{"product": PRODUCT, "quantity": 3.0, "price": 150.0}]}],
+        "next_order_number": 2
+    }
+    with open(tmp_path / "profiles.json", "w", encoding="utf-8") as f:
+        json.dump({PROFILE: profile}, f, ensure_ascii=False)
+    return tmp_path
+
+
+@pytest.mark.parametrize("manager_class", [DataManager, SQLiteDataManager])
+def test_migrated_history_is_backfilled_into_daily_stats(legacy_dir, manager_class):
+    manager = manager_class(data_dir=str(legacy_dir), history_horizon_days=None)
+    assert manager.get_day_stats(PROFILE, date(2026, 1, 5))["kg_in"] == 10.0
+    assert manager.get_day_stats(PROFILE, date(2026, 1, 6))["kg_corrected"] == -2.0
+    week = manager.get_week_stats(PROFILE, date(2026, 1, 7))
+    assert week["money_in"] == 1000.0
+    assert week["kg_sold"] == 3.0
+    assert week["revenue"] == 450.0
+    assert week["profit"] == 90.0
+    manager.close()
+
+    reopened = manager_class(data_dir=str(legacy_dir), history_horizon_days=None)
+    data = reopened.get_profile_data(PROFILE)
+    assert data[ProfileOperations.DAY_STATS_COMPLETE]
+    assert data["daily_stats"]["2026-01-05"]["kg_in"] == 10.0
+    reopened.close()
+
+
+def test_new_profile_does_not_rebuild_stats(tmp_path, monkeypatch):
+    manager = DataManager(data_dir=str(tmp_path), history_horizon_days=None)
+    manager.create_profile(PROFILE)
+    monkeypatch.setattr(manager, "rebuild_daily_stats", lambda name: pytest.fail("сводки пересчитаны"))
+    assert manager.get_week_stats(PROFILE, date(2026, 1, 7))["kg_sold"] == 0.0
+    manager.close()
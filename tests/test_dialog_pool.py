@@ -0,0 +1,74 @@
+"""
+Пул диалогов: закрытый диалог переиспользуется, открытый — нет, а повторный показ
+заменяет тексты и обратные вызовы прежнего.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+from collections import defaultdict
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.clock import Clock  # noqa: E402
+
+from main import ConfirmDialog, DialogPool, MessageDialog  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def empty_pool(monkeypatch):
+    monkeypatch.setattr(DialogPool, "_dialogs", defaultdict(list))
+
+
+def settle() -> None:
+    """Даёт завершиться анимации открытия и закрытия окна."""
+    for _ in range(20):
+        Clock.tick()
+
+
+def test_closed_dialog_is_reused_and_open_one_is_not():
+    first = DialogPool.acquire(MessageDialog).show("A", "первое")
+    nested = DialogPool.acquire(MessageDialog).show("B", "второе")
+    assert nested is not first
+
+    nested.close(None)
+    first.close(None)
+    settle()
+    assert first.parent is None
+    assert DialogPool.acquire(MessageDialog) is first
+    assert DialogPool.acquire(ConfirmDialog) is not first
+
+
+def test_show_replaces_texts_and_callbacks():
+    calls = []
+    dialog = DialogPool.acquire(MessageDialog).show("A", "первое", lambda: calls.append("A"))
+    dialog.close(None)
+    settle()
+
+    again = DialogPool.acquire(MessageDialog).show("B", "второе")
+    assert again is dialog
+    assert (again.title_label.text, again.message_label.text) == ("B", "второе")
+    again.close(None)
+    settle()
+    assert calls == ["A"]
+
+
+def test_confirm_answer_clears_both_callbacks():
+    calls = []
+    dialog = DialogPool.acquire(ConfirmDialog).show(
+        "УДАЛЕНИЕ", "Удалить?", lambda: calls.append("yes"), lambda: calls.append("no")
+    )
+    dialog.on_yes(None)
+    settle()
+    assert calls == ["yes"]
+    assert dialog.yes_callback is None and dialog.no_callback is None
+
+    # Нажатие после ответа (повтор события) ничего не вызывает
+    dialog.on_no(None)
+    settle()
+    assert calls == ["yes"]
@@ -0,0 +1,58 @@
+"""
+Колоночная история склада: построение из архивов и дополнение операциями.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DataManager, Product, ProfileOperations, SQLiteDataManager  # noqa: E402
+
+PROFILE = "Тест"
+PRODUCT = "Гречка"
+
+
+def stock_op(kind: str, quantity: float, price: float, month: int) -> dict:
+    return {
+        "op": kind,
+        "product": PRODUCT,
+        "quantity": quantity,
+        "price_per_kg": price,
+        "date": f"2026-{month:02d}-10 12:00:00"
+    }
+
+
+@pytest.mark.parametrize("manager_class", [DataManager, SQLiteDataManager])
+def test_columns_follow_stock_operations(tmp_path, manager_class):
+    manager = manager_class(data_dir=str(tmp_path), history_horizon_days=None)
+    manager.create_profile(PROFILE)
+    manager.apply_operation(PROFILE, {
+        "op": ProfileOperations.PRODUCT_ADD,
+        "product": Product.create(PRODUCT, 150.0, 30.0).to_dict()
+    })
+    manager.apply_operation(PROFILE, stock_op(ProfileOperations.STOCK_RECEIPT, 10.0, 100.0, 1))
+    columns = manager.get_history_columns(PROFILE, PRODUCT)
+    assert columns.last("корректировка") is None
+
+    manager.apply_operation(PROFILE, stock_op(ProfileOperations.STOCK_RECEIPT, 5.0, 120.0, 2))
+    manager.apply_operation(PROFILE, stock_op(ProfileOperations.STOCK_CORRECTION, 12.0, 110.0, 3))
+    columns = manager.get_history_columns(PROFILE, PRODUCT)
+    assert len(columns) == 3
+    assert columns.last("пополнение").price_per_kg == 120.0
+    assert columns.total("quantity", "2026-02-01", operation="пополнение") == 5.0
+    assert columns.total("total_amount", operation="пополнение") == 1600.0
+    assert columns.balance_at("2026-02-28") == 15.0
+    manager.close()
+
+    reopened = manager_class(data_dir=str(tmp_path), history_horizon_days=None)
+    columns = reopened.get_history_columns(PROFILE, PRODUCT)
+    assert [r.to_dict() for r in columns.records()] == \
+        [r.to_dict() for r in reopened.iter_stock_history(PROFILE, PRODUCT)]
+    reopened.close()
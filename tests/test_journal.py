@@ -0,0 +1,178 @@
+"""
+Журнал операций профиля после аварийного завершения посреди записи.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+from datetime import date
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DataManager, Product, ProfileOperations  # noqa: E402
+
+PROFILE = "Тест"
+PRODUCT = "Гречка"
+
+
+def open_manager(data_dir) -> DataManager:
+    return DataManager(data_dir=str(data_dir), history_horizon_days=None)
+
+
+def receipt(quantity: float, day: int = 1) -> dict:
+    return {
+        "op": ProfileOperations.STOCK_RECEIPT,
+        "product": PRODUCT,
+        "quantity": quantity,
+        "price_per_kg": 100.0,
+        "date": f"2026-01-{day:02d} 12:00:00"
+    }
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    manager = open_manager(tmp_path)
+    manager.create_profile(PROFILE)
+    manager.flush()
+    manager.apply_operation(PROFILE, {
+        "op": ProfileOperations.PRODUCT_ADD,
+        "product": Product.create(PRODUCT, 150.0, 30.0).to_dict()
+    })
+    manager.close()
+    return tmp_path
+
+
+def tear_last_line(path: str, line: str) -> None:
+    """Имитирует аварийное завершение: в файле остаётся начало строки без перевода строки."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line[:len(line) // 2])
+
+
+def test_appends_after_torn_journal_tail_survive_restart(data_dir):
+    manager = open_manager(data_dir)
+    tear_last_line(manager._journal_path(PROFILE), '{"op": "stock_receipt", "product": "Гречка", "seq": 99}')
+    manager.apply_operation(PROFILE, receipt(5.0, 2))
+    manager.apply_operation(PROFILE, receipt(7.0, 3))
+    manager.close()
+
+    manager = open_manager(data_dir)
+    data = manager.get_profile_data(PROFILE)
+    assert data["stock"][PRODUCT]["current_quantity"] == pytest.approx(12.0)
+    seqs = [entry["seq"] for entry in manager._read_jsonl(manager._journal_path(PROFILE))]
+    assert len(seqs) == len(set(seqs))
+    manager.close()
+
+
+def test_appends_after_torn_history_tail_survive(data_dir):
+    manager = open_manager(data_dir)
+    manager.apply_operation(PROFILE, receipt(1.0, 2))
+    tear_last_line(manager._history_path(PROFILE, PRODUCT), '{"date": "2026-01-03 12:00:00", "quantity": 2.0}')
+    manager.apply_operation(PROFILE, receipt(3.0, 4))
+    manager.close()
+
+    manager = open_manager(data_dir)
+    history = manager.get_stock_history(PROFILE, PRODUCT)
+    assert [record.quantity for record in history] == [1.0, 3.0]
+    manager.close()
+
+
+def test_torn_transaction_is_dropped_as_a_whole(data_dir):
+    manager = open_manager(data_dir)
+    manager.apply_operation(PROFILE, receipt(1.0, 2))
+    with manager.transaction(PROFILE):
+        manager.apply_operation(PROFILE, receipt(10.0, 3))
+        manager.apply_operation(PROFILE, receipt(20.0, 3))
+    manager.close()
+
+    # Сбой во время записи транзакции: от её строки в журнале осталась половина
+    path = manager._journal_path(PROFILE)
+    with open(path, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    assert b'"batch"' in lines[-1]
+    with open(path, "wb") as f:
+        f.write(b"".join(lines[:-1]) + lines[-1][:len(lines[-1]) // 2])
+
+    manager = open_manager(data_dir)
+    assert manager.get_profile_data(PROFILE)["stock"][PRODUCT]["current_quantity"] == pytest.approx(1.0)
+    manager.apply_operation(PROFILE, receipt(4.0, 4))
+    manager.close()
+
+    manager = open_manager(data_dir)
+    assert manager.get_profile_data(PROFILE)["stock"][PRODUCT]["current_quantity"] == pytest.approx(5.0)
+    manager.close()
+
+
+def test_interrupted_archiving_is_not_duplicated(data_dir, monkeypatch):
+    manager = open_manager(data_dir)
+    manager.apply_operation(PROFILE, receipt(1.0, 2))
+    manager.apply_operation(PROFILE, receipt(1.0, 2))
+    manager.apply_operation(PROFILE, receipt(3.0, 5))
+    manager.history_horizon_days = 30
+    data = manager.get_profile_data(PROFILE)
+
+    # Сбой после записи архива: текущая история не очищена, сводка не сохранена
+    monkeypatch.setattr(manager, "_drop_history_before", lambda *args: None)
+    assert manager._archive_history(PROFILE, data, today=date(2026, 4, 1))
+    del data[ProfileOperations.HISTORY_ARCHIVE]
+    monkeypatch.undo()
+    assert manager._archive_history(PROFILE, data, today=date(2026, 4, 1))
+
+    # Сбой после очистки текущей истории: сводка не сохранена
+    del data[ProfileOperations.HISTORY_ARCHIVE]
+    assert manager._archive_history(PROFILE, data, today=date(2026, 4, 1))
+
+    assert data[ProfileOperations.HISTORY_ARCHIVE]["products"][PRODUCT]["2026-01"]["records"] == 3
+    assert [r.quantity for r in manager.iter_stock_history(PROFILE, PRODUCT)] == [1.0, 1.0, 3.0]
+    assert manager.get_stock_history(PROFILE, PRODUCT) == []
+    manager.close()
+
+
+def test_profile_recreated_before_flush_keeps_its_data(tmp_path):
+    manager = open_manager(tmp_path)
+    manager.create_profile(PROFILE)
+    manager.apply_operation(PROFILE, {
+        "op": ProfileOperations.PRODUCT_ADD,
+        "product": Product.create("X", 100.0, 10.0).to_dict()
+    })
+    manager.delete_profile(PROFILE)
+    # Профиль с тем же именем создаётся раньше, чем фоновая запись удалит файлы старого
+    manager.create_profile(PROFILE)
+    manager.apply_operation(PROFILE, {
+        "op": ProfileOperations.PRODUCT_ADD,
+        "product": Product.create("Y", 100.0, 10.0).to_dict()
+    })
+    manager.apply_operation(PROFILE, dict(receipt(3.0, 2), product="Y"))
+    manager.close()
+
+    manager = open_manager(tmp_path)
+    data = manager.get_profile_data(PROFILE)
+    assert [p["name"] for p in data["products"]] == ["Y"]
+    assert data["stock"]["Y"]["current_quantity"] == pytest.approx(3.0)
+    assert [r.quantity for r in manager.get_stock_history(PROFILE, "Y")] == [3.0]
+    assert not [f for f in os.listdir(manager.profiles_dir) if f.endswith(".deleted")]
+    manager.close()
+
+
+def test_corrupt_snapshot_recovers_from_backup_without_losing_operations(data_dir):
+    manager = open_manager(data_dir)
+    manager.apply_operation(PROFILE, receipt(1.0, 2))
+    manager._compact_journal(PROFILE)
+    manager.flush()
+    # Вторая запись снимка в пределах BackupStore.MIN_INTERVAL
+    manager.apply_operation(PROFILE, receipt(2.0, 3))
+    manager._compact_journal(PROFILE)
+    manager.apply_operation(PROFILE, receipt(4.0, 4))
+    manager.close()
+
+    with open(manager._profile_path(PROFILE), "wb") as f:
+        f.write(b'{"products": [')
+
+    manager = open_manager(data_dir)
+    data = manager.get_profile_data(PROFILE)
+    assert data["stock"][PRODUCT]["current_quantity"] == pytest.approx(7.0)
+    manager.close()
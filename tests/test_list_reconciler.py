@@ -0,0 +1,98 @@
+"""
+Сверка карточек списка: новые создаются, изменённые обновляются, лишние удаляются,
+а порядок виджетов совпадает с порядком данных.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.uix.boxlayout import BoxLayout  # noqa: E402
+from kivy.uix.label import Label  # noqa: E402
+from kivy.uix.recycleview import RecycleView  # noqa: E402
+
+from main import ListReconciler  # noqa: E402
+
+
+class Cards:
+    """Контейнер и счётчики вызовов create/update."""
+
+    def __init__(self) -> None:
+        self.container = BoxLayout(orientation="vertical")
+        self.created = []
+        self.updated = []
+        self.reconciler = ListReconciler(self.container, key=lambda item: item[0],
+                                         create=self.create, update=self.update)
+
+    def create(self, item):
+        card = Label(text=item[1])
+        self.created.append(item[0])
+        self.container.add_widget(card)
+        return card
+
+    def update(self, card, item) -> None:
+        card.text = item[1]
+        self.updated.append(item[0])
+
+    def texts(self) -> list:
+        # children хранятся в обратном порядке
+        return [card.text for card in reversed(self.container.children)]
+
+    def widgets(self) -> dict:
+        return {card.text: card for card in self.container.children}
+
+
+def test_insert_keeps_existing_cards():
+    cards = Cards()
+    cards.reconciler.sync([("a", "A"), ("c", "C")])
+    before = cards.widgets()
+    cards.reconciler.sync([("a", "A"), ("b", "B"), ("c", "C"), ("d", "D")])
+    assert cards.texts() == ["A", "B", "C", "D"]
+    assert cards.created == ["a", "c", "b", "d"]
+    assert cards.updated == []
+    assert cards.widgets()["A"] is before["A"]
+    assert cards.widgets()["C"] is before["C"]
+
+
+def test_move_reorders_without_recreating():
+    cards = Cards()
+    cards.reconciler.sync([("a", "A"), ("b", "B"), ("c", "C"), ("d", "D")])
+    before = cards.widgets()
+    cards.reconciler.sync([("d", "D"), ("b", "B"), ("a", "A"), ("c", "C")])
+    assert cards.texts() == ["D", "B", "A", "C"]
+    assert cards.created == ["a", "b", "c", "d"]
+    assert cards.widgets() == before
+
+
+def test_remove_and_update_in_one_sync():
+    cards = Cards()
+    cards.reconciler.sync([("a", "A"), ("b", "B"), ("c", "C")])
+    removed = cards.widgets()["B"]
+    cards.reconciler.sync([("c", "C2"), ("a", "A")])
+    assert cards.texts() == ["C2", "A"]
+    assert removed.parent is None
+    assert cards.updated == ["c"]
+    assert cards.created == ["a", "b", "c"]
+
+    cards.reconciler.sync([])
+    assert cards.container.children == []
+
+
+def test_recycle_data_is_replaced_only_when_keys_change():
+    view = RecycleView()
+    view.data = [{"key": "a", "text": "A"}, {"key": "b", "text": "B"}]
+    rows = view.data
+    ListReconciler.sync_data(view, [{"key": "a", "text": "A"}, {"key": "b", "text": "B2"}], "key")
+    assert view.data is rows
+    assert view.data[1]["text"] == "B2"
+
+    ListReconciler.sync_data(view, [{"key": "b", "text": "B2"}, {"key": "a", "text": "A"}], "key")
+    assert view.data is not rows
+    assert [row["key"] for row in view.data] == ["b", "a"]
@@ -0,0 +1,39 @@
+"""
+Фоновая запись: объединение повторных сохранений одного файла.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+import time
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import PersistenceWorker  # noqa: E402
+
+
+def test_saves_after_idle_flush_are_still_coalesced():
+    worker = PersistenceWorker(delay=0.5)
+    written = []
+    # Барьер при пустой очереди (как в on_pause без изменений)
+    assert worker.flush()
+    for version in range(5):
+        worker.submit("profile.json", lambda v=version: written.append(v))
+        time.sleep(0.01)
+    worker.stop()
+    assert written == [4]
+
+
+def test_cancelled_task_is_not_run():
+    worker = PersistenceWorker(delay=0.2)
+    written = []
+    worker.submit("a", lambda: written.append("a"))
+    worker.submit("b", lambda: written.append("b"))
+    worker.cancel("a")
+    worker.stop()
+    assert written == ["b"]
@@ -0,0 +1,92 @@
+"""
+Сохранение профиля по изменённым поддеревьям: в журнал попадают только они.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import json
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DataManager, ProfileDocument, ProfileOperations  # noqa: E402
+
+PROFILE = "Тест"
+
+
+def document() -> ProfileDocument:
+    return ProfileDocument({
+        "products": [{"name": "Гречка", "cost_price": 150.0}],
+        "stock": {
+            "Гречка": {"current_quantity": 5.0, "total_value": 500.0},
+            "Рис": {"current_quantity": 2.0, "total_value": 160.0}
+        },
+        "orders": [{"number": 1, "items": [{"product": "Гречка", "quantity": 1.0}]}],
+        "daily_stats": {"2026-01-05": {"kg_in": 5.0}},
+        "next_order_number": 2
+    })
+
+
+def test_changes_are_tracked_per_subtree():
+    data = document()
+    assert not data.has_changes()
+
+    data["stock"]["Гречка"]["current_quantity"] = 4.0
+    data["orders"][0]["items"].append({"product": "Рис", "quantity": 1.0})
+    del data["stock"]["Рис"]
+    data["daily_stats"]["2026-01-06"] = {"kg_in": 1.0}
+    changed, deleted = data.take_changes()
+
+    assert [path for path, _ in changed] == [
+        ["orders"], ["daily_stats", "2026-01-06"], ["stock", "Гречка"]
+    ]
+    assert changed[2][1] == {"current_quantity": 4.0, "total_value": 500.0}
+    assert deleted == [["stock", "Рис"]]
+    assert not data.has_changes()
+
+
+def test_whole_subtree_replaces_its_keys_and_untracked_edits_are_skipped():
+    data = document()
+    data["stock"]["Гречка"]["total_value"] = 450.0
+    data["stock"] = {"Пшено": {"current_quantity": 1.0, "total_value": 90.0}}
+    with data.untracked():
+        data["next_order_number"] = 10
+    changed, deleted = data.take_changes()
+    assert changed == [[["stock"], {"Пшено": {"current_quantity": 1.0, "total_value": 90.0}}]]
+    assert deleted == []
+
+
+def test_direct_edit_drops_derived_totals():
+    data = document()
+    ProfileOperations.warehouse_totals(data)
+    data.take_changes()
+    data["stock"]["Гречка"]["current_quantity"] = 0.0
+    assert ProfileOperations.WAREHOUSE_TOTALS not in data
+    _, deleted = data.take_changes()
+    assert deleted == [[ProfileOperations.WAREHOUSE_TOTALS]]
+
+
+def test_saving_document_journals_only_changed_subtrees(tmp_path):
+    manager = DataManager(data_dir=str(tmp_path), history_horizon_days=None)
+    manager.update_profile_data(PROFILE, dict(document()))
+    manager.flush()
+
+    data = manager.get_profile_data(PROFILE)
+    data["stock"]["Рис"]["current_quantity"] = 3.0
+    manager.update_profile_data(PROFILE, data)
+    manager.close()
+
+    with open(manager._journal_path(PROFILE), encoding="utf-8") as f:
+        entry = json.loads(f.read().splitlines()[-1])
+    assert entry["op"] == ProfileOperations.PATCH
+    assert entry["set"] == [[["stock", "Рис"], {"current_quantity": 3.0, "total_value": 160.0}]]
+    assert entry["delete"] == []
+
+    reopened = DataManager(data_dir=str(tmp_path), history_horizon_days=None)
+    assert reopened.get_profile_data(PROFILE)["stock"]["Рис"]["current_quantity"] == 3.0
+    reopened.close()
@@ -0,0 +1,66 @@
+"""
+Форматы снимков профиля: данные переживают запись и чтение в любом формате,
+а формат существующего файла определяется по содержимому.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DataManager, Product, ProfileOperations, Serializers  # noqa: E402
+
+PROFILE = "Тест"
+DOCUMENT = {
+    "products": [Product.create("Гречка «ядрица»", 150.5, 30.25).to_dict()],
+    "stock": {"Гречка «ядрица»": {"current_quantity": 0.1 + 0.2, "total_value": 1e-9}},
+    "orders": [{"number": 1, "date": "2026-01-07 12:00:00", "items": []}],
+    "daily_stats": {},
+    "next_order_number": 2,
+    "nested": {"empty": [], "none": None, "flag": False}
+}
+
+
+@pytest.mark.parametrize("name", sorted(Serializers.REGISTRY))
+def test_document_round_trips(name):
+    serializer = Serializers.get(name)
+    payload = serializer.dumps(DOCUMENT)
+    assert Serializers.detect(payload).loads(payload) == DOCUMENT
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        Serializers.get("yaml")
+
+
+def test_profile_written_in_one_format_opens_in_another(tmp_path):
+    manager = DataManager(data_dir=str(tmp_path), serializer="pickle", history_horizon_days=None)
+    manager.create_profile(PROFILE)
+    manager.apply_operation(PROFILE, {
+        "op": ProfileOperations.PRODUCT_ADD,
+        "product": Product.create("Гречка", 150.0, 30.0).to_dict()
+    })
+    manager.update_profile_data(PROFILE, dict(manager.get_profile_data(PROFILE)))
+    expected = dict(manager.get_profile_data(PROFILE))
+    path = manager._profile_path(PROFILE)
+    manager.close()
+    with open(path, "rb") as f:
+        assert f.read(1) == b"\x80"
+
+    manager = DataManager(data_dir=str(tmp_path), serializer="json", history_horizon_days=None)
+    assert dict(manager.get_profile_data(PROFILE)) == expected
+    # Следующий полный снимок пишется уже в формате хранилища
+    manager.update_profile_data(PROFILE, dict(manager.get_profile_data(PROFILE)))
+    manager.close()
+    with open(path, "rb") as f:
+        assert f.read(1) == b"{"
+
+    manager = DataManager(data_dir=str(tmp_path), serializer="pickle", history_horizon_days=None)
+    assert dict(manager.get_profile_data(PROFILE)) == expected
+    manager.close()
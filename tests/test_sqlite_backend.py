@@ -0,0 +1,98 @@
+"""
+SQLite-хранилище: те же данные, что у JSON-хранилища, и однократный перенос из него.
+
+Запуск из корня репозитория:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+pytest.importorskip("kivy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DataManager, Product, ProfileOperations, SQLiteDataManager  # noqa: E402
+
+PROFILE = "Тест"
+OPERATIONS = [
+    {"op": ProfileOperations.PRODUCT_ADD, "product": Product.create("Гречка", 150.0, 30.0).to_dict()},
+    {"op": ProfileOperations.PRODUCT_ADD, "product": Product.create("Рис", 120.0, 20.0).to_dict()},
+    {"op": ProfileOperations.STOCK_RECEIPT, "product": "Гречка", "quantity": 10.0, "price_per_kg": 100.0,
+     "date": "2026-01-05 10:00:00"},
+    {"op": ProfileOperations.STOCK_RECEIPT, "product": "Рис", "quantity": 4.0, "price_per_kg": 80.0,
+     "date": "2026-01-05 11:00:00"},
+    {"op": ProfileOperations.STOCK_CORRECTION, "product": "Гречка", "quantity": 9.5, "price_per_kg": 100.0,
+     "date": "2026-01-06 10:00:00"},
+    {"op": ProfileOperations.ORDER_ADD, "order": {
+        "number": 1, "date": "2026-01-07 12:00:00",
+        "items": [{"product": "Гречка", "quantity": 2.0, "price": 150.0},
+                  {"product": "Рис", "quantity": 1.0, "price": 120.0}]
+    }},
+    {"op": ProfileOperations.PRODUCT_EDIT, "old_name": "Рис",
+     "product": Product.create("Рис круглый", 125.0, 25.0).to_dict()},
+]
+# Ключи, которые хранилища пересчитывают сами и могут хранить по-разному
+DERIVED = (ProfileOperations.ORDER_INDEX, ProfileOperations.WAREHOUSE_TOTALS)
+
+
+def snapshot(manager: DataManager) -> dict:
+    """Документ профиля без производных ключей и история каждого товара."""
+    data = manager.get_profile_data(PROFILE)
+    document = {k: v for k, v in dict(data).items() if k not in DERIVED}
+    history = {
+        product: [r.to_dict() for r in manager.iter_stock_history(PROFILE, product)]
+        for product in data["stock"]
+    }
+    return {"document": document, "history": history}
+
+
+def fill(manager: DataManager) -> None:
+    manager.create_profile(PROFILE)
+    for op in OPERATIONS:
+        manager.apply_operation(PROFILE, op)
+    manager.close()
+
+
+def test_sqlite_matches_json_after_restart(tmp_path):
+    fill(DataManager(data_dir=str(tmp_path / "json"), history_horizon_days=None))
+    fill(SQLiteDataManager(data_dir=str(tmp_path / "sqlite"), history_horizon_days=None))
+
+    json_manager = DataManager(data_dir=str(tmp_path / "json"), history_horizon_days=None)
+    sqlite_manager = SQLiteDataManager(data_dir=str(tmp_path / "sqlite"), history_horizon_days=None)
+    expected = snapshot(json_manager)
+    assert set(expected["history"]) == {"Гречка", "Рис круглый"}
+    assert snapshot(sqlite_manager) == expected
+    json_manager.close()
+    sqlite_manager.close()
+
+
+def test_json_profiles_are_migrated_once(tmp_path):
+    fill(DataManager(data_dir=str(tmp_path), history_horizon_days=None))
+    expected = snapshot(DataManager(data_dir=str(tmp_path), history_horizon_days=None))
+
+    manager = SQLiteDataManager(data_dir=str(tmp_path), history_horizon_days=None)
+    assert manager.list_profiles() == [PROFILE]
+    assert snapshot(manager) == expected
+    manager.apply_operation(PROFILE, {"op": ProfileOperations.PRODUCT_DELETE, "name": "Гречка"})
+    manager.close()
+
+    # JSON-файлы остались на месте, но повторно не переносятся
+    reopened = SQLiteDataManager(data_dir=str(tmp_path), history_horizon_days=None)
+    data = reopened.get_profile_data(PROFILE)
+    assert [p["name"] for p in data["products"]] == ["Рис круглый"]
+    assert len(data["orders"]) == 1
+    assert len(list(reopened.iter_stock_history(PROFILE, "Рис круглый"))) == 1
+    reopened.close()
+
+
+def test_archived_json_history_stays_readable_after_migration(tmp_path):
+    fill(DataManager(data_dir=str(tmp_path), history_horizon_days=30))
+    expected = snapshot(DataManager(data_dir=str(tmp_path), history_horizon_days=30))
+    assert expected["document"][ProfileOperations.HISTORY_ARCHIVE]["products"]
+
+    manager = SQLiteDataManager(data_dir=str(tmp_path), history_horizon_days=30)
+    assert snapshot(manager) == expected
+    assert manager.get_stock_history(PROFILE, "Гречка") == []
+    manager.close()